@@ -1,12 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from pydantic import BaseModel
+import io
+import json
+import zipfile
+from typing import AsyncIterator, List
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.models import Document
 from app.db.session import get_db
-from app.services.ingestion import create_document_from_text, upsert_document_from_bytes
+from app.services.ingestion import (
+    BulkItem,
+    create_document_from_text,
+    hash_file,
+    ingest_batch,
+    ingest_many,
+    ingest_zip,
+    sha256_bytes,
+    upsert_document_from_file,
+)
+from app.services.jobs import submit_job
 
 router = APIRouter()
 
@@ -19,13 +36,19 @@ class TextIn(BaseModel):
 
 @router.post("/upload")
 async def upload_document(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    data = await file.read()
-    doc, created = upsert_document_from_bytes(
-        db,
-        filename=file.filename or "upload",
-        content_type=file.content_type or "application/octet-stream",
-        data=data,
-    )
+    def run() -> tuple[Document, bool]:
+        # Starlette already spooled the body (RAM, then disk); hash it in place
+        # instead of copying it. Extraction (pypdf) is CPU-bound too, so both
+        # stay off the event loop.
+        return upsert_document_from_file(
+            db,
+            filename=file.filename or "upload",
+            content_type=file.content_type or "application/octet-stream",
+            fileobj=file.file,
+            digest=hash_file(file.file),
+        )
+
+    doc, created = await run_in_threadpool(run)
     return {"document_id": doc.id, "created": created, "sha256": doc.sha256}
 
 
@@ -40,6 +63,121 @@ def upload_text(payload: TextIn, db: Session = Depends(get_db)):
     return {"document_id": doc.id, "created": created, "sha256": doc.sha256}
 
 
+def _bulk_response(db: Session, results: list[dict], index: bool, errors: list[dict] | None = None) -> dict:
+    # Blocking (submit_job commits): async endpoints call it via run_in_threadpool.
+    new_ids = [r["document_id"] for r in results if r["created"]]
+    out: dict = {
+        "received": len(results),
+        "created": len(new_ids),
+        "duplicates": len(results) - len(new_ids),
+        "documents": results,
+    }
+    if errors is not None:
+        out["errors"] = errors
+    if index and new_ids:
+        job = submit_job(db, "documents", {"document_ids": new_ids})
+        out["index_job_id"] = job.id
+    return out
+
+
+@router.post("/bulk")
+async def bulk_upload(
+    files: List[UploadFile] = File(...),
+    index: bool = Query(False, description="Queue an index job for the new documents"),
+    db: Session = Depends(get_db),
+):
+    def run() -> list[dict]:
+        # Starlette already spooled each part; hash in place instead of copying.
+        items = (
+            BulkItem(
+                filename=f.filename or "upload",
+                content_type=f.content_type or "application/octet-stream",
+                fileobj=f.file,
+                digest=hash_file(f.file),
+            )
+            for f in files
+        )
+        return ingest_many(db, items)
+
+    return await run_in_threadpool(_bulk_response, db, await run_in_threadpool(run), index)
+
+
+@router.post("/bulk/zip")
+async def bulk_upload_zip(
+    file: UploadFile = File(...),
+    index: bool = Query(False, description="Queue an index job for the new documents"),
+    db: Session = Depends(get_db),
+):
+    # zipfile reads the already-spooled upload directly (it only needs seek/read).
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Not a valid zip archive")
+    with archive:
+        results = await run_in_threadpool(ingest_zip, db, archive)
+    return await run_in_threadpool(_bulk_response, db, results, index)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[tuple[int, bytes]]:
+    """(1-based line number, line) from the streamed body; only the unterminated tail is buffered."""
+    tail: list[bytes] = []
+    line_no = 0
+    async for chunk in request.stream():
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(tail) + lines[0]
+            tail = []
+            for line in lines:
+                line_no += 1
+                yield line_no, line
+        if rest:
+            tail.append(rest)
+    yield line_no + 1, b"".join(tail)
+
+
+def _parse_ndjson_line(line: bytes) -> BulkItem:
+    doc = TextIn.model_validate(json.loads(line))
+    data = doc.text.encode("utf-8")
+    return BulkItem(
+        filename=doc.filename,
+        content_type=doc.content_type,
+        fileobj=io.BytesIO(data),
+        digest=sha256_bytes(data),
+    )
+
+
+@router.post("/bulk/ndjson")
+async def bulk_upload_ndjson(
+    request: Request,
+    index: bool = Query(False, description="Queue an index job for the new documents"),
+    db: Session = Depends(get_db),
+):
+    """
+    One {"filename", "content_type", "text"} object per line; streamed, not
+    buffered. Batches are committed as they fill, so an invalid line doesn't
+    fail the request: it is reported under "errors" and the other lines are
+    ingested (and indexed with index=true) as usual.
+    """
+    results: list[dict] = []
+    errors: list[dict] = []
+    batch: list[BulkItem] = []
+    size = max(1, settings.BULK_INGEST_BATCH_SIZE)
+    async for line_no, line in _ndjson_lines(request):
+        if not line.strip():
+            continue
+        try:
+            batch.append(_parse_ndjson_line(line))
+        except (ValueError, ValidationError) as exc:
+            errors.append({"line": line_no, "error": str(exc)})
+            continue
+        if len(batch) >= size:
+            results.extend(await run_in_threadpool(ingest_batch, db, batch))
+            batch = []
+    if batch:
+        results.extend(await run_in_threadpool(ingest_batch, db, batch))
+    return await run_in_threadpool(_bulk_response, db, results, index, errors)
+
+
 @router.get("")
 def list_documents(db: Session = Depends(get_db)):
     docs = db.query(Document).order_by(Document.created_at.desc()).all()
@@ -1,26 +1,129 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.db.models import Document
 from app.db.session import get_db
-from app.services.indexing import index_document, index_status, reindex_all
+from app.services.indexing import (
+    index_document,
+    index_status,
+    rebuild_collection,
+    rebuild_status,
+    reindex_all,
+    rollback_collection,
+)
+from app.services.jobs import job_status, list_jobs, submit_job
 
 router = APIRouter()
 
 
+class JobRequest(BaseModel):
+    kind: Literal["reindex", "document", "documents"] = "reindex"
+    mode: Literal["full", "incremental"] = "full"
+    workers: int = Field(1, ge=1, le=64)
+    document_id: int | None = None
+    document_ids: list[int] | None = None
+    incremental: bool = False
+
+
+def _job_params(req: JobRequest) -> dict:
+    if req.kind == "document":
+        return {"document_id": req.document_id, "incremental": req.incremental}
+    if req.kind == "documents":
+        return {"document_ids": req.document_ids, "incremental": req.incremental}
+    return {"mode": req.mode, "workers": req.workers}
+
+
+def _queued(job) -> dict:
+    return {"job_id": job.id, "status": job.status, "status_url": f"/index/jobs/{job.id}"}
+
+
 @router.post("/reindex")
-def reindex(db: Session = Depends(get_db)):
-    return reindex_all(db)
+def reindex(
+    mode: Literal["full", "incremental"] = Query("full"),
+    workers: int = Query(1, ge=1, le=64, description="Embedding worker processes (bulk mode when > 1)"),
+    background: bool = Query(False, description="Queue as a job and return its id immediately"),
+    db: Session = Depends(get_db),
+):
+    if background:
+        return _queued(submit_job(db, "reindex", {"mode": mode, "workers": workers}))
+    try:
+        return reindex_all(db, mode=mode, workers=workers)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/rebuild")
+def rebuild(
+    workers: int = Query(1, ge=1, le=64),
+    db: Session = Depends(get_db),
+):
+    try:
+        return rebuild_collection(db, workers=workers)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/rebuild/status")
+def rebuild_progress():
+    return rebuild_status()
+
+
+@router.post("/rollback")
+def rollback():
+    try:
+        return rollback_collection()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/jobs")
+def create_job(req: JobRequest, db: Session = Depends(get_db)):
+    if req.kind == "document":
+        if req.document_id is None:
+            raise HTTPException(status_code=422, detail="document_id is required for kind=document")
+        if db.get(Document, req.document_id) is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+    if req.kind == "documents" and not req.document_ids:
+        raise HTTPException(status_code=422, detail="document_ids is required for kind=documents")
+    return _queued(submit_job(db, req.kind, _job_params(req)))
+
+
+@router.get("/jobs")
+def jobs(
+    status: Literal["queued", "running", "succeeded", "failed"] | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    return list_jobs(db, status=status, limit=limit)
+
+
+@router.get("/jobs/{job_id}")
+def job(job_id: int, db: Session = Depends(get_db)):
+    out = job_status(db, job_id)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return out
 
 
 @router.post("/{document_id}")
-def index_one(document_id: int, db: Session = Depends(get_db)):
+def index_one(
+    document_id: int,
+    incremental: bool = Query(False),
+    background: bool = Query(False, description="Queue as a job and return its id immediately"),
+    db: Session = Depends(get_db),
+):
     doc = db.query(Document).filter(Document.id == document_id).one_or_none()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    return index_document(db, document_id)
+    if background:
+        job = submit_job(db, "document", {"document_id": document_id, "incremental": incremental})
+        return _queued(job)
+    return index_document(db, document_id, incremental=incremental)
 
 
 @router.get("/status")
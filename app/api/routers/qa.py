@@ -1,24 +1,25 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from pydantic import Field
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routers.search import SearchFiltersIn
 from app.core.config import settings
-from app.db.session import get_db
-from app.services.qa import qa as qa_service
+from app.db.session import get_async_db
+from app.services.qa import qa_async
 
 router = APIRouter()
 
 
-class QAIn(BaseModel):
+class QAIn(SearchFiltersIn):
     question: str = Field(..., min_length=1)
     top_k: int = Field(default=settings.DEFAULT_TOP_K, ge=1, le=50)
 
 
 @router.post("")
-def qa_endpoint(payload: QAIn, db: Session = Depends(get_db)):
-    out = qa_service(db, payload.question, payload.top_k)
+async def qa_endpoint(payload: QAIn, db: AsyncSession = Depends(get_async_db)):
+    out = await qa_async(db, payload.question, payload.top_k, payload.to_filter())
 
     # Hard guard: always include sources key (even if empty list)
     if "sources" not in out:
@@ -1,19 +1,93 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Annotated, Literal
+
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
-from app.services.search import semantic_search
+from app.core.embeddings import query_cache
+from app.core.vector_store import FILENAME_PREFIX_MAX, SearchFilter
+from app.db.session import get_async_db
+from app.services.search import (
+    hybrid_search_async,
+    keyword_search_async,
+    semantic_search_async,
+    semantic_search_batch_async,
+)
 
 router = APIRouter()
 
 
+class SearchFiltersIn(BaseModel):
+    """Metadata filters shared by /search (query string), /search/batch and /qa (body)."""
+
+    document_ids: list[int] | None = None
+    content_type: str | None = None
+    filename_prefix: str | None = Field(default=None, min_length=1, max_length=FILENAME_PREFIX_MAX)
+    created_from: datetime | None = Field(default=None, description="inclusive")
+    created_to: datetime | None = Field(default=None, description="exclusive")
+
+    def to_filter(self) -> SearchFilter | None:
+        flt = SearchFilter(
+            document_ids=tuple(self.document_ids) if self.document_ids is not None else None,
+            content_type=self.content_type,
+            filename_prefix=self.filename_prefix,
+            created_from=self.created_from,
+            created_to=self.created_to,
+        )
+        return None if flt.is_empty() else flt
+
+
+def query_filters(
+    document_ids: list[int] | None = Query(None),
+    content_type: str | None = Query(None),
+    filename_prefix: str | None = Query(None, min_length=1, max_length=FILENAME_PREFIX_MAX),
+    created_from: datetime | None = Query(None, description="inclusive"),
+    created_to: datetime | None = Query(None, description="exclusive"),
+) -> SearchFilter | None:
+    return SearchFiltersIn(
+        document_ids=document_ids,
+        content_type=content_type,
+        filename_prefix=filename_prefix,
+        created_from=created_from,
+        created_to=created_to,
+    ).to_filter()
+
+
+class BatchSearchIn(SearchFiltersIn):
+    queries: list[Annotated[str, Field(min_length=1)]] = Field(
+        ..., min_length=1, max_length=settings.SEARCH_BATCH_MAX_QUERIES
+    )
+    top_k: int = Field(default=settings.DEFAULT_TOP_K, ge=1, le=50)
+    hydrate: bool = False
+
+
 @router.get("")
-def search(
+async def search(
     q: str = Query(..., min_length=1),
     top_k: int = Query(settings.DEFAULT_TOP_K, ge=1, le=50),
-    db: Session = Depends(get_db),
+    mode: Literal["semantic", "keyword", "hybrid"] = Query("semantic"),
+    hydrate: bool = Query(False, description="semantic mode: load every hit from Postgres, not the vector payload"),
+    flt: SearchFilter | None = Depends(query_filters),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return semantic_search(db, q, top_k=top_k)
\ No newline at end of file
+    if mode == "keyword":
+        return await keyword_search_async(db, q, top_k=top_k, filters=flt)
+    if mode == "hybrid":
+        return await hybrid_search_async(db, q, top_k=top_k, filters=flt)
+    return await semantic_search_async(db, q, top_k=top_k, hydrate=hydrate, filters=flt)
+
+
+@router.post("/batch")
+async def search_batch(payload: BatchSearchIn, db: AsyncSession = Depends(get_async_db)):
+    return await semantic_search_batch_async(
+        db, payload.queries, top_k=payload.top_k, hydrate=payload.hydrate, filters=payload.to_filter()
+    )
+
+
+@router.get("/cache")
+def cache_stats():
+    return query_cache.stats()
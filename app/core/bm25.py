@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Iterable
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+# Frequent enough to carry almost no BM25 weight, and they have the longest postings.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the their this to was were will with".split()
+)
+
+_MAX_TF = np.iinfo(np.uint16).max
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens, stopwords dropped (no stemming)."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over chunk ids.
+
+    Postings are per-term NumPy arrays (int32 doc numbers, uint16 term
+    frequencies) grown by doubling. Doc numbers are internal and only ever
+    increase, so every postings list is sorted. Replacing or removing a chunk
+    clears its live flag; its old postings (and their share of df, as in
+    Lucene) stay until compact() rewrites the arrays.
+
+    search() is term-at-a-time with MaxScore pruning: terms are scored in
+    decreasing order of their largest possible contribution, and once the
+    terms left can't lift an unseen chunk into the top k, they are only looked
+    up (searchsorted) for the surviving candidates.
+
+    Thread-safe; one writer at a time.
+    """
+
+    _INITIAL_CAPACITY = 4
+    # save() compacts first when more than this share of doc numbers is dead.
+    COMPACT_DEAD_FRACTION = 0.25
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._terms: dict[str, int] = {}
+        self._docs: list[np.ndarray] = []
+        self._tfs: list[np.ndarray] = []
+        self._sizes: list[int] = []
+        self._max_tf: list[int] = []
+        self._doc_chunk = np.zeros(0, dtype=np.int64)
+        self._doc_len = np.zeros(0, dtype=np.int32)
+        self._live = np.zeros(0, dtype=bool)
+        self._n_docs = 0
+        self._chunk_doc: dict[int, int] = {}
+        self._live_len = 0
+        self._min_len = 0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._chunk_doc)
+
+    # --- writes ---
+    def _ensure_docs(self, n: int) -> None:
+        if len(self._live) >= n:
+            return
+        grow = max(n, 2 * len(self._live), self._INITIAL_CAPACITY)
+        self._doc_chunk = np.concatenate([self._doc_chunk, np.zeros(grow - len(self._doc_chunk), dtype=np.int64)])
+        self._doc_len = np.concatenate([self._doc_len, np.zeros(grow - len(self._doc_len), dtype=np.int32)])
+        self._live = np.concatenate([self._live, np.zeros(grow - len(self._live), dtype=bool)])
+
+    def _term_id(self, term: str) -> int:
+        tid = self._terms.get(term)
+        if tid is None:
+            tid = self._terms[term] = len(self._sizes)
+            self._docs.append(np.empty(0, dtype=np.int32))
+            self._tfs.append(np.empty(0, dtype=np.uint16))
+            self._sizes.append(0)
+            self._max_tf.append(0)
+        return tid
+
+    def _append(self, tid: int, docs: list[int], tfs: list[int]) -> None:
+        n, m = self._sizes[tid], len(docs)
+        if n + m > len(self._docs[tid]):
+            cap = max(n + m, 2 * len(self._docs[tid]), self._INITIAL_CAPACITY)
+            new_docs = np.empty(cap, dtype=np.int32)
+            new_tfs = np.empty(cap, dtype=np.uint16)
+            new_docs[:n] = self._docs[tid][:n]
+            new_tfs[:n] = self._tfs[tid][:n]
+            self._docs[tid], self._tfs[tid] = new_docs, new_tfs
+        clipped = np.minimum(tfs, _MAX_TF)
+        self._docs[tid][n : n + m] = docs
+        self._tfs[tid][n : n + m] = clipped
+        self._sizes[tid] = n + m
+        self._max_tf[tid] = max(self._max_tf[tid], int(clipped.max()))
+
+    def _remove_one(self, chunk_id: int) -> None:
+        docno = self._chunk_doc.pop(chunk_id, None)
+        if docno is not None:
+            self._live[docno] = False
+            self._live_len -= int(self._doc_len[docno])
+
+    def add_many(self, items: Iterable[tuple[int, str]]) -> None:
+        """Index (chunk_id, text) pairs, replacing any earlier text of the same chunk."""
+        with self._lock:
+            new_postings: dict[int, tuple[list[int], list[int]]] = {}
+            for chunk_id, text in items:
+                self._remove_one(chunk_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+
+                docno = self._n_docs
+                self._ensure_docs(docno + 1)
+                self._n_docs += 1
+                self._doc_chunk[docno] = chunk_id
+                self._doc_len[docno] = length
+                self._live[docno] = True
+                self._chunk_doc[chunk_id] = docno
+                self._live_len += length
+                self._min_len = length if docno == 0 else min(self._min_len, length)
+
+                for term, tf in counts.items():
+                    docs, tfs = new_postings.setdefault(self._term_id(term), ([], []))
+                    docs.append(docno)
+                    tfs.append(tf)
+
+            # One array write per term per call, not per posting.
+            for tid, (docs, tfs) in new_postings.items():
+                self._append(tid, docs, tfs)
+            self.dirty = True
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove_one(chunk_id)
+            self.dirty = True
+
+    def dead_fraction(self) -> float:
+        return 1.0 - len(self._chunk_doc) / self._n_docs if self._n_docs else 0.0
+
+    def compact(self) -> None:
+        """Drop dead doc numbers from every postings list and renumber."""
+        with self._lock:
+            n = self._n_docs
+            live = self._live[:n]
+            new_no = (np.cumsum(live) - 1).astype(np.int32)
+
+            terms: dict[str, int] = {}
+            docs: list[np.ndarray] = []
+            tfs: list[np.ndarray] = []
+            max_tf: list[int] = []
+            for term, tid in self._terms.items():
+                d = self._docs[tid][: self._sizes[tid]]
+                keep = live[d]
+                if not keep.any():
+                    continue
+                terms[term] = len(docs)
+                docs.append(new_no[d[keep]])
+                tfs.append(self._tfs[tid][: self._sizes[tid]][keep])
+                max_tf.append(int(tfs[-1].max()))
+
+            self._terms, self._docs, self._tfs, self._max_tf = terms, docs, tfs, max_tf
+            self._sizes = [len(d) for d in docs]
+            self._doc_chunk = self._doc_chunk[:n][live].copy()
+            self._doc_len = self._doc_len[:n][live].copy()
+            self._n_docs = len(self._doc_chunk)
+            self._live = np.ones(self._n_docs, dtype=bool)
+            self._chunk_doc = {int(c): i for i, c in enumerate(self._doc_chunk)}
+            self._min_len = int(self._doc_len.min()) if self._n_docs else 0
+            self.dirty = True
+
+    # --- search ---
+    def search(
+        self, query: str, top_k: int, prune: bool = True, allowed: Iterable[int] | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        (chunk_id, score) for the top_k chunks, best first (ties by chunk id).
+        prune=False scores every posting of every query term (for comparison).
+        allowed restricts the results to those chunk ids.
+        """
+        with self._lock:
+            terms = [self._terms[t] for t in dict.fromkeys(tokenize(query)) if t in self._terms]
+            if not terms or not self._chunk_doc or top_k <= 0:
+                return []
+
+            n = self._n_docs
+            k1, b = self.k1, self.b
+            avgdl = max(self._live_len / len(self._chunk_doc), 1.0)
+            live = self._live[:n]
+            if allowed is not None:
+                keep = np.zeros(n, dtype=bool)
+                keep[[self._chunk_doc[c] for c in allowed if c in self._chunk_doc]] = True
+                live = live & keep
+
+            df = np.array([self._sizes[t] for t in terms], dtype=np.float64)
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            # Per-term upper bound: highest tf over the shortest document.
+            max_tf = np.array([self._max_tf[t] for t in terms], dtype=np.float64)
+            upper = idf * max_tf * (k1 + 1) / (max_tf + k1 * (1 - b + b * self._min_len / avgdl))
+
+            order = np.argsort(-upper, kind="stable")
+            # remaining[i]: the most that terms order[i:] can still add to any chunk
+            remaining = np.append(np.cumsum(upper[order][::-1])[::-1], 0.0)
+
+            acc = np.zeros(n, dtype=np.float64)
+            seen = np.empty(0, dtype=np.int32)
+            candidates: np.ndarray | None = None
+
+            for i, pos in enumerate(order):
+                tid = terms[pos]
+                docs = self._docs[tid][: self._sizes[tid]]
+                tfs = self._tfs[tid][: self._sizes[tid]]
+                if candidates is None:
+                    acc[docs] += self._term_scores(idf[pos], tfs, docs, avgdl)
+                    seen = np.union1d(seen, docs) if len(seen) else docs
+                    last = i + 1 == len(order)
+                    if prune and not last and self._kth(acc, seen[live[seen]], top_k) > remaining[i + 1]:
+                        # No chunk outside `seen` can reach the top k any more.
+                        candidates = seen[live[seen]]
+                else:
+                    idx = np.searchsorted(docs, candidates)
+                    found = idx < len(docs)
+                    found[found] = docs[idx[found]] == candidates[found]
+                    hit = candidates[found]
+                    acc[hit] += self._term_scores(idf[pos], tfs[idx[found]], hit, avgdl)
+
+                if candidates is not None:
+                    theta = self._kth(acc, candidates, top_k)
+                    candidates = candidates[acc[candidates] + remaining[i + 1] >= theta]
+
+            final = seen[live[seen]] if candidates is None else candidates
+            scores = acc[final]
+            if len(final) > top_k:
+                keep = scores >= np.partition(scores, -top_k)[-top_k]
+                final, scores = final[keep], scores[keep]
+            chunk_ids = self._doc_chunk[final]
+            best = np.lexsort((chunk_ids, -scores))[:top_k]
+            return [(int(chunk_ids[j]), float(scores[j])) for j in best]
+
+    def _term_scores(self, idf: float, tfs: np.ndarray, docs: np.ndarray, avgdl: float) -> np.ndarray:
+        tf = tfs.astype(np.float64)
+        norm = self.k1 * (1 - self.b + self.b * self._doc_len[docs] / avgdl)
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    @staticmethod
+    def _kth(acc: np.ndarray, docs: np.ndarray, k: int) -> float:
+        if len(docs) < k:
+            return 0.0
+        return float(np.partition(acc[docs], -k)[-k])
+
+    # --- persistence ---
+    def save(self, path: str) -> None:
+        """Write the index to <path>/index.npz (atomically replaced)."""
+        with self._lock:
+            if self.dead_fraction() > self.COMPACT_DEAD_FRACTION:
+                self.compact()
+            sizes = np.array(self._sizes, dtype=np.int64)
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            arrays = {
+                # \w+ tokens never contain a newline
+                "terms": np.frombuffer("\n".join(self._terms).encode("utf-8"), dtype=np.uint8),
+                "offsets": offsets,
+                "docs": np.concatenate([d[:s] for d, s in zip(self._docs, self._sizes)] or [np.empty(0, np.int32)]),
+                "tfs": np.concatenate([t[:s] for t, s in zip(self._tfs, self._sizes)] or [np.empty(0, np.uint16)]),
+                "max_tf": np.array(self._max_tf, dtype=np.int32),
+                "doc_chunk": self._doc_chunk[: self._n_docs],
+                "doc_len": self._doc_len[: self._n_docs],
+                "live": self._live[: self._n_docs],
+            }
+            os.makedirs(path, exist_ok=True)
+            tmp = os.path.join(path, "index.npz.tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, os.path.join(path, "index.npz"))
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, k1: float = 1.2, b: float = 0.75) -> BM25Index | None:
+        """The index saved under path, or None if there is none."""
+        file = os.path.join(path, "index.npz")
+        if not os.path.exists(file):
+            return None
+        with np.load(file) as z:
+            blob = z["terms"].tobytes().decode("utf-8")
+            offsets, docs, tfs = z["offsets"], z["docs"], z["tfs"]
+            index = cls(k1, b)
+            index._terms = {t: i for i, t in enumerate(blob.split("\n"))} if blob else {}
+            # Views into the loaded arrays; a term's list is copied out on its next append.
+            index._docs = [docs[s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+            index._tfs = [tfs[s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+            index._sizes = np.diff(offsets).tolist()
+            index._max_tf = z["max_tf"].tolist()
+            index._doc_chunk = z["doc_chunk"].copy()
+            index._doc_len = z["doc_len"].copy()
+            index._live = z["live"].copy()
+
+        index._n_docs = len(index._doc_chunk)
+        alive = np.flatnonzero(index._live)
+        index._chunk_doc = {int(index._doc_chunk[d]): int(d) for d in alive}
+        index._live_len = int(index._doc_len[alive].sum())
+        index._min_len = int(index._doc_len.min()) if index._n_docs else 0
+        return index
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "chunks": len(self._chunk_doc),
+                "terms": len(self._terms),
+                "postings": int(sum(self._sizes)),
+                "dead_fraction": round(self.dead_fraction(), 3),
+            }
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import re
+import zlib
 from dataclasses import dataclass
-from typing import List
+from itertools import islice
+from typing import Callable, Iterator, List, Tuple
 
 
 @dataclass(frozen=True)
@@ -13,6 +16,11 @@ class Chunk:
     token_count_est: int
 
 
+def normalize_newlines(text: str) -> str:
+    # Chunk offsets (char_start / char_end) index into this form of the text.
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
 def _token_estimate(text: str) -> int:
     # Cheap, deterministic estimate: whitespace tokens.
     return max(1, len(text.split()))
@@ -25,6 +33,11 @@ def chunk_text(text: str, chunk_size_chars: int, overlap_chars: int) -> List[Chu
     Given the same input text and config, this produces identical chunks
     (indices, boundaries, content) every time.
     """
+    return list(iter_chunks(text, chunk_size_chars, overlap_chars))
+
+
+def iter_chunks(text: str, chunk_size_chars: int, overlap_chars: int) -> Iterator[Chunk]:
+    """Streaming form of chunk_text: yields the same chunks one at a time."""
     if chunk_size_chars <= 0:
         raise ValueError("chunk_size_chars must be > 0")
     if overlap_chars < 0:
@@ -32,10 +45,9 @@ def chunk_text(text: str, chunk_size_chars: int, overlap_chars: int) -> List[Chu
     if overlap_chars >= chunk_size_chars:
         raise ValueError("overlap_chars must be < chunk_size_chars")
 
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
+    normalized = normalize_newlines(text)
     n = len(normalized)
 
-    chunks: List[Chunk] = []
     start = 0
     idx = 0
 
@@ -44,14 +56,12 @@ def chunk_text(text: str, chunk_size_chars: int, overlap_chars: int) -> List[Chu
         piece = normalized[start:end].strip()
 
         if piece:
-            chunks.append(
-                Chunk(
-                    chunk_index=idx,
-                    text=piece,
-                    char_start=start,
-                    char_end=end,
-                    token_count_est=_token_estimate(piece),
-                )
+            yield Chunk(
+                chunk_index=idx,
+                text=piece,
+                char_start=start,
+                char_end=end,
+                token_count_est=_token_estimate(piece),
             )
             idx += 1
 
@@ -60,4 +70,143 @@ def chunk_text(text: str, chunk_size_chars: int, overlap_chars: int) -> List[Chu
 
         start = max(0, end - overlap_chars)
 
-    return chunks
\ No newline at end of file
+
+# Content-defined chunking (CDC): a boundary is placed where the text right
+# before a word break hashes to a cut value, so boundaries depend on local
+# content rather than on absolute offsets. An insertion near the start of a
+# document only changes the chunks around it; later boundaries re-align.
+_CDC_WINDOW = 32
+_AVG_WORD_CHARS = 6
+_WS = re.compile(r"\s+")
+
+
+def _cdc_boundary(text: str, start: int, min_chars: int, max_chars: int, divisor: int) -> int:
+    n = len(text)
+    limit = min(n, start + max_chars)
+    last_break = -1
+    for m in _WS.finditer(text, start + min_chars, limit):
+        cut = m.end()
+        if "\n\n" in m.group():
+            return cut  # paragraph break
+        window = text[max(0, m.start() - _CDC_WINDOW) : m.start()]
+        if zlib.crc32(window.encode("utf-8")) % divisor == 0:
+            return cut
+        last_break = cut
+    if limit == n:
+        return n
+    # No content-defined cut before max_chars: fall back to the last word break.
+    return last_break if last_break > start else limit
+
+
+def iter_chunks_cdc(text: str, min_chars: int, avg_chars: int, max_chars: int) -> Iterator[Chunk]:
+    """
+    Content-defined chunks between min_chars and max_chars (about avg_chars on
+    average), cut at paragraph breaks or hash-selected word breaks. Chunks
+    don't overlap. Deterministic, like iter_chunks.
+    """
+    if not 0 < min_chars <= avg_chars <= max_chars:
+        raise ValueError("need 0 < min_chars <= avg_chars <= max_chars")
+
+    normalized = normalize_newlines(text)
+    # One cut per ~(avg - min) chars past the minimum, i.e. per that many words.
+    divisor = max(1, (avg_chars - min_chars) // _AVG_WORD_CHARS)
+
+    start = 0
+    idx = 0
+    while start < len(normalized):
+        end = _cdc_boundary(normalized, start, min_chars, max_chars, divisor)
+        piece = normalized[start:end].strip()
+        if piece:
+            yield Chunk(
+                chunk_index=idx,
+                text=piece,
+                char_start=start,
+                char_end=end,
+                token_count_est=_token_estimate(piece),
+            )
+            idx += 1
+        start = end
+
+
+# Token-budget chunking: chunks are sized by the embedding tokenizer's real
+# token count, so nothing past the model's max sequence length is dropped.
+_TOKEN_SEGMENT_CHARS = 20_000
+_TOKEN_SEGMENTS_PER_CALL = 16
+_WORD_BREAK_LOOKBACK = 16
+
+# texts -> per-text list of (start, end) char offsets of each token
+TokenizeOffsets = Callable[[List[str]], List[List[Tuple[int, int]]]]
+
+
+def _segments(text: str, size: int) -> Iterator[Tuple[int, int]]:
+    # Split at whitespace so no token straddles two segments.
+    n = len(text)
+    pos = 0
+    while pos < n:
+        end = min(n, pos + size)
+        if end < n:
+            cut = max(text.rfind(" ", pos, end), text.rfind("\n", pos, end))
+            if cut > pos:
+                end = cut + 1
+        yield pos, end
+        pos = end
+
+
+def _token_spans(text: str, tokenize: TokenizeOffsets) -> Iterator[Tuple[int, int]]:
+    segments = _segments(text, _TOKEN_SEGMENT_CHARS)
+    while True:
+        group = list(islice(segments, _TOKEN_SEGMENTS_PER_CALL))
+        if not group:
+            return
+        for (seg_start, _), offsets in zip(group, tokenize([text[a:b] for a, b in group])):
+            for a, b in offsets:
+                if b > a:
+                    yield seg_start + a, seg_start + b
+
+
+def iter_chunks_tokens(
+    text: str,
+    tokenize: TokenizeOffsets,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Iterator[Chunk]:
+    """
+    Chunks of at most max_tokens tokens (as counted by tokenize), overlapping
+    by overlap_tokens. Cuts are moved back to a word break when one is close,
+    so words aren't split across chunks. token_count_est is the real count.
+
+    tokenize is passed in (normally the embedding model's batched fast
+    tokenizer) so this stays a pure function.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be > 0")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("need 0 <= overlap_tokens < max_tokens")
+
+    normalized = normalize_newlines(text)
+    spans = _token_spans(normalized, tokenize)
+    buf: List[Tuple[int, int]] = list(islice(spans, max_tokens + 1))
+    idx = 0
+    while buf:
+        take = min(max_tokens, len(buf))
+        if len(buf) > take:
+            # Not the last chunk: prefer a cut where the next token starts a new word.
+            for k in range(take, max(take - _WORD_BREAK_LOOKBACK, overlap_tokens + 1), -1):
+                if buf[k][0] > buf[k - 1][1]:
+                    take = k
+                    break
+
+        start, end = buf[0][0], buf[take - 1][1]
+        yield Chunk(
+            chunk_index=idx,
+            text=normalized[start:end],
+            char_start=start,
+            char_end=end,
+            token_count_est=take,
+        )
+        idx += 1
+
+        if take == len(buf):
+            return
+        buf = buf[max(1, take - overlap_tokens) :]
+        buf.extend(islice(spans, max_tokens + 1 - len(buf)))
@@ -13,23 +13,122 @@ class Settings(BaseSettings):
     APP_ENV: str = "dev"
     LOG_LEVEL: str = "INFO"
 
+    # Uploads are hashed in UPLOAD_READ_CHUNK_BYTES pieces. Zip members are copied
+    # into a temp file that stays in RAM up to UPLOAD_SPOOL_MAX_BYTES, then spills to disk.
+    UPLOAD_READ_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+    # Bulk ingest: documents per dedup query / multi-row INSERT / commit.
+    BULK_INGEST_BATCH_SIZE: int = 500
+
+    # PDF extraction: PDFs with >= PDF_PARALLEL_MIN_PAGES pages are split into
+    # PDF_PAGES_PER_TASK-page ranges across PDF_EXTRACT_WORKERS processes (<= 1: serial).
+    PDF_EXTRACT_WORKERS: int = 4
+    PDF_PAGES_PER_TASK: int = 16
+    PDF_PARALLEL_MIN_PAGES: int = 32
+
     # Chunking (deterministic)
+    # "fixed": CHUNK_SIZE_CHARS windows with CHUNK_OVERLAP_CHARS overlap.
+    # "cdc": content-defined boundaries, so an edit only changes nearby chunks.
+    # "tokens": sized by the embedding tokenizer, so nothing is truncated.
+    CHUNKING_MODE: str = "fixed"
     CHUNK_SIZE_CHARS: int = 1200
     CHUNK_OVERLAP_CHARS: int = 150
+    CDC_MIN_CHARS: int = 300
+    CDC_AVG_CHARS: int = 800
+    CDC_MAX_CHARS: int = 1200
+    TOKEN_CHUNK_MAX_TOKENS: int | None = None  # default: model max_seq_length - special tokens
+    TOKEN_CHUNK_OVERLAP_TOKENS: int = 32
+    # "full": chunk rows store their text. "offsets": only char_start/char_end;
+    # text is sliced from the document (LRU of CHUNK_TEXT_CACHE_CHARS chars of hot documents).
+    CHUNK_TEXT_STORAGE: str = "full"
+    CHUNK_TEXT_CACHE_CHARS: int = 50_000_000
+
+    # Indexing pipeline (bounded memory): chunks are embedded / upserted in
+    # fixed-size batches with at most INDEX_QUEUE_DEPTH batches in flight.
+    INDEX_EMBED_BATCH_SIZE: int = 64
+    INDEX_UPSERT_BATCH_SIZE: int = 256
+    INDEX_QUEUE_DEPTH: int = 4
+    # Threads encoding index batches (separate from the query path's EMBEDDING_EXECUTOR_WORKERS)
+    INDEX_ENCODE_WORKERS: int = 1
+    # Background index jobs (/index/jobs) running at once; the rest stay queued.
+    INDEX_JOB_CONCURRENCY: int = 1
+    # A running job's owner refreshes its heartbeat every INDEX_JOB_HEARTBEAT_S;
+    # on startup, running jobs silent for INDEX_JOB_LEASE_S are failed as orphaned.
+    INDEX_JOB_HEARTBEAT_S: float = 10.0
+    INDEX_JOB_LEASE_S: float = 60.0
 
     # Retrieval
     DEFAULT_TOP_K: int = 5
+    # Most queries accepted by one POST /search/batch request
+    SEARCH_BATCH_MAX_QUERIES: int = 1000
+    # Postgres text search config for chunks.search_vector (changing it needs a full reindex)
+    SEARCH_FTS_CONFIG: str = "english"
+    # mode=hybrid: each leg (vector, keyword) returns HYBRID_CANDIDATES hits,
+    # merged with reciprocal rank fusion: score = sum 1 / (HYBRID_RRF_K + rank).
+    HYBRID_CANDIDATES: int = 50
+    HYBRID_RRF_K: int = 60
+    # Copy each chunk's snippet and page span into its vector payload so semantic
+    # search answers from the vector store alone (/search?hydrate=true reads Postgres).
+    # PAYLOAD_FILENAME also returns the document filename (always in the payload,
+    # with content_type and created_at, for search filters) with results.
+    PAYLOAD_SNIPPETS: bool = True
+    PAYLOAD_FILENAME: bool = False
+    # Lexical engine behind mode=keyword / mode=hybrid: "postgres" (stored tsvector
+    # + ts_rank) or "bm25" (in-process inverted index, snapshotted to BM25_INDEX_PATH).
+    LEXICAL_BACKEND: str = "postgres"
+    BM25_INDEX_PATH: str = "data/bm25"
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    # Minimum seconds between snapshots while indexing (always written on shutdown)
+    BM25_SAVE_INTERVAL_S: float = 30.0
+    # How often a process checks whether another one changed the index (snapshot
+    # mtime / chunk count) and reloads it; 0 checks on every query.
+    BM25_RELOAD_CHECK_S: float = 5.0
 
     # Embeddings
     EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # Persist chunk embeddings keyed by (model, sha256(text)) so reindexing
+    # only encodes text the model hasn't seen before.
+    EMBEDDING_CACHE_ENABLED: bool = True
+    # Query micro-batching: concurrent /search and /qa queries arriving within
+    # the window are encoded together (one forward pass per batch).
+    QUERY_BATCHING_ENABLED: bool = True
+    QUERY_BATCH_WINDOW_MS: float = 2.0
+    QUERY_BATCH_MAX_SIZE: int = 32
+    # In-process LRU of normalized query text -> vector (size 0 disables)
+    QUERY_CACHE_SIZE: int = 4096
+    QUERY_CACHE_TTL_SECONDS: float = 3600.0
+    # Threads reserved for query model.encode off the caller's thread (async path)
+    EMBEDDING_EXECUTOR_WORKERS: int = 2
 
     # Database
     DATABASE_URL: str
+    # Async engine URL for the async API path; derived from DATABASE_URL when unset
+    # (postgresql:// -> postgresql+psycopg://, sqlite:// -> sqlite+aiosqlite://)
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Vector store backend: "qdrant" (service) or "local" (in-process, memory-mapped NumPy)
+    VECTOR_STORE_BACKEND: str = "qdrant"
+    LOCAL_VECTOR_STORE_PATH: str = "data/vectors"
+    # Vector quantization for new collections: none | float16 | int8 | binary.
+    # int8/binary search the compact vectors, then rescore oversampled candidates
+    # against the float32 originals. Changing the mode takes a full rebuild.
+    VECTOR_QUANTIZATION: str = "none"
+    QUANTIZATION_RESCORE: bool = True
+    QUANTIZATION_OVERSAMPLING: float = 2.0
 
     # Qdrant
     QDRANT_URL: str = "http://qdrant:6333"
+    # Serving alias; data lives in versioned "<name>_vN" collections (blue/green rebuilds).
+    # Also names the collection/alias for the local backend.
     QDRANT_COLLECTION: str = "docusearch_chunks"
+    QDRANT_KEEP_VERSIONS: int = 2  # serving + previous, for instant rollback
     QDRANT_DISTANCE: str = "cosine"
+    # One shared client per process; gRPC is usually faster for search-heavy traffic.
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT_S: int = 10
+    QDRANT_POOL_SIZE: int = 32
 
     # QA / LLM (optional, disabled by default)
     USE_LLM: bool = False
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+
+# Per-process model, loaded once by the pool initializer.
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # N workers x all cores each would oversubscribe the CPU.
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    assert _worker_model is not None
+    vectors = _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """
+    Split texts into batches of similar length (as index lists into texts).
+
+    Similar lengths mean less padding per forward pass; the indices let the
+    caller put results back in input order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), i))
+    size = max(1, batch_size)
+    return [order[i : i + size] for i in range(0, len(order), size)]
+
+
+class EmbeddingPool:
+    """
+    Process pool for bulk indexing: one model per worker process.
+
+    submit() has the same contract as executor.submit(embed_texts, texts):
+    it returns a Future resolving to a (len(texts), dim) array in input order,
+    so the indexing pipeline can use either interchangeably.
+    """
+
+    def __init__(self, workers: int, batch_size: int | None = None) -> None:
+        self.workers = max(1, workers)
+        self.batch_size = batch_size or max(1, settings.INDEX_EMBED_BATCH_SIZE)
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Don't fork a parent that may already hold torch / thread state.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.EMBEDDING_MODEL_NAME, threads),
+        )
+
+    def submit(self, texts: List[str]) -> Future:
+        out: Future = Future()
+        if not texts:
+            out.set_result(np.zeros((0, 0), dtype=np.float32))
+            return out
+
+        # Spread the work so every worker gets a similarly sized share.
+        per_worker = -(-len(texts) // self.workers)
+        batches = length_sorted_batches(texts, min(self.batch_size, per_worker))
+        parts = [
+            (idx, self._executor.submit(_encode_in_worker, [texts[i] for i in idx]))
+            for idx in batches
+        ]
+
+        remaining = len(parts)
+        lock = threading.Lock()
+
+        def on_done(_fut: Future) -> None:
+            nonlocal remaining
+            with lock:
+                remaining -= 1
+                if remaining:
+                    return
+            try:
+                results = [(idx, fut.result()) for idx, fut in parts]
+                dim = results[0][1].shape[1]
+                vectors = np.empty((len(texts), dim), dtype=np.float32)
+                for idx, vecs in results:
+                    vectors[idx] = vecs
+                out.set_result(vectors)
+            except BaseException as exc:
+                out.set_exception(exc)
+
+        for _, fut in parts:
+            fut.add_done_callback(on_done)
+        return out
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
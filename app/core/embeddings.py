@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import queue
 import threading
-from typing import List
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Callable, List
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
+from app.core.query_cache import QueryEmbeddingCache, normalize_query
+
+logger = logging.getLogger(__name__)
 
 _lock = threading.Lock()
 _model: SentenceTransformer | None = None
 
+query_cache = QueryEmbeddingCache(
+    max_size=settings.QUERY_CACHE_SIZE,
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+)
+
 
 def get_model() -> SentenceTransformer:
     global _model
@@ -33,4 +46,251 @@ def embed_texts(texts: List[str]) -> np.ndarray:
 
 def embedding_dim() -> int:
     model = get_model()
-    return int(model.get_sentence_embedding_dimension())
\ No newline at end of file
+    return int(model.get_sentence_embedding_dimension())
+
+
+def get_tokenizer():
+    """The embedding model's (fast) tokenizer, loaded with the model; None if it has none."""
+    return getattr(get_model(), "tokenizer", None)
+
+
+def model_max_tokens() -> int:
+    """
+    Content tokens the model actually embeds: max_seq_length minus the special
+    tokens ([CLS]/[SEP]) it adds. Anything longer is silently truncated.
+    """
+    model = get_model()
+    tokenizer = get_tokenizer()
+    specials = tokenizer.num_special_tokens_to_add(pair=False) if tokenizer is not None else 2
+    return int(model.max_seq_length) - specials
+
+
+def token_offsets(texts: List[str]) -> List[List[tuple[int, int]]]:
+    """(start, end) char offsets of every token in each text, in one batched call."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        raise RuntimeError(f"{settings.EMBEDDING_MODEL_NAME} has no tokenizer")
+    enc = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        verbose=False,  # no "longer than max length" warnings; we chunk on purpose
+    )
+    return [[(int(a), int(b)) for a, b in offs] for offs in enc["offset_mapping"]]
+
+
+def count_tokens(texts: List[str]) -> List[int] | None:
+    """Real token counts (without special tokens), batched; None if the model has no tokenizer."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None or not texts:
+        return None
+    enc = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        verbose=False,
+    )
+    return [len(ids) for ids in enc["input_ids"]]
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent single-query encodes into one model.encode call.
+
+    Callers block on submit(); a background thread collects queries that arrive
+    within window_ms of the first one (up to max_batch), encodes them together
+    and hands each caller its own vector.
+    """
+
+    def __init__(
+        self,
+        window_ms: float,
+        max_batch: int,
+        encode: Callable[[List[str]], np.ndarray] = embed_texts,
+    ) -> None:
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._encode = encode
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="query-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit_future(self, text: str) -> Future:
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def submit(self, text: str) -> np.ndarray:
+        return self.submit_future(text).result()
+
+    def _collect(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        # Nothing may end this loop: callers would wait on the queue forever.
+        while True:
+            try:
+                self._run_batch(self._collect())
+            except Exception:
+                logger.exception("Query batch failed")
+
+    def _run_batch(self, batch: list[tuple[str, Future]]) -> None:
+        # Skip queries whose caller already gave up (e.g. a cancelled request);
+        # the rest become running and can no longer be cancelled under us.
+        batch = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            vectors = self._encode([text for text, _ in batch])
+        except Exception as exc:
+            for _, fut in batch:
+                _settle(fut, exc=exc)
+            return
+        for (_, fut), vec in zip(batch, vectors):
+            _settle(fut, vec)
+
+
+def _settle(fut: Future, result: np.ndarray | None = None, exc: BaseException | None = None) -> None:
+    try:
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+_batcher: QueryBatcher | None = None
+_encode_executor: ThreadPoolExecutor | None = None
+_index_encode_executor: ThreadPoolExecutor | None = None
+
+
+def get_query_batcher() -> QueryBatcher:
+    global _batcher
+    if _batcher is None:
+        with _lock:
+            if _batcher is None:
+                _batcher = QueryBatcher(
+                    window_ms=settings.QUERY_BATCH_WINDOW_MS,
+                    max_batch=settings.QUERY_BATCH_MAX_SIZE,
+                )
+    return _batcher
+
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embed a single search query.
+
+    Repeated queries are served from the in-process LRU without touching the
+    model; misses share forward passes with concurrent callers.
+    """
+    key = normalize_query(text)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if settings.QUERY_BATCHING_ENABLED:
+        vec = get_query_batcher().submit(key)
+    else:
+        vec = embed_texts([key])[0]
+
+    query_cache.put(key, vec)
+    return vec
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Dedicated threads for model.encode so async endpoints never block the event loop."""
+    global _encode_executor
+    if _encode_executor is None:
+        with _lock:
+            if _encode_executor is None:
+                _encode_executor = ThreadPoolExecutor(
+                    max_workers=settings.EMBEDDING_EXECUTOR_WORKERS,
+                    thread_name_prefix="encode",
+                )
+    return _encode_executor
+
+
+def get_index_encode_executor() -> ThreadPoolExecutor:
+    """
+    Threads encoding indexing batches. Kept apart from get_encode_executor so a
+    reindex never queues its batches in front of query encodes.
+    """
+    global _index_encode_executor
+    if _index_encode_executor is None:
+        with _lock:
+            if _index_encode_executor is None:
+                _index_encode_executor = ThreadPoolExecutor(
+                    max_workers=settings.INDEX_ENCODE_WORKERS,
+                    thread_name_prefix="index-encode",
+                )
+    return _index_encode_executor
+
+
+async def embed_query_async(text: str) -> np.ndarray:
+    """Async counterpart of embed_query: encoding always happens off the event loop."""
+    key = normalize_query(text)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if settings.QUERY_BATCHING_ENABLED:
+        # The batcher thread does the encode; we just await its future.
+        vec = await asyncio.wrap_future(get_query_batcher().submit_future(key))
+    else:
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(get_encode_executor(), embed_texts, [key])
+        vec = vectors[0]
+
+    query_cache.put(key, vec)
+    return vec
+
+
+def embed_queries(texts: List[str]) -> np.ndarray:
+    """
+    Embed many queries at once (batch search): cached queries are reused and
+    every miss is encoded in a single embed_texts call. Rows follow texts.
+    """
+    keys = [normalize_query(t) for t in texts]
+    vectors: dict[str, np.ndarray] = {}
+    for key in dict.fromkeys(keys):
+        cached = query_cache.get(key)
+        if cached is not None:
+            vectors[key] = cached
+    missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+    if missing:
+        for key, vec in zip(missing, embed_texts(missing)):
+            query_cache.put(key, vec)
+            vectors[key] = vec
+    if not keys:
+        return np.zeros((0, embedding_dim()), dtype=np.float32)
+    return np.stack([vectors[key] for key in keys])
+
+
+async def embed_queries_async(texts: List[str]) -> np.ndarray:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_encode_executor(), embed_queries, texts)
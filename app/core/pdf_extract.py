@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List
+
+from pypdf import PdfReader
+
+from app.core.chunking import normalize_newlines
+from app.core.config import settings
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Lazy process pool for page extraction. Sized on first use
+    (PDF_EXTRACT_WORKERS unless given).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=max(1, workers or settings.PDF_EXTRACT_WORKERS),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _extract_pages(reader: PdfReader, start: int, stop: int) -> List[str]:
+    # Same newline normalization as the chunker, so page offsets line up with chunk offsets.
+    return [normalize_newlines(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+# Per worker process: the last reader opened, so consecutive ranges of the
+# same file don't re-parse it. Keyed by (path, mtime, size) since temp paths
+# can be reused.
+_worker_reader: tuple[tuple, PdfReader] | None = None
+
+
+def _extract_range_from_path(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a worker (readers aren't picklable, so workers open the file themselves).
+    global _worker_reader
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if _worker_reader is None or _worker_reader[0] != key:
+        _worker_reader = (key, PdfReader(path))
+    return _extract_pages(_worker_reader[1], start, stop)
+
+
+def page_ranges(n_pages: int, pages_per_task: int) -> List[tuple[int, int]]:
+    size = max(1, pages_per_task)
+    return [(i, min(n_pages, i + size)) for i in range(0, n_pages, size)]
+
+
+def extract_pdf_pages(fileobj: BinaryIO, workers: int | None = None) -> List[str]:
+    """
+    Text of every page, in page order.
+
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into ranges of
+    PDF_PAGES_PER_TASK pages and extracted on the process pool; smaller ones
+    (or workers <= 1) are extracted in-process.
+    """
+    workers = settings.PDF_EXTRACT_WORKERS if workers is None else workers
+    fileobj.seek(0)
+    reader = PdfReader(fileobj)
+    n_pages = len(reader.pages)
+    if workers <= 1 or n_pages < max(1, settings.PDF_PARALLEL_MIN_PAGES):
+        return _extract_pages(reader, 0, n_pages)
+
+    # Workers read from a path; spill in-memory uploads once instead of
+    # pickling the whole PDF into every task.
+    path = getattr(fileobj, "name", None)
+    tmp_path = None
+    if not isinstance(path, str) or not os.path.isfile(path):
+        fileobj.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            shutil.copyfileobj(fileobj, tmp)
+            tmp_path = path = tmp.name
+
+    try:
+        pool = get_pdf_pool(workers)
+        futures = [
+            pool.submit(_extract_range_from_path, path, start, stop)
+            for start, stop in page_ranges(n_pages, settings.PDF_PAGES_PER_TASK)
+        ]
+        pages: List[str] = []
+        for fut in futures:  # submission order == page order
+            pages.extend(fut.result())
+        return pages
+    finally:
+        if tmp_path is not None:
+            os.unlink(tmp_path)
+
+
+def join_pages(pages: List[str]) -> tuple[str, List[int]]:
+    """
+    Join page texts the way extraction always has ("\\n".join(...).strip())
+    and return (text, page_offsets), where page_offsets[i] is the char offset
+    in text at which page i+1 starts.
+    """
+    joined = "\n".join(pages)
+    lead = len(joined) - len(joined.lstrip())
+    text = joined.strip()
+
+    offsets: List[int] = []
+    pos = 0
+    for page in pages:
+        offsets.append(min(len(text), max(0, pos - lead)))
+        pos += len(page) + 1
+    return text, offsets
@@ -1,48 +1,144 @@
 from __future__ import annotations
 
-from time import perf_counter
+import logging
+import threading
+from time import monotonic, perf_counter
 
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
 
 from app.core.config import settings
+from app.core.vector_store import LocalVectorStore, QdrantVectorStore, SearchFilter, VectorStore
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client: QdrantClient | None = None
+_async_client: AsyncQdrantClient | None = None
+_store: VectorStore | None = None
+
+# Serving alias target, re-resolved at most every _SERVING_TTL_S seconds: the
+# lexical paths scope chunk rows by it on every query. Swaps made in this
+# process are seen at once; another process's swap within the TTL.
+_SERVING_TTL_S = 1.0
+_serving: tuple[float, str] | None = None
+
+
+def _client_options() -> dict:
+    return {
+        "url": settings.QDRANT_URL,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "timeout": settings.QDRANT_TIMEOUT_S,
+        # Keep-alive pool shared by every request in the process (REST transport).
+        "limits": httpx.Limits(
+            max_connections=settings.QDRANT_POOL_SIZE,
+            max_keepalive_connections=settings.QDRANT_POOL_SIZE,
+        ),
+    }
+
+
+def _create_client() -> QdrantClient:
+    t0 = perf_counter()
+    client = QdrantClient(**_client_options())
+    logger.info(
+        "Qdrant client ready (url=%s grpc=%s) in %.1f ms",
+        settings.QDRANT_URL,
+        settings.QDRANT_PREFER_GRPC,
+        (perf_counter() - t0) * 1000.0,
+    )
+    return client
 
 
 def get_qdrant() -> QdrantClient:
-    return QdrantClient(url=settings.QDRANT_URL)
+    """Process-wide Qdrant client (created once, reused by every request)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def close_qdrant() -> None:
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_async_qdrant() -> AsyncQdrantClient:
+    """Process-wide async client for the async API path (bound to the serving event loop)."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                _async_client = AsyncQdrantClient(**_client_options())
+    return _async_client
+
+
+async def close_async_qdrant() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def get_vector_store() -> VectorStore:
+    """Process-wide vector store for the backend selected by VECTOR_STORE_BACKEND."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                backend = settings.VECTOR_STORE_BACKEND.lower()
+                quantization = {
+                    "quantization": settings.VECTOR_QUANTIZATION.lower(),
+                    "rescore": settings.QUANTIZATION_RESCORE,
+                    "oversampling": settings.QUANTIZATION_OVERSAMPLING,
+                }
+                if backend == "qdrant":
+                    _store = QdrantVectorStore(
+                        get_qdrant, get_async_qdrant, settings.QDRANT_DISTANCE, **quantization
+                    )
+                elif backend == "local":
+                    _store = LocalVectorStore(settings.LOCAL_VECTOR_STORE_PATH, **quantization)
+                else:
+                    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {settings.VECTOR_STORE_BACKEND}")
+    return _store
+
+
+def serving_collection(refresh: bool = False) -> str:
+    """
+    Concrete collection the QDRANT_COLLECTION alias points at (or the legacy
+    collection of that name), i.e. the version whose chunk rows search reads.
+    """
+    global _serving
+    cached = _serving
+    if refresh or cached is None or monotonic() - cached[0] > _SERVING_TTL_S:
+        name = get_vector_store().get_alias(settings.QDRANT_COLLECTION) or settings.QDRANT_COLLECTION
+        cached = _serving = (monotonic(), name)
+    return cached[1]
 
 
 def vector_search(
     query_vector: list[float],
     top_k: int,
-    document_id: int | None = None,
+    filters: SearchFilter | None = None,
 ) -> tuple[list[tuple[str, float]], float]:
     """
     Returns:
       - list of (chunk_id, score)
       - retrieval_ms for the vector lookup itself
     """
-    client = get_qdrant()
-
-    flt: Filter | None = None
-    if document_id is not None:
-        # payload contains document_id
-        flt = Filter(must=[{"key": "document_id", "match": {"value": document_id}}])
+    store = get_vector_store()
 
     t0 = perf_counter()
-    hits = client.search(
-        collection_name=settings.QDRANT_COLLECTION,
-        query_vector=query_vector,
-        limit=top_k,
-        with_payload=True,
-        with_vectors=False,
-        query_filter=flt,
-    )
+    hits = store.search(settings.QDRANT_COLLECTION, query_vector, top_k, filters)
     retrieval_ms = (perf_counter() - t0) * 1000.0
 
     out: list[tuple[str, float]] = []
     for h in hits:
-        payload = h.payload or {}
-        out.append((str(payload.get("chunk_id")), float(h.score)))
+        out.append((str(h.payload.get("chunk_id")), float(h.score)))
 
-    return out, retrieval_ms
\ No newline at end of file
+    return out, retrieval_ms
@@ -0,0 +1,974 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CreateAlias,
+    CreateAliasOperation,
+    Datatype,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    PayloadSelectorExclude,
+    PointIdsList,
+    PointStruct,
+    QuantizationSearchParams,
+    Range,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SearchRequest,
+    VectorParams,
+)
+
+logger = logging.getLogger(__name__)
+
+
+QUANTIZATION_MODES = ("none", "float16", "int8", "binary")
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+# Rows scored per block when de-quantizing, to bound temporary float32 memory.
+_SCORE_BLOCK = 65536
+
+# Payload fields search filters run on, and how Qdrant indexes them. Qdrant
+# has no prefix match on keywords, so points carry every filename prefix up
+# to FILENAME_PREFIX_MAX chars (filename_prefixes) as an indexed keyword list.
+PAYLOAD_INDEXES = {
+    "document_id": PayloadSchemaType.INTEGER,
+    "content_type": PayloadSchemaType.KEYWORD,
+    "filename_prefixes": PayloadSchemaType.KEYWORD,
+    "created_at": PayloadSchemaType.FLOAT,
+}
+FILENAME_PREFIX_MAX = 64
+# Indexed for filtering only: never returned with hits, and the local store
+# (which filters on the filename itself) doesn't keep it at all.
+FILTER_ONLY_FIELDS = ("filename_prefixes",)
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    """In-RAM bytes per vector for the search representation of a quantization mode."""
+    if mode == "none":
+        return 4 * dim
+    if mode == "float16":
+        return 2 * dim
+    if mode == "int8":
+        return dim + 4  # codes + per-vector float32 scale
+    if mode == "binary":
+        return (dim + 7) // 8
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
+
+def quantize(vectors: np.ndarray, mode: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Encode float32 vectors for approximate scoring.
+
+    Returns (codes, scales); scales is only used by int8 (per-vector absmax
+    scaling, which stays valid as vectors are added incrementally).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if mode == "float16":
+        return vectors.astype(np.float16), None
+    if mode == "int8":
+        absmax = np.abs(vectors).max(axis=1)
+        scales = np.where(absmax == 0, 1.0, absmax / 127.0).astype(np.float32)
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales
+    if mode == "binary":
+        return np.packbits(vectors > 0, axis=1), None
+    raise ValueError(f"Mode has no quantized representation: {mode}")
+
+
+def approx_scores(
+    codes: np.ndarray,
+    scales: np.ndarray | None,
+    query: np.ndarray,
+    mode: str,
+) -> np.ndarray:
+    """Approximate similarity of query against quantized codes (higher is better)."""
+    query = np.asarray(query, dtype=np.float32)
+    n = codes.shape[0]
+    if mode == "binary":
+        qcode = np.packbits(query > 0)
+        dim = query.shape[0]
+        out = np.empty(n, dtype=np.float32)
+        for i in range(0, n, _SCORE_BLOCK):
+            hamming = _POPCOUNT[np.bitwise_xor(codes[i : i + _SCORE_BLOCK], qcode)].sum(axis=1)
+            # Fraction of agreeing signs, mapped to [-1, 1] like cosine.
+            out[i : i + _SCORE_BLOCK] = 1.0 - 2.0 * hamming / dim
+        return out
+
+    out = np.empty(n, dtype=np.float32)
+    for i in range(0, n, _SCORE_BLOCK):
+        out[i : i + _SCORE_BLOCK] = codes[i : i + _SCORE_BLOCK].astype(np.float32) @ query
+    if mode == "int8":
+        assert scales is not None
+        out *= scales[:n]
+    return out
+
+
+def filename_prefixes(filename: str) -> list[str]:
+    return [filename[:i] for i in range(1, min(len(filename), FILENAME_PREFIX_MAX) + 1)]
+
+
+def epoch_seconds(value: datetime) -> float:
+    """Payload form of a timestamp (naive datetimes are taken as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Conditions a hit's payload must meet; unset fields don't filter. Every
+    given condition must hold, and created_at falls in [created_from, created_to).
+    """
+
+    document_ids: tuple[int, ...] | None = None
+    content_type: str | None = None
+    filename_prefix: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    def __post_init__(self) -> None:
+        if self.filename_prefix is not None and len(self.filename_prefix) > FILENAME_PREFIX_MAX:
+            raise ValueError(f"filename_prefix is limited to {FILENAME_PREFIX_MAX} characters")
+
+    def is_empty(self) -> bool:
+        return (
+            self.document_ids is None
+            and self.content_type is None
+            and not self.filename_prefix
+            and self.created_from is None
+            and self.created_to is None
+        )
+
+
+@dataclass(frozen=True)
+class VectorHit:
+    id: str
+    score: float
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+class VectorStore(ABC):
+    """
+    Minimal vector storage contract used by indexing and search.
+
+    Collections hold (point id, vector, payload) triples; an alias names the
+    collection currently being served, which is what makes blue/green rebuilds
+    possible on every backend. Methods taking a collection name accept either
+    a concrete collection or an alias.
+    """
+
+    # --- collections / aliases ---
+    @abstractmethod
+    def list_collections(self) -> list[str]: ...
+
+    @abstractmethod
+    def create_collection(self, name: str, dim: int) -> None: ...
+
+    def ensure_payload_indexes(self, collection: str) -> None:
+        """Index the PAYLOAD_INDEXES fields of collection, where the backend needs it."""
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None: ...
+
+    @abstractmethod
+    def get_alias(self, alias: str) -> str | None: ...
+
+    @abstractmethod
+    def set_alias(self, alias: str, collection: str) -> None:
+        """Atomically point alias at collection."""
+
+    # --- points ---
+    @abstractmethod
+    def upsert(
+        self,
+        collection: str,
+        ids: list[str],
+        vectors: np.ndarray,
+        payloads: list[dict[str, Any]],
+    ) -> None: ...
+
+    @abstractmethod
+    def delete(self, collection: str, ids: list[str]) -> None: ...
+
+    @abstractmethod
+    def existing_ids(self, collection: str, ids: list[str]) -> set[str]: ...
+
+    @abstractmethod
+    def delete_documents_not_in(self, collection: str, document_ids: list[int]) -> None:
+        """Drop every point whose payload document_id is not in document_ids."""
+
+    # --- search ---
+    @abstractmethod
+    def search(
+        self,
+        collection: str,
+        vector: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+    ) -> list[VectorHit]: ...
+
+    async def search_async(
+        self,
+        collection: str,
+        vector: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+    ) -> list[VectorHit]:
+        return await asyncio.to_thread(self.search, collection, vector, top_k, filters)
+
+    def search_batch(
+        self,
+        collection: str,
+        vectors: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+    ) -> list[list[VectorHit]]:
+        """One hit list per query vector, in order (backends answer in one call where they can)."""
+        return [self.search(collection, v, top_k, filters) for v in vectors]
+
+    async def search_batch_async(
+        self,
+        collection: str,
+        vectors: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+    ) -> list[list[VectorHit]]:
+        return await asyncio.to_thread(self.search_batch, collection, vectors, top_k, filters)
+
+
+class QdrantVectorStore(VectorStore):
+    _HIT_PAYLOAD = PayloadSelectorExclude(exclude=list(FILTER_ONLY_FIELDS))
+
+    def __init__(
+        self,
+        client_factory: Callable[[], QdrantClient],
+        async_client_factory: Callable[[], AsyncQdrantClient],
+        distance: str = "cosine",
+        quantization: str = "none",
+        rescore: bool = True,
+        oversampling: float = 2.0,
+    ) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self._client = client_factory
+        self._async_client = async_client_factory
+        self._distance = Distance.COSINE if distance.lower() == "cosine" else Distance.DOT
+        self._quantization = quantization
+        self._indexed: set[str] = set()
+        self._search_params: SearchParams | None = None
+        if quantization in ("int8", "binary"):
+            # Search the quantized vectors, then rescore oversampled candidates
+            # against the original float32 vectors.
+            self._search_params = SearchParams(
+                quantization=QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+            )
+
+    def list_collections(self) -> list[str]:
+        return [c.name for c in self._client().get_collections().collections]
+
+    def create_collection(self, name: str, dim: int) -> None:
+        datatype = Datatype.FLOAT16 if self._quantization == "float16" else None
+        quantization_config = None
+        if self._quantization == "int8":
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        elif self._quantization == "binary":
+            quantization_config = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+
+        self._client().create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(size=dim, distance=self._distance, datatype=datatype),
+            quantization_config=quantization_config,
+        )
+
+    def ensure_payload_indexes(self, collection: str) -> None:
+        # Checked once per collection per process; creating an index is idempotent.
+        if collection in self._indexed:
+            return
+        client = self._client()
+        schema = client.get_collection(collection_name=collection).payload_schema or {}
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name not in schema:
+                client.create_payload_index(
+                    collection_name=collection, field_name=field_name, field_schema=field_schema
+                )
+        self._indexed.add(collection)
+
+    def delete_collection(self, name: str) -> None:
+        self._indexed.discard(name)
+        self._client().delete_collection(collection_name=name)
+
+    def get_alias(self, alias: str) -> str | None:
+        for a in self._client().get_aliases().aliases:
+            if a.alias_name == alias:
+                return a.collection_name
+        return None
+
+    def set_alias(self, alias: str, collection: str) -> None:
+        client = self._client()
+        if alias in self.list_collections():
+            # One-time migration from the pre-alias layout: an alias can't share a name
+            # with a collection, so the legacy collection has to go first.
+            logger.warning("Replacing legacy collection %s with an alias", alias)
+            client.delete_collection(collection_name=alias)
+
+        # Delete + create in one request, so the switch is atomic for readers.
+        ops: list = []
+        if self.get_alias(alias) is not None:
+            ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        ops.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection, alias_name=alias)
+            )
+        )
+        client.update_collection_aliases(change_aliases_operations=ops)
+
+    def upsert(self, collection, ids, vectors, payloads) -> None:
+        if not ids:
+            return
+        points = [
+            PointStruct(id=pid, vector=vec, payload=payload)
+            for pid, vec, payload in zip(ids, np.asarray(vectors).tolist(), payloads)
+        ]
+        self._client().upsert(collection_name=collection, points=points)
+
+    def delete(self, collection, ids) -> None:
+        if not ids:
+            return
+        self._client().delete(
+            collection_name=collection,
+            points_selector=PointIdsList(points=list(ids)),
+        )
+
+    def existing_ids(self, collection, ids) -> set[str]:
+        if not ids:
+            return set()
+        records = self._client().retrieve(
+            collection_name=collection,
+            ids=list(ids),
+            with_payload=False,
+            with_vectors=False,
+        )
+        return {str(r.id) for r in records}
+
+    def delete_documents_not_in(self, collection, document_ids) -> None:
+        if document_ids:
+            flt = Filter(must_not=[FieldCondition(key="document_id", match=MatchAny(any=document_ids))])
+        else:
+            flt = Filter()
+        self._client().delete(
+            collection_name=collection,
+            points_selector=FilterSelector(filter=flt),
+        )
+
+    @staticmethod
+    def _filter(filters: SearchFilter | None) -> Filter:
+        must: list = []
+        if filters is None:
+            return Filter(must=must)
+        if filters.document_ids is not None:
+            must.append(FieldCondition(key="document_id", match=MatchAny(any=list(filters.document_ids))))
+        if filters.content_type is not None:
+            must.append(FieldCondition(key="content_type", match=MatchValue(value=filters.content_type)))
+        if filters.filename_prefix:
+            must.append(FieldCondition(key="filename_prefixes", match=MatchValue(value=filters.filename_prefix)))
+        if filters.created_from is not None or filters.created_to is not None:
+            must.append(
+                FieldCondition(
+                    key="created_at",
+                    range=Range(
+                        gte=epoch_seconds(filters.created_from) if filters.created_from else None,
+                        lt=epoch_seconds(filters.created_to) if filters.created_to else None,
+                    ),
+                )
+            )
+        return Filter(must=must)
+
+    @staticmethod
+    def _hits(points) -> list[VectorHit]:
+        return [VectorHit(id=str(p.id), score=float(p.score), payload=p.payload or {}) for p in points]
+
+    def search(self, collection, vector, top_k, filters=None) -> list[VectorHit]:
+        hits = self._client().search(
+            collection_name=collection,
+            query_vector=np.asarray(vector).tolist(),
+            limit=top_k,
+            with_payload=self._HIT_PAYLOAD,
+            with_vectors=False,
+            query_filter=self._filter(filters),
+            search_params=self._search_params,
+        )
+        return self._hits(hits)
+
+    async def search_async(self, collection, vector, top_k, filters=None) -> list[VectorHit]:
+        hits = await self._async_client().search(
+            collection_name=collection,
+            query_vector=np.asarray(vector).tolist(),
+            limit=top_k,
+            with_payload=self._HIT_PAYLOAD,
+            with_vectors=False,
+            query_filter=self._filter(filters),
+            search_params=self._search_params,
+        )
+        return self._hits(hits)
+
+    def _search_requests(self, vectors, top_k, filters) -> list[SearchRequest]:
+        return [
+            SearchRequest(
+                vector=np.asarray(v).tolist(),
+                limit=top_k,
+                with_payload=self._HIT_PAYLOAD,
+                with_vector=False,
+                filter=self._filter(filters),
+                params=self._search_params,
+            )
+            for v in vectors
+        ]
+
+    def search_batch(self, collection, vectors, top_k, filters=None) -> list[list[VectorHit]]:
+        if len(vectors) == 0:
+            return []
+        results = self._client().search_batch(
+            collection_name=collection,
+            requests=self._search_requests(vectors, top_k, filters),
+        )
+        return [self._hits(points) for points in results]
+
+    async def search_batch_async(self, collection, vectors, top_k, filters=None) -> list[list[VectorHit]]:
+        if len(vectors) == 0:
+            return []
+        results = await self._async_client().search_batch(
+            collection_name=collection,
+            requests=self._search_requests(vectors, top_k, filters),
+        )
+        return [self._hits(points) for points in results]
+
+
+def _stored_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in payload.items() if k not in FILTER_ONLY_FIELDS}
+
+
+class _LocalCollection:
+    """
+    One on-disk collection:
+      - vectors.f32  : memory-mapped (capacity, dim) float32 matrix, one row per slot
+      - points.jsonl : append-only log of upserts/deletes (id -> slot, payload)
+      - meta.json    : {"dim": ..., "quantization": ...}
+
+    Vectors are written before their log line, so a reader replaying the log
+    never sees a slot without its vector. Other processes pick up new log
+    lines on their next call (single writer, many readers). Searches score
+    outside the lock, then resolve their top hits under it, dropping slots
+    whose point was deleted (or replaced by another one) in the meantime.
+
+    Deleted slots are reused by later inserts. Once more than
+    _COMPACT_DEAD_FRACTION of the log's lines are superseded (re-upserts,
+    deletes), the writer swaps in a log holding one line per live point;
+    readers notice the new file and replay it from the start.
+
+    With quantization, a compact copy of every vector is kept in RAM for the
+    first scoring pass; the float32 memmap stays on disk and is only touched to
+    rescore the oversampled candidates.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    # Largest (queries x points) score block search_batch materializes at once.
+    _BATCH_SCORE_FLOATS = 1 << 24
+    # Compact points.jsonl when this share of its lines is dead (and it has at
+    # least _COMPACT_MIN_LINES lines).
+    _COMPACT_DEAD_FRACTION = 0.25
+    _COMPACT_MIN_LINES = 1024
+
+    def __init__(self, path: str, dim: int | None = None, quantization: str = "none") -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._log_path = os.path.join(path, "points.jsonl")
+        meta_path = os.path.join(path, "meta.json")
+
+        if dim is not None:
+            os.makedirs(path, exist_ok=True)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": dim, "quantization": quantization}, f)
+            with open(self._vec_path, "wb") as f:
+                f.truncate(self._INITIAL_CAPACITY * dim * 4)
+            open(self._log_path, "a", encoding="utf-8").close()
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = int(meta["dim"])
+        self.quantization = meta.get("quantization", "none")
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {self.quantization}")
+
+        self._matrix: np.memmap | None = None
+        # Held open so a compacted-away log's inode can't be reused while we
+        # still track offsets into it.
+        self._log_file = open(self._log_path, "r", encoding="utf-8")
+        self._reset()
+        self._refresh()
+
+    def _reset(self) -> None:
+        # Empty in-memory state; _refresh() then replays the log from the start.
+        self._id_to_slot: dict[str, int] = {}
+        self._slot_ids: list[str | None] = []
+        self._payloads: list[dict[str, Any] | None] = []
+        self._doc_ids = np.full(0, -1, dtype=np.int64)
+        # Filter columns: content types are dictionary-encoded, missing created_at is NaN.
+        self._type_codes: dict[str, int] = {}
+        self._type_ids = np.full(0, -1, dtype=np.int32)
+        self._created_at = np.full(0, np.nan, dtype=np.float64)
+        self._filenames: list[str | None] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._codes: np.ndarray | None = None
+        self._scales: np.ndarray | None = None
+        self._count = 0
+        self._log_offset = 0
+        self._log_lines = 0
+
+    # --- storage helpers ---
+    def _capacity_on_disk(self) -> int:
+        return os.path.getsize(self._vec_path) // (self.dim * 4)
+
+    def _open_matrix(self) -> None:
+        self._matrix = np.memmap(
+            self._vec_path, dtype=np.float32, mode="r+", shape=(self._capacity_on_disk(), self.dim)
+        )
+
+    def _ensure_slots(self, n: int) -> None:
+        if len(self._alive) < n:
+            grow = max(n, 2 * len(self._alive), self._INITIAL_CAPACITY)
+            self._doc_ids = np.concatenate([self._doc_ids, np.full(grow - len(self._doc_ids), -1, dtype=np.int64)])
+            self._type_ids = np.concatenate([self._type_ids, np.full(grow - len(self._type_ids), -1, dtype=np.int32)])
+            self._created_at = np.concatenate(
+                [self._created_at, np.full(grow - len(self._created_at), np.nan, dtype=np.float64)]
+            )
+            self._filenames.extend([None] * (grow - len(self._filenames)))
+            self._alive = np.concatenate([self._alive, np.zeros(grow - len(self._alive), dtype=bool)])
+            self._slot_ids.extend([None] * (grow - len(self._slot_ids)))
+            self._payloads.extend([None] * (grow - len(self._payloads)))
+            if self.quantization != "none":
+                codes, scales = quantize(np.zeros((grow, self.dim), dtype=np.float32), self.quantization)
+                if self._codes is not None:
+                    codes[: len(self._codes)] = self._codes
+                    if scales is not None and self._scales is not None:
+                        scales[: len(self._scales)] = self._scales
+                self._codes, self._scales = codes, scales
+
+        if self._matrix is None or self._matrix.shape[0] < n:
+            if self._capacity_on_disk() < n:
+                new_cap = max(n, 2 * self._capacity_on_disk())
+                self._matrix = None
+                with open(self._vec_path, "r+b") as f:
+                    f.truncate(new_cap * self.dim * 4)
+            self._open_matrix()
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        pid = entry["id"]
+        if entry.get("deleted"):
+            slot = self._id_to_slot.pop(pid, None)
+            if slot is not None:
+                self._alive[slot] = False
+                self._payloads[slot] = None
+            return
+
+        slot = int(entry["slot"])
+        self._ensure_slots(slot + 1)
+        payload = entry.get("payload") or {}
+        self._id_to_slot[pid] = slot
+        self._slot_ids[slot] = pid
+        self._payloads[slot] = payload
+        self._doc_ids[slot] = int(payload.get("document_id", -1))
+        content_type = payload.get("content_type")
+        self._type_ids[slot] = (
+            -1 if content_type is None else self._type_codes.setdefault(content_type, len(self._type_codes))
+        )
+        created_at = payload.get("created_at")
+        self._created_at[slot] = np.nan if created_at is None else float(created_at)
+        self._filenames[slot] = payload.get("filename")
+        self._alive[slot] = True
+        self._count = max(self._count, slot + 1)
+
+    def _set_codes(self, slots: list[int], vectors: np.ndarray) -> None:
+        if self.quantization == "none" or not slots:
+            return
+        assert self._codes is not None
+        codes, scales = quantize(vectors, self.quantization)
+        self._codes[slots] = codes
+        if scales is not None:
+            assert self._scales is not None
+            self._scales[slots] = scales
+
+    def _refresh(self) -> None:
+        if os.stat(self._log_path).st_ino != os.fstat(self._log_file.fileno()).st_ino:
+            # The writer compacted the log: start over from the new file.
+            self._reopen_log()
+            self._reset()
+        if os.fstat(self._log_file.fileno()).st_size <= self._log_offset:
+            return
+        touched: list[int] = []
+        f = self._log_file
+        f.seek(self._log_offset)
+        for line in f:
+            if not line.endswith("\n"):
+                break  # partially written line; pick it up next time
+            self._log_offset += len(line.encode("utf-8"))
+            self._log_lines += 1
+            entry = json.loads(line)
+            self._apply(entry)
+            if not entry.get("deleted"):
+                touched.append(int(entry["slot"]))
+        self._ensure_slots(self._count)
+        if touched and self._matrix is not None:
+            self._set_codes(touched, np.asarray(self._matrix[touched]))
+
+    def _append_log(self, entries: list[dict[str, Any]]) -> None:
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            for e in entries:
+                f.write(json.dumps(e, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_offset = os.path.getsize(self._log_path)
+        self._log_lines += len(entries)
+        for e in entries:
+            self._apply(e)
+        self._maybe_compact()
+
+    def dead_fraction(self) -> float:
+        if not self._log_lines:
+            return 0.0
+        return 1.0 - len(self._id_to_slot) / self._log_lines
+
+    def _maybe_compact(self) -> None:
+        if self._log_lines >= self._COMPACT_MIN_LINES and self.dead_fraction() > self._COMPACT_DEAD_FRACTION:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite points.jsonl with one line per live point (atomic swap)."""
+        with self._lock:
+            self._refresh()
+            tmp = self._log_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for pid, slot in sorted(self._id_to_slot.items(), key=lambda kv: kv[1]):
+                    entry = {"id": pid, "slot": slot, "payload": self._payloads[slot]}
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._log_path)
+            self._reopen_log()
+            self._log_offset = os.fstat(self._log_file.fileno()).st_size
+            self._log_lines = len(self._id_to_slot)
+
+    def _reopen_log(self) -> None:
+        self._log_file.close()
+        self._log_file = open(self._log_path, "r", encoding="utf-8")
+
+    def close(self) -> None:
+        self._log_file.close()
+
+    def _free_slots(self) -> list[int]:
+        # Slots below the high-water mark whose point was deleted.
+        return np.flatnonzero(~self._alive[: self._count]).tolist()
+
+    # --- operations ---
+    def upsert(self, ids: list[str], vectors: np.ndarray, payloads: list[dict[str, Any]]) -> None:
+        vecs = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        vecs = vecs / np.where(norms == 0, 1.0, norms)
+
+        with self._lock:
+            self._refresh()
+            slots: list[int] = []
+            free = self._free_slots()
+            free.reverse()  # pop() hands out the lowest slot first
+            next_slot = self._count
+            for pid in ids:
+                slot = self._id_to_slot.get(pid)
+                if slot is None:
+                    if free:
+                        slot = free.pop()
+                    else:
+                        slot = next_slot
+                        next_slot += 1
+                slots.append(slot)
+
+            self._ensure_slots(next_slot)
+            assert self._matrix is not None
+            self._matrix[slots] = vecs
+            self._matrix.flush()
+            self._set_codes(slots, vecs)
+
+            entries = [
+                {"id": pid, "slot": slot, "payload": _stored_payload(payload)}
+                for pid, slot, payload in zip(ids, slots, payloads)
+            ]
+            self._append_log(entries)
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            self._refresh()
+            entries = [{"id": pid, "deleted": True} for pid in ids if pid in self._id_to_slot]
+            if not entries:
+                return
+            self._append_log(entries)
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        with self._lock:
+            self._refresh()
+            return {pid for pid in ids if pid in self._id_to_slot}
+
+    def ids_where_document_not_in(self, document_ids: list[int]) -> list[str]:
+        with self._lock:
+            self._refresh()
+            n = self._count
+            mask = self._alive[:n] & ~np.isin(self._doc_ids[:n], np.asarray(document_ids, dtype=np.int64))
+            return [self._slot_ids[i] for i in np.flatnonzero(mask)]  # type: ignore[misc]
+
+    def _mask(self, n: int, filters: SearchFilter | None) -> np.ndarray:
+        # Live slots matching filters (call under the lock).
+        mask = self._alive[:n].copy()
+        if filters is None:
+            return mask
+        if filters.document_ids is not None:
+            mask &= np.isin(self._doc_ids[:n], np.asarray(filters.document_ids, dtype=np.int64))
+        if filters.content_type is not None:
+            mask &= self._type_ids[:n] == self._type_codes.get(filters.content_type, -2)
+        if filters.created_from is not None:
+            mask &= self._created_at[:n] >= epoch_seconds(filters.created_from)
+        if filters.created_to is not None:
+            mask &= self._created_at[:n] < epoch_seconds(filters.created_to)
+        if filters.filename_prefix:
+            # Last, so only slots passing the column filters are checked in Python.
+            prefix = filters.filename_prefix
+            idx = np.flatnonzero(mask)
+            keep = np.fromiter(
+                ((self._filenames[i] or "").startswith(prefix) for i in idx), dtype=bool, count=len(idx)
+            )
+            mask[idx[~keep]] = False
+        return mask
+
+    def search(
+        self,
+        vector: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+    ) -> list[VectorHit]:
+        with self._lock:
+            self._refresh()
+            n = self._count
+            if n == 0 or self._matrix is None:
+                return []
+            matrix = self._matrix[:n]
+            codes = self._codes[:n] if self._codes is not None else None
+            scales = self._scales[:n] if self._scales is not None else None
+            mask = self._mask(n, filters)
+            slot_ids = self._slot_ids[:n]
+
+        candidates = int(mask.sum())
+        k = min(top_k, candidates)
+        if k <= 0:
+            return []
+
+        # Normalized vectors: dot product == cosine similarity.
+        q = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        if codes is None:
+            scores = matrix @ q
+        else:
+            scores = approx_scores(codes, scales, q, self.quantization)
+        scores = np.where(mask, scores, -np.inf)
+
+        if codes is not None and rescore:
+            # Oversample on the approximate scores, then rescore exactly from the memmap.
+            pool = min(candidates, max(k, int(np.ceil(k * oversampling))))
+            cand = np.argpartition(-scores, pool - 1)[:pool]
+            cand.sort()  # sequential memmap reads
+            scores = np.full(n, -np.inf, dtype=np.float32)
+            scores[cand] = np.asarray(matrix[cand]) @ q
+
+        return self._top_hits(scores, k, slot_ids)
+
+    def search_batch(
+        self,
+        vectors: np.ndarray,
+        top_k: int,
+        filters: SearchFilter | None = None,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+    ) -> list[list[VectorHit]]:
+        """
+        Unquantized collections score a block of queries per pass over the
+        matrix (one matmul); quantized ones run search() per query.
+        """
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.quantization != "none":
+            return [self.search(q, top_k, filters, rescore, oversampling) for q in queries]
+
+        with self._lock:
+            self._refresh()
+            n = self._count
+            if n == 0 or self._matrix is None:
+                return [[] for _ in queries]
+            matrix = self._matrix[:n]
+            mask = self._mask(n, filters)
+            slot_ids = self._slot_ids[:n]
+
+        k = min(top_k, int(mask.sum()))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        out: list[list[VectorHit]] = []
+        step = max(1, self._BATCH_SCORE_FLOATS // n)
+        for i in range(0, len(queries), step):
+            scores = queries[i : i + step] @ matrix.T  # (queries, points)
+            scores[:, ~mask] = -np.inf
+            out.extend(self._top_hits(row, k, slot_ids) for row in scores)
+        return out
+
+    def _top_hits(self, scores: np.ndarray, k: int, slot_ids: list) -> list[VectorHit]:
+        # slot_ids: copy taken with the scored rows. Deleted slots can be reused
+        # by an upsert while scoring runs, so each hit is checked against it.
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        with self._lock:
+            return [
+                VectorHit(id=slot_ids[i], score=float(scores[i]), payload=dict(self._payloads[i] or {}))
+                for i in top
+                if self._alive[i] and self._slot_ids[i] == slot_ids[i]
+            ]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process brute-force store: memory-mapped float32 matrices searched with
+    NumPy dot products + argpartition. No services required.
+
+    Layout under root: one directory per collection, plus "<alias>.alias"
+    files holding the collection an alias points at (swapped with os.replace).
+    Quantization is fixed per collection at creation (like Qdrant), so
+    changing it takes a rebuild.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        quantization: str = "none",
+        rescore: bool = True,
+        oversampling: float = 2.0,
+    ) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self.root = root
+        self.quantization = quantization
+        self.rescore = rescore
+        self.oversampling = oversampling
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._collections: dict[str, _LocalCollection] = {}
+
+    def _alias_path(self, alias: str) -> str:
+        return os.path.join(self.root, f"{alias}.alias")
+
+    def _resolve(self, name: str) -> _LocalCollection:
+        target = self.get_alias(name) or name
+        with self._lock:
+            coll = self._collections.get(target)
+            if coll is None:
+                path = os.path.join(self.root, target)
+                if not os.path.isdir(path):
+                    raise KeyError(f"Collection not found: {name}")
+                coll = _LocalCollection(path)
+                self._collections[target] = coll
+            return coll
+
+    def list_collections(self) -> list[str]:
+        return sorted(
+            d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))
+        )
+
+    def create_collection(self, name: str, dim: int) -> None:
+        with self._lock:
+            self._collections[name] = _LocalCollection(
+                os.path.join(self.root, name), dim=dim, quantization=self.quantization
+            )
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            coll = self._collections.pop(name, None)
+        if coll is not None:
+            coll.close()
+        shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def get_alias(self, alias: str) -> str | None:
+        try:
+            with open(self._alias_path(alias), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_alias(self, alias: str, collection: str) -> None:
+        tmp = self._alias_path(alias) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(collection)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._alias_path(alias))
+
+    def upsert(self, collection, ids, vectors, payloads) -> None:
+        if ids:
+            self._resolve(collection).upsert(list(ids), vectors, list(payloads))
+
+    def delete(self, collection, ids) -> None:
+        if ids:
+            self._resolve(collection).delete(list(ids))
+
+    def existing_ids(self, collection, ids) -> set[str]:
+        return self._resolve(collection).existing_ids(list(ids))
+
+    def delete_documents_not_in(self, collection, document_ids) -> None:
+        coll = self._resolve(collection)
+        coll.delete(coll.ids_where_document_not_in(list(document_ids)))
+
+    def search(self, collection, vector, top_k, filters=None) -> list[VectorHit]:
+        return self._resolve(collection).search(
+            vector,
+            top_k,
+            filters,
+            rescore=self.rescore,
+            oversampling=self.oversampling,
+        )
+
+    def search_batch(self, collection, vectors, top_k, filters=None) -> list[list[VectorHit]]:
+        return self._resolve(collection).search_batch(
+            vectors,
+            top_k,
+            filters,
+            rescore=self.rescore,
+            oversampling=self.oversampling,
+        )
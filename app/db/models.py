@@ -6,11 +6,13 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
     func,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -26,6 +28,8 @@ class Document(Base):
     content_type: Mapped[str] = mapped_column(String(128))
     sha256: Mapped[str] = mapped_column(String(64), unique=True, index=True)
     extracted_text: Mapped[str] = mapped_column(Text)
+    # JSON list: char offset in extracted_text where each page starts (PDFs only)
+    page_offsets: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     chunks: Mapped[list["Chunk"]] = relationship(
@@ -36,18 +40,36 @@ class Document(Base):
 class Chunk(Base):
     __tablename__ = "chunks"
     __table_args__ = (
-    UniqueConstraint("document_id", "chunk_index", name="uq_chunk_doc_index"),
+    # A unique index rather than a constraint so init_db can add it to existing tables.
+    Index("uq_chunk_collection_doc_index", "collection", "document_id", "chunk_index", unique=True),
+    Index("ix_chunks_search_vector", "search_vector", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    # Vector collection version ("<alias>_vN") the row belongs to: a blue/green
+    # rebuild writes its own rows, so the serving version's rows stay intact
+    # until the alias swap and after a rollback. Always set; nullable only so
+    # init_db can add it to existing tables (see session._migrate_chunk_collections).
+    collection: Mapped[str | None] = mapped_column(String(128), nullable=True)
     document_id: Mapped[int] = mapped_column(
         ForeignKey("documents.id", ondelete="CASCADE"), index=True
     )
     chunk_index: Mapped[int] = mapped_column(Integer)
-    text: Mapped[str] = mapped_column(Text)
+    # NULL when CHUNK_TEXT_STORAGE=offsets: text is document text[char_start:char_end]
+    text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    text_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     char_start: Mapped[int] = mapped_column(Integer)
     char_end: Mapped[int] = mapped_column(Integer)
     token_count_est: Mapped[int] = mapped_column(Integer)
+    # 1-based pages spanned by the chunk (PDFs only), for citations
+    page_start: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    page_end: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Full-text search vector, written with the row (see indexing._persist_batch).
+    # Not a GENERATED column: in offsets storage mode the row has no text to derive it from.
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR().with_variant(Text(), "sqlite"), nullable=True
+    )
 
     # Stable mapping to the vector point in Qdrant (e.g., "docId:chunkIndex")
     qdrant_point_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
@@ -55,13 +77,58 @@ class Chunk(Base):
     document: Mapped["Document"] = relationship(back_populates="chunks")
 
 
+class EmbeddingCache(Base):
+    """
+    Content-addressed embedding store: one vector per (model, sha256(text)).
+    Lets reindexing skip the model for chunks whose text hasn't changed.
+    """
+
+    __tablename__ = "embedding_cache"
+    __table_args__ = (
+        UniqueConstraint("model_name", "text_sha256", name="uq_embedding_cache_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(256))
+    text_sha256: Mapped[str] = mapped_column(String(64))
+    dim: Mapped[int] = mapped_column(Integer)
+    # Raw little-endian float32 bytes (normalized, as returned by embed_texts)
+    vector: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 class IngestionLog(Base):
     __tablename__ = "ingestion_logs"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     event: Mapped[str] = mapped_column(String(64))
     detail: Mapped[str] = mapped_column(Text)
+    extraction_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class IndexJob(Base):
+    """
+    Background indexing job (reindex / single document), run by the in-process
+    job pool. Persisted so progress survives across requests and workers.
+    """
+
+    __tablename__ = "index_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32))
+    params: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+    status: Mapped[str] = mapped_column(String(16), default="queued", index=True)
+    chunks_done: Mapped[int] = mapped_column(Integer, default=0)
+    chunks_total: Mapped[int] = mapped_column(Integer, default=0)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Lease: the process running the job, and when it last proved it's alive.
+    worker_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    heartbeat_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class SearchLog(Base):
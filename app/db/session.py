@@ -1,19 +1,157 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, inspect, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
-from app.db.models import Base
+from app.db.models import Base, Chunk, Document
 
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine for the async API path (search / QA); created on first use so
+# scripts and sync code never need an async driver.
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = settings.DATABASE_URL
+    # psycopg 3 speaks both sync and async; plain "postgresql://" would pick psycopg2.
+    if url.startswith("postgresql://"):
+        return "postgresql+psycopg://" + url[len("postgresql://") :]
+    # pysqlite has no asyncio support; aiosqlite wraps the same database file.
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://") :]
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(_async_database_url(), pool_pre_ping=True)
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def dialect_insert(db: Session):
+    """
+    insert() for the session's dialect, so on_conflict_do_nothing /
+    on_conflict_do_update (with index_elements=...) work on Postgres and SQLite.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
 
 def init_db() -> None:
     # Portfolio-friendly: create tables automatically on startup.
     # Keeps "fresh machine" setup to a single docker-compose command.
     Base.metadata.create_all(bind=engine)
+    added = _add_missing_columns()
+    _migrate_chunk_collections()
+    _create_missing_indexes()
+    if ("chunks", "search_vector") in added:
+        _backfill_search_vectors()
+
+
+def _add_missing_columns() -> set[tuple[str, str]]:
+    """
+    create_all() never alters existing tables, so columns added to a model
+    after its table was created are added here, and columns a model has since
+    made nullable get their NOT NULL dropped (SQLite can't; it keeps it).
+    Only nullable columns are handled (that's all new columns should be);
+    anything else needs a real migration. Returns the (table, column) pairs added.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added: set[tuple[str, str]] = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"]: c for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not column.nullable:
+                    continue
+                if column.name not in present:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+                    added.add((table.name, column.name))
+                elif not present[column.name]["nullable"] and engine.dialect.name != "sqlite":
+                    conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" DROP NOT NULL'))
+    return added
+
+
+def _create_missing_indexes() -> None:
+    # Same story as columns: indexes declared after the table was created.
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(bind=engine)
+
+
+def _migrate_chunk_collections() -> None:
+    """
+    One-off move of chunk rows to the per-collection key: rows written before
+    chunks.collection existed belong to the serving collection, and the old
+    (document_id, chunk_index) unique constraint has to go so a rebuild can
+    write its own rows next to them.
+    """
+    inspector = inspect(engine)
+    if "chunks" not in inspector.get_table_names():
+        return
+    if "uq_chunk_doc_index" not in {uc["name"] for uc in inspector.get_unique_constraints("chunks")}:
+        return
+    from app.core.retrieval import serving_collection
+
+    serving = serving_collection(refresh=True)
+    with engine.begin() as conn:
+        conn.execute(update(Chunk).values(collection=serving).where(Chunk.collection.is_(None)))
+        if engine.dialect.name == "sqlite":
+            _recreate_sqlite_table(conn, Chunk.__table__)
+        else:
+            conn.execute(text("ALTER TABLE chunks DROP CONSTRAINT uq_chunk_doc_index"))
+
+
+def _recreate_sqlite_table(conn, table) -> None:
+    # SQLite can't drop a constraint: rebuild the table from the model and copy the rows.
+    old = f"{table.name}_old"
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old}"))
+    for index in inspect(conn).get_indexes(old):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    table.create(bind=conn)
+    columns = ", ".join(f'"{c.name}"' for c in table.columns)
+    conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old}"))
+    conn.execute(text(f"DROP TABLE {old}"))
+
+
+def _backfill_search_vectors() -> None:
+    """One-off fill of chunks.search_vector for rows written before the column existed."""
+    if engine.dialect.name != "postgresql":
+        return
+    from app.services.chunk_text import chunk_text_sql, tsvector_sql
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(Chunk)
+            .values(search_vector=tsvector_sql(chunk_text_sql()))
+            .where(Chunk.document_id == Document.id, Chunk.search_vector.is_(None))
+        )
 
 
 def get_db():
@@ -21,4 +159,19 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    get_async_engine()
+    assert _AsyncSessionLocal is not None
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 
 from app.core.logging import configure_logging
-from app.db.session import init_db
+from app.core.config import settings
+from app.core.pdf_extract import shutdown_pdf_pool
+from app.core.retrieval import close_async_qdrant, close_qdrant, get_qdrant, get_vector_store
+from app.db.session import dispose_async_engine, init_db
+from app.services.jobs import resume_jobs, shutdown_job_executor
+from app.services.lexical import bm25_enabled, get_bm25_index, save_bm25_index
 from app.api.routers import documents, index, search, qa
 
 configure_logging()
@@ -16,6 +21,24 @@ app = FastAPI(
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    get_vector_store()
+    if settings.VECTOR_STORE_BACKEND.lower() == "qdrant":
+        # Build the shared Qdrant client once (creation time is logged), not per query.
+        get_qdrant()
+    if bm25_enabled():
+        # Load the snapshot now rather than on the first keyword query.
+        get_bm25_index()
+    resume_jobs()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    shutdown_job_executor()
+    shutdown_pdf_pool()
+    save_bm25_index(force=True)
+    close_qdrant()
+    await close_async_qdrant()
+    await dispose_async_engine()
 
 
 @app.get("/health")
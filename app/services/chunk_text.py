@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.chunking import normalize_newlines
+from app.core.config import settings
+from app.db.models import Chunk, Document
+
+
+class DocumentTextCache:
+    """
+    Thread-safe LRU of document id -> newline-normalized extracted text,
+    bounded by total characters. Serves chunk text in CHUNK_TEXT_STORAGE=offsets
+    mode without re-reading hot documents from Postgres.
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars = max_chars
+        self._data: OrderedDict[int, str] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, document_id: int) -> str | None:
+        with self._lock:
+            text = self._data.get(document_id)
+            if text is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(document_id)
+            self.hits += 1
+            return text
+
+    def put(self, document_id: int, text: str) -> None:
+        if len(text) > self.max_chars:
+            return
+        with self._lock:
+            old = self._data.pop(document_id, None)
+            if old is not None:
+                self._chars -= len(old)
+            self._data[document_id] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, evicted = self._data.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def invalidate(self, document_id: int) -> None:
+        with self._lock:
+            old = self._data.pop(document_id, None)
+            if old is not None:
+                self._chars -= len(old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._chars = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._data),
+                "chars": self._chars,
+                "max_chars": self.max_chars,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+document_text_cache = DocumentTextCache(settings.CHUNK_TEXT_CACHE_CHARS)
+
+
+def make_snippet(text: str, max_len: int = 240) -> str:
+    if not text:
+        return ""
+    s = " ".join(text.split())  # normalize whitespace/newlines
+    return s[:max_len]
+
+
+def stored_text(text: str) -> str | None:
+    """What goes in Chunk.text for the configured CHUNK_TEXT_STORAGE."""
+    return None if settings.CHUNK_TEXT_STORAGE.lower() == "offsets" else text
+
+
+def chunk_text_sql():
+    """
+    SQL expression for a chunk's text in either storage mode (needs Document
+    joined). Offsets are into the newline-normalized text; SUBSTR is 1-based.
+    """
+    doc_text = func.replace(func.replace(Document.extracted_text, "\r\n", "\n"), "\r", "\n")
+    return func.coalesce(
+        Chunk.text,
+        func.substr(doc_text, Chunk.char_start + 1, Chunk.char_end - Chunk.char_start),
+    )
+
+
+def tsvector_sql(text):
+    """to_tsvector with the configured text search config (Postgres)."""
+    return func.to_tsvector(cast(settings.SEARCH_FTS_CONFIG, REGCONFIG), text)
+
+
+def tsquery_sql(query: str):
+    return func.plainto_tsquery(cast(settings.SEARCH_FTS_CONFIG, REGCONFIG), query)
+
+
+def _cached_documents(chunks: list[Chunk]) -> tuple[dict[int, str], list[int]]:
+    """Texts of the offsets-only rows' documents found in the cache (one lookup each), and the rest."""
+    cached: dict[int, str] = {}
+    missing: list[int] = []
+    for doc_id in {c.document_id for c in chunks if c.text is None}:
+        text = document_text_cache.get(doc_id)
+        if text is None:
+            missing.append(doc_id)
+        else:
+            cached[doc_id] = text
+    return cached, missing
+
+
+def _slice_texts(chunks: list[Chunk], doc_texts: dict[int, str]) -> dict[int, str]:
+    out: dict[int, str] = {}
+    for c in chunks:
+        if c.text is not None:
+            out[c.id] = c.text
+            continue
+        # Same as the chunkers' normalized[start:end].strip()
+        out[c.id] = doc_texts.get(c.document_id, "")[c.char_start : c.char_end].strip()
+    return out
+
+
+def _load(rows: Iterable[tuple[int, str]]) -> dict[int, str]:
+    loaded: dict[int, str] = {}
+    for doc_id, text in rows:
+        loaded[doc_id] = normalize_newlines(text or "")
+        document_text_cache.put(doc_id, loaded[doc_id])
+    return loaded
+
+
+def chunk_texts(db: Session, chunks: Iterable[Chunk]) -> dict[int, str]:
+    """
+    chunk id -> text for any mix of full and offsets-only rows. Missing
+    document texts are fetched in one query and cached.
+    """
+    chunks = list(chunks)
+    doc_texts, missing = _cached_documents(chunks)
+    if missing:
+        doc_texts.update(
+            _load(db.query(Document.id, Document.extracted_text).filter(Document.id.in_(missing)).all())
+        )
+    return _slice_texts(chunks, doc_texts)
+
+
+async def chunk_texts_async(db: AsyncSession, chunks: Iterable[Chunk]) -> dict[int, str]:
+    chunks = list(chunks)
+    doc_texts, missing = _cached_documents(chunks)
+    if missing:
+        result = await db.execute(
+            select(Document.id, Document.extracted_text).where(Document.id.in_(missing))
+        )
+        doc_texts.update(_load(result.all()))
+    return _slice_texts(chunks, doc_texts)
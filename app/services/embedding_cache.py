@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.embeddings import embed_texts
+from app.db.models import EmbeddingCache
+from app.db.session import dialect_insert
+
+# Keep IN (...) lists and multi-row INSERTs to a sane size.
+_LOOKUP_BATCH = 1000
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _load_cached(db: Session, digests: List[str]) -> dict[str, np.ndarray]:
+    found: dict[str, np.ndarray] = {}
+    for i in range(0, len(digests), _LOOKUP_BATCH):
+        batch = digests[i : i + _LOOKUP_BATCH]
+        rows = (
+            db.query(EmbeddingCache.text_sha256, EmbeddingCache.vector)
+            .filter(
+                EmbeddingCache.model_name == settings.EMBEDDING_MODEL_NAME,
+                EmbeddingCache.text_sha256.in_(batch),
+            )
+            .all()
+        )
+        for digest, blob in rows:
+            found[digest] = np.frombuffer(blob, dtype=np.float32)
+    return found
+
+
+def _store(db: Session, entries: dict[str, np.ndarray]) -> None:
+    values = [
+        {
+            "model_name": settings.EMBEDDING_MODEL_NAME,
+            "text_sha256": digest,
+            "dim": int(vec.shape[0]),
+            "vector": np.asarray(vec, dtype=np.float32).tobytes(),
+        }
+        for digest, vec in entries.items()
+    ]
+    insert = dialect_insert(db)
+    for i in range(0, len(values), _LOOKUP_BATCH):
+        stmt = insert(EmbeddingCache).values(values[i : i + _LOOKUP_BATCH])
+        # Concurrent indexers may race on the same text; first writer wins.
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["model_name", "text_sha256"]))
+
+
+@dataclass
+class CacheLookup:
+    """First half of a cached embed: which texts are known and which still need the model."""
+
+    digests: List[str]
+    cached: dict[str, np.ndarray] = field(default_factory=dict)
+    # digest -> text, deduplicated, in first-seen order
+    missing: dict[str, str] = field(default_factory=dict)
+
+
+def lookup_cached(db: Session, texts: List[str]) -> CacheLookup:
+    digests = [text_sha256(t) for t in texts]
+    lookup = CacheLookup(digests=digests)
+    if settings.EMBEDDING_CACHE_ENABLED and texts:
+        lookup.cached = _load_cached(db, list(dict.fromkeys(digests)))
+
+    for digest, text in zip(digests, texts):
+        if digest not in lookup.cached and digest not in lookup.missing:
+            lookup.missing[digest] = text
+    return lookup
+
+
+def complete_cached(
+    db: Session,
+    lookup: CacheLookup,
+    fresh_vectors: np.ndarray | None,
+) -> tuple[np.ndarray, int, int]:
+    """
+    Second half: combine cached vectors with freshly encoded ones (one row per
+    lookup.missing entry, same order) and add the new ones to the cache.
+    """
+    if not lookup.digests:
+        return np.zeros((0, 0), dtype=np.float32), 0, 0
+
+    fresh: dict[str, np.ndarray] = {}
+    if lookup.missing:
+        assert fresh_vectors is not None
+        fresh = dict(zip(lookup.missing.keys(), fresh_vectors))
+        if settings.EMBEDDING_CACHE_ENABLED:
+            _store(db, fresh)
+
+    hits = sum(1 for d in lookup.digests if d in lookup.cached)
+    out = np.stack(
+        [lookup.cached[d] if d in lookup.cached else fresh[d] for d in lookup.digests]
+    ).astype(np.float32, copy=False)
+    return out, hits, len(lookup.digests) - hits
+
+
+def embed_texts_cached(db: Session, texts: List[str]) -> tuple[np.ndarray, int, int]:
+    """
+    Embed texts, reusing vectors persisted for the current model.
+
+    Only cache misses reach the model (duplicates within the batch are encoded once).
+    New vectors are added to the session; the caller owns the commit.
+
+    Returns:
+      - (len(texts), dim) float32 array in input order
+      - cache_hits
+      - cache_misses
+    """
+    lookup = lookup_cached(db, texts)
+    fresh = embed_texts(list(lookup.missing.values())) if lookup.missing else None
+    return complete_cached(db, lookup, fresh)
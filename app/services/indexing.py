@@ -1,122 +1,773 @@
 from __future__ import annotations
 
-from typing import List
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Iterator, List, TypeVar
 
-from qdrant_client.http.models import Distance, PointStruct, VectorParams
+import numpy as np
+from sqlalchemy import bindparam
 from sqlalchemy.orm import Session
 
-from app.core.chunking import chunk_text
+from app.core.chunking import Chunk as TextChunk
+from app.core.chunking import iter_chunks, iter_chunks_cdc, iter_chunks_tokens
 from app.core.config import settings
-from app.core.embeddings import embed_texts, embedding_dim
-from app.core.retrieval import get_qdrant
+from app.core.embedding_pool import EmbeddingPool
+from app.core.embeddings import (
+    count_tokens,
+    embed_texts,
+    embedding_dim,
+    get_index_encode_executor,
+    model_max_tokens,
+    token_offsets,
+)
+from app.core.retrieval import get_vector_store, serving_collection
+from app.core.vector_store import VectorStore, epoch_seconds, filename_prefixes
 from app.db.models import Chunk, Document
+from app.db.session import dialect_insert
+from app.services.chunk_text import document_text_cache, make_snippet, stored_text, tsvector_sql
+from app.services.embedding_cache import CacheLookup, complete_cached, lookup_cached, text_sha256
+from app.services.lexical import (
+    bm25_add,
+    bm25_enabled,
+    bm25_remove,
+    delete_bm25_snapshots,
+    get_bm25_index,
+    save_bm25_index,
+)
 import uuid
 
+logger = logging.getLogger(__name__)
 
-def ensure_collection() -> None:
-    client = get_qdrant()
-    dim = embedding_dim()
+T = TypeVar("T")
 
-    existing = [c.name for c in client.get_collections().collections]
-    if settings.QDRANT_COLLECTION not in existing:
-        distance = Distance.COSINE if settings.QDRANT_DISTANCE.lower() == "cosine" else Distance.DOT
-        client.create_collection(
-            collection_name=settings.QDRANT_COLLECTION,
-            vectors_config=VectorParams(size=dim, distance=distance),
+# settings.QDRANT_COLLECTION is the serving *alias* (on either vector store backend);
+# the data lives in versioned collections "<alias>_v<N>" so full rebuilds can happen
+# off to the side.
+_rebuild_lock = threading.Lock()
+_rebuild_state: dict = {"status": "idle"}
+
+
+def _versioned_name(version: int) -> str:
+    return f"{settings.QDRANT_COLLECTION}_v{version}"
+
+
+def _collection_versions() -> dict[int, str]:
+    pattern = re.compile(rf"^{re.escape(settings.QDRANT_COLLECTION)}_v(\d+)$")
+    out: dict[int, str] = {}
+    for name in get_vector_store().list_collections():
+        m = pattern.match(name)
+        if m:
+            out[int(m.group(1))] = name
+    return out
+
+
+def _alias_target() -> str | None:
+    return get_vector_store().get_alias(settings.QDRANT_COLLECTION)
+
+
+def _point_alias_to(collection_name: str) -> None:
+    """Atomically repoint the serving alias."""
+    get_vector_store().set_alias(settings.QDRANT_COLLECTION, collection_name)
+    serving_collection(refresh=True)
+
+
+def ensure_collection(collection_name: str | None = None) -> None:
+    """
+    Ensure a writable target exists.
+
+    With no name, makes sure the serving alias resolves: a fresh install gets
+    "<alias>_v1" plus the alias; a legacy concrete collection is left as-is.
+    Either way the target gets its payload indexes, so filtered searches use
+    them instead of scanning.
+    """
+    store = get_vector_store()
+    existing = store.list_collections()
+
+    if collection_name is not None:
+        if collection_name not in existing:
+            store.create_collection(collection_name, embedding_dim())
+        store.ensure_payload_indexes(collection_name)
+        return
+
+    if settings.QDRANT_COLLECTION in existing:
+        store.ensure_payload_indexes(settings.QDRANT_COLLECTION)
+        return
+    serving = _alias_target()
+    if serving is not None:
+        store.ensure_payload_indexes(serving)
+        return
+
+    versions = _collection_versions()
+    version = max(versions) if versions else 1
+    if version not in versions:
+        store.create_collection(_versioned_name(version), embedding_dim())
+    store.ensure_payload_indexes(_versioned_name(version))
+    _point_alias_to(_versioned_name(version))
+
+
+def _point_id(document_id: int, chunk_index: int) -> str:
+    # Stable, reproducible vector point id:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{document_id}:{chunk_index}"))
+
+
+def token_chunk_max_tokens() -> int:
+    """Token budget per chunk in CHUNKING_MODE=tokens (the model's limit unless configured)."""
+    return settings.TOKEN_CHUNK_MAX_TOKENS or model_max_tokens()
+
+
+def document_chunks(text: str) -> Iterator[TextChunk]:
+    """Chunk a document with the configured CHUNKING_MODE."""
+    mode = settings.CHUNKING_MODE.lower()
+    if mode == "fixed":
+        return iter_chunks(
+            text,
+            chunk_size_chars=settings.CHUNK_SIZE_CHARS,
+            overlap_chars=settings.CHUNK_OVERLAP_CHARS,
+        )
+    if mode == "cdc":
+        return iter_chunks_cdc(
+            text,
+            min_chars=settings.CDC_MIN_CHARS,
+            avg_chars=settings.CDC_AVG_CHARS,
+            max_chars=settings.CDC_MAX_CHARS,
         )
+    if mode == "tokens":
+        return iter_chunks_tokens(
+            text,
+            token_offsets,
+            max_tokens=token_chunk_max_tokens(),
+            overlap_tokens=settings.TOKEN_CHUNK_OVERLAP_TOKENS,
+        )
+    raise ValueError(f"Unknown CHUNKING_MODE: {settings.CHUNKING_MODE}")
 
 
-def index_document(db: Session, document_id: int) -> dict:
-    ensure_collection()
+def _with_token_counts(batch: list[TextChunk]) -> list[TextChunk]:
+    """Replace the whitespace estimate with the tokenizer's real count (one batched call)."""
+    if settings.CHUNKING_MODE.lower() == "tokens":
+        return batch  # already exact
+    counts = count_tokens([ch.text for ch in batch])
+    if counts is None:
+        return batch
+    return [replace(ch, token_count_est=n) for ch, n in zip(batch, counts)]
 
-    doc = db.query(Document).filter(Document.id == document_id).one()
 
-    chunks = chunk_text(
-        doc.extracted_text,
-        chunk_size_chars=settings.CHUNK_SIZE_CHARS,
-        overlap_chars=settings.CHUNK_OVERLAP_CHARS,
-    )
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _UpsertWorker:
+    """
+    Background vector-store writer fed through a bounded queue.
+
+    Upserts overlap with Postgres writes and encoding of the next batch; when
+    the queue is full, put() blocks, which bounds memory held by the pipeline.
+    """
+
+    _DONE = object()
 
-    existing = {
-        c.chunk_index: c
-        for c in db.query(Chunk).filter(Chunk.document_id == document_id).all()
+    def __init__(self, store: VectorStore, collection: str, batch_size: int, depth: int) -> None:
+        self._store = store
+        self._collection = collection
+        self._batch_size = max(1, batch_size)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="index-upsert", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if self._error is not None:
+                continue  # drain so producers never block on a dead worker
+            ids, vectors, payloads = item
+            try:
+                for i in range(0, len(ids), self._batch_size):
+                    j = i + self._batch_size
+                    self._store.upsert(self._collection, ids[i:j], vectors[i:j], payloads[i:j])
+            except BaseException as exc:
+                self._error = exc
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def put(self, ids: list[str], vectors: np.ndarray, payloads: list[dict]) -> None:
+        self._raise_if_failed()
+        self._queue.put((ids, vectors, payloads))
+
+    def close(self) -> None:
+        self._queue.put(self._DONE)
+        self._thread.join()
+        self._raise_if_failed()
+
+
+def chunk_pages(
+    page_offsets: list[int] | None, char_start: int, char_end: int
+) -> tuple[int | None, int | None]:
+    """1-based (first, last) page a chunk's [char_start, char_end) span touches."""
+    if not page_offsets:
+        return None, None
+    first = bisect_right(page_offsets, char_start)
+    last = bisect_right(page_offsets, max(char_start, char_end - 1))
+    return max(1, first), max(1, last)
+
+
+@dataclass(frozen=True)
+class _PersistedChunk:
+    """What the embed / upsert stages need from a written chunk row."""
+
+    id: int
+    document_id: int
+    chunk_index: int
+    text: str
+    qdrant_point_id: str
+    page_start: int | None = None
+    page_end: int | None = None
+
+
+def _document_payload(doc: Document) -> dict:
+    """Document fields search filters run on (see PAYLOAD_INDEXES), shared by its points."""
+    return {
+        "content_type": doc.content_type,
+        "filename": doc.filename,
+        "filename_prefixes": filename_prefixes(doc.filename),
+        "created_at": epoch_seconds(doc.created_at) if doc.created_at is not None else None,
+    }
+
+
+def _point_payload(row: _PersistedChunk, doc_payload: dict) -> dict:
+    payload = {
+        "chunk_id": row.id,
+        "document_id": row.document_id,
+        "chunk_index": row.chunk_index,
+        **doc_payload,
     }
+    if settings.PAYLOAD_SNIPPETS:
+        # Enough to serve a search hit without reading the chunk row.
+        payload["snippet"] = make_snippet(row.text)
+        payload["page_start"] = row.page_start
+        payload["page_end"] = row.page_end
+    return payload
 
-    to_embed: List[str] = []
-    to_upsert_rows: List[Chunk] = []
-
-    for ch in chunks:
-        row = existing.get(ch.chunk_index)
-        if row is None:
-            row = Chunk(
-                document_id=document_id,
-                chunk_index=ch.chunk_index,
-                text=ch.text,
-                char_start=ch.char_start,
-                char_end=ch.char_end,
-                token_count_est=ch.token_count_est,
-                qdrant_point_id=None,
+
+def _persist_batch(
+    db: Session,
+    document_id: int,
+    batch: list,
+    incremental: bool,
+    store: VectorStore,
+    target: str,
+    page_offsets: list[int] | None = None,
+) -> tuple[list[_PersistedChunk], int]:
+    """
+    Write target's Chunk rows for one batch of chunker output as a single
+    INSERT ... ON CONFLICT (collection, document_id, chunk_index) DO UPDATE
+    ... RETURNING id, with point ids assigned in the same statement.
+
+    Returns (rows that need embedding + upsert, number of unchanged chunks).
+    """
+    existing: dict[int, tuple] = {}
+    live_points: set[str] = set()
+    if incremental:
+        # Only incremental mode needs the current rows, to detect unchanged chunks.
+        existing = {
+            r.chunk_index: r
+            for r in db.query(
+                Chunk.chunk_index,
+                Chunk.text,
+                Chunk.text_sha256,
+                Chunk.char_start,
+                Chunk.char_end,
+                Chunk.page_start,
+                Chunk.page_end,
+                Chunk.qdrant_point_id,
             )
-            db.add(row)
-            db.flush()
+            .filter(
+                Chunk.collection == target,
+                Chunk.document_id == document_id,
+                Chunk.chunk_index.in_([ch.chunk_index for ch in batch]),
+            )
+            .all()
+        }
+        live_points = store.existing_ids(
+            target,
+            [r.qdrant_point_id for r in existing.values() if r.qdrant_point_id],
+        )
+
+    values: list[dict] = []
+    ch_text = {ch.chunk_index: ch.text for ch in batch}
+    changed: set[int] = set()
+    unchanged = 0
+    for ch in batch:
+        point_id = _point_id(document_id, ch.chunk_index)
+        page_start, page_end = chunk_pages(page_offsets, ch.char_start, ch.char_end)
+        digest = text_sha256(ch.text)
+        old = existing.get(ch.chunk_index)
+        if (
+            old is not None
+            # Offsets-only rows have no text to compare; the digest covers both modes.
+            and (old.text_sha256 == digest if old.text_sha256 else old.text == ch.text)
+            and old.qdrant_point_id == point_id
+            and point_id in live_points
+        ):
+            # Same text, same point: the vector is still valid. Offsets aren't
+            # in the payload, so at most the row is rewritten; page numbers
+            # are when PAYLOAD_SNIPPETS is on, so those re-upsert the point.
+            pages_moved = (old.page_start, old.page_end) != (page_start, page_end)
+            if pages_moved and settings.PAYLOAD_SNIPPETS:
+                changed.add(ch.chunk_index)
+            else:
+                unchanged += 1
+                if not pages_moved and (old.char_start, old.char_end) == (ch.char_start, ch.char_end):
+                    continue
         else:
-            # If extraction changes, update stored fields (determinism should keep these stable)
-            row.text = ch.text
-            row.char_start = ch.char_start
-            row.char_end = ch.char_end
-            row.token_count_est = ch.token_count_est
+            changed.add(ch.chunk_index)
 
-        # Stable, reproducible vector point id:
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{document_id}:{ch.chunk_index}"))
-        row.qdrant_point_id = point_id
+        values.append(
+            {
+                "collection": target,
+                "document_id": document_id,
+                "chunk_index": ch.chunk_index,
+                "text": stored_text(ch.text),
+                "text_sha256": digest,
+                "char_start": ch.char_start,
+                "char_end": ch.char_end,
+                "token_count_est": ch.token_count_est,
+                "page_start": page_start,
+                "page_end": page_end,
+                "qdrant_point_id": point_id,
+            }
+        )
 
-        to_embed.append(ch.text)
-        to_upsert_rows.append(row)
+    if not values:
+        return [], unchanged
 
-    db.commit()
+    updated = [
+        "text",
+        "text_sha256",
+        "char_start",
+        "char_end",
+        "token_count_est",
+        "page_start",
+        "page_end",
+        "qdrant_point_id",
+    ]
+    insert = dialect_insert(db)
+    stmt = insert(Chunk)
+    if db.get_bind().dialect.name == "postgresql":
+        # Full-text vector computed in the same statement, from the chunk text
+        # (which offsets mode doesn't store, hence not a GENERATED column).
+        stmt = stmt.values(search_vector=tsvector_sql(bindparam("fts_text")))
+        for v in values:
+            v["fts_text"] = ch_text[v["chunk_index"]]
+        updated.append("search_vector")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["collection", "document_id", "chunk_index"],
+        set_={col: stmt.excluded[col] for col in updated},
+    ).returning(Chunk.id, Chunk.chunk_index)
+    ids = {chunk_index: chunk_id for chunk_id, chunk_index in db.execute(stmt, values).all()}
+
+    rows = [
+        _PersistedChunk(
+            id=ids[v["chunk_index"]],
+            document_id=document_id,
+            chunk_index=v["chunk_index"],
+            text=ch_text[v["chunk_index"]],
+            qdrant_point_id=v["qdrant_point_id"],
+            page_start=v["page_start"],
+            page_end=v["page_end"],
+        )
+        for v in values
+        if v["chunk_index"] in changed
+    ]
+    return rows, unchanged
+
+
+def index_document(
+    db: Session,
+    document_id: int,
+    incremental: bool = False,
+    collection_name: str | None = None,
+    pool: EmbeddingPool | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> dict:
+    """
+    Chunk, embed and upsert one document as a streaming, batched pipeline:
+
+      chunk (generator) -> persist rows -> embed (INDEX_EMBED_BATCH_SIZE)
+        -> upsert (INDEX_UPSERT_BATCH_SIZE, background thread)
+
+    Encoding runs on the indexing encode executor (not the query path's), so
+    Postgres writes and vector upserts proceed while the next batch is
+    encoding. At most INDEX_QUEUE_DEPTH batches are in flight per stage,
+    which bounds memory regardless of document size.
 
-    vectors = embed_texts(to_embed).tolist()
-
-    points: list[PointStruct] = []
-    for row, vec in zip(to_upsert_rows, vectors):
-        points.append(
-            PointStruct(
-                id=row.qdrant_point_id,
-                vector=vec,
-                payload={
-                    "chunk_id": row.id,
-                    "document_id": row.document_id,
-                    "chunk_index": row.chunk_index,
-                },
+    Chunk rows whose index no longer exists (the document got shorter) are
+    deleted together with their vector points.
+
+    incremental=True skips chunks whose stored row already matches the new
+    chunk output and whose point is present in the vector store; only new or
+    changed chunks are embedded and upserted.
+
+    Each collection version has its own chunk rows. collection_name targets
+    a specific (e.g. shadow) collection; by default the serving one is
+    written, plus the new collection while a blue/green rebuild is building,
+    so the swap doesn't drop this write.
+
+    pool (bulk mode) spreads each embed batch across worker processes; batches
+    grow with the worker count so every process gets a full share.
+
+    on_progress(n) is called as chunks complete (indexed or found unchanged).
+    """
+    ensure_collection(collection_name)
+    serving = serving_collection(refresh=True)
+    target = collection_name or serving
+    out = _index_into(db, document_id, target, target == serving, incremental, pool, on_progress)
+
+    building = _building_collection() if collection_name is None else None
+    if building is not None and building != serving:
+        try:
+            _index_into(db, document_id, building, False, incremental, pool, None)
+        except Exception:
+            # E.g. the rebuild failed and dropped its collection meanwhile;
+            # the serving write above stands either way.
+            db.rollback()
+            logger.warning(
+                "Rebuild collection %s not updated for document %s", building, document_id, exc_info=True
+            )
+    return {"document_id": document_id, **out}
+
+
+def _index_into(
+    db: Session,
+    document_id: int,
+    target: str,
+    lexical: bool,
+    incremental: bool,
+    pool: EmbeddingPool | None,
+    on_progress: Callable[[int], None] | None,
+) -> dict:
+    """index_document for one concrete collection; lexical: it's the serving one (BM25 follows it)."""
+    store = get_vector_store()
+    depth = max(1, settings.INDEX_QUEUE_DEPTH)
+    embed_batch_size = max(1, settings.INDEX_EMBED_BATCH_SIZE)
+    if pool is not None:
+        submit = pool.submit
+        embed_batch_size *= pool.workers
+    else:
+        encoder = get_index_encode_executor()
+
+        def submit(texts: list[str]) -> Future:
+            return encoder.submit(embed_texts, texts)
+
+    doc = db.query(Document).filter(Document.id == document_id).one()
+    page_offsets = json.loads(doc.page_offsets) if doc.page_offsets else None
+    doc_payload = _document_payload(doc)
+
+    stats = {
+        "chunks_indexed": 0,
+        "chunks_unchanged": 0,
+        "chunks_deleted": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+    }
+
+    writer = _UpsertWorker(store, target, settings.INDEX_UPSERT_BATCH_SIZE, depth)
+
+    def finish(rows: list[_PersistedChunk], lookup: CacheLookup, fut: Future | None) -> None:
+        fresh = fut.result() if fut is not None else None
+        vectors, hits, misses = complete_cached(db, lookup, fresh)
+        db.commit()
+        if lexical:
+            bm25_add((row.id, row.text) for row in rows)
+        writer.put(
+            [row.qdrant_point_id for row in rows],
+            vectors,
+            [_point_payload(row, doc_payload) for row in rows],
+        )
+        stats["chunks_indexed"] += len(rows)
+        stats["cache_hits"] += hits
+        stats["cache_misses"] += misses
+        if on_progress is not None:
+            on_progress(len(rows))
+
+    pending: deque[tuple[list[_PersistedChunk], CacheLookup, Future | None]] = deque()
+    n_chunks = 0
+    try:
+        chunks = document_chunks(doc.extracted_text)
+        for batch in _batched(chunks, embed_batch_size):
+            n_chunks += len(batch)
+            batch = _with_token_counts(batch)
+            rows, unchanged = _persist_batch(
+                db, document_id, batch, incremental, store, target, page_offsets
+            )
+            stats["chunks_unchanged"] += unchanged
+            if unchanged and on_progress is not None:
+                on_progress(unchanged)
+            if not rows:
+                continue
+
+            # Only cache misses are sent to the model; new vectors are persisted for next time.
+            lookup = lookup_cached(db, [row.text for row in rows])
+            fut = None
+            if lookup.missing:
+                fut = submit(list(lookup.missing.values()))
+            pending.append((rows, lookup, fut))
+
+            if len(pending) >= depth:
+                finish(*pending.popleft())
+
+        while pending:
+            finish(*pending.popleft())
+
+        # Chunks past the new end of the document: drop both the vector and the row.
+        stale = (
+            db.query(Chunk.id, Chunk.qdrant_point_id)
+            .filter(
+                Chunk.collection == target,
+                Chunk.document_id == document_id,
+                Chunk.chunk_index >= n_chunks,
             )
+            .all()
         )
+        if stale:
+            store.delete(target, [pid for _, pid in stale if pid])
+            db.query(Chunk).filter(Chunk.id.in_([cid for cid, _ in stale])).delete(
+                synchronize_session=False
+            )
+        stats["chunks_deleted"] = len(stale)
+        db.commit()
+        if lexical:
+            bm25_remove([cid for cid, _ in stale])
+        # Offsets-mode snippets slice this document's text; drop any stale copy.
+        document_text_cache.invalidate(document_id)
+        save_bm25_index()
+    finally:
+        for _, _, fut in pending:
+            if fut is not None:
+                fut.cancel()
+        writer.close()
 
-    client = get_qdrant()
-    client.upsert(collection_name=settings.QDRANT_COLLECTION, points=points)
+    return stats
 
-    return {"document_id": document_id, "chunks_indexed": len(points)}
 
+def _delete_orphaned_points(document_ids: List[int]) -> None:
+    """Remove points whose document no longer exists in Postgres."""
+    get_vector_store().delete_documents_not_in(settings.QDRANT_COLLECTION, document_ids)
+
+
+def _building_collection() -> str | None:
+    """Collection a running rebuild is filling, if any."""
+    with _rebuild_lock:
+        if _rebuild_state.get("status") == "building":
+            return _rebuild_state.get("collection")
+    return None
+
+
+def _update_rebuild_state(**fields) -> None:
+    with _rebuild_lock:
+        _rebuild_state.update(fields)
 
-def reindex_all(db: Session) -> dict:
-    ensure_collection()
 
-    client = get_qdrant()
-    # Drop + recreate collection to guarantee a clean rebuild.
-    client.delete_collection(collection_name=settings.QDRANT_COLLECTION)
+def rebuild_status() -> dict:
+    with _rebuild_lock:
+        state = dict(_rebuild_state)
+    total = state.get("documents_total") or 0
+    if total:
+        state["progress"] = state.get("documents_done", 0) / total
+    state["versions"] = sorted(_collection_versions())
+    state["serving"] = _alias_target()
+    return state
+
+
+@contextmanager
+def _embedding_pool(workers: int | None) -> Iterator[EmbeddingPool | None]:
+    if not workers or workers <= 1:
+        yield None
+        return
+    with EmbeddingPool(workers) as pool:
+        yield pool
+
+
+def rebuild_collection(
+    db: Session,
+    workers: int | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> dict:
+    """
+    Blue/green full rebuild.
+
+    Builds every document into a new "<alias>_vN" collection while search keeps
+    hitting the current one, then swaps the alias in a single atomic request.
+    The previous version is kept (QDRANT_KEEP_VERSIONS) for instant rollback.
+
+    workers > 1 embeds with a pool of that many model processes.
+    """
+    with _rebuild_lock:
+        if _rebuild_state.get("status") == "building":
+            raise RuntimeError("A collection rebuild is already in progress")
+        _rebuild_state.clear()
+        _rebuild_state["status"] = "building"
+
+    target: str | None = None
+    try:
+        versions = _collection_versions()
+        previous = _alias_target()
+        target = _versioned_name(max(versions, default=0) + 1)
+        ensure_collection(target)
+        # Set before listing documents: anything indexed from here on is also
+        # written to target by index_document.
+        _update_rebuild_state(collection=target, previous_collection=previous)
+
+        docs = db.query(Document).order_by(Document.id).all()
+        _update_rebuild_state(
+            documents_total=len(docs),
+            documents_done=0,
+            chunks_indexed=0,
+            started_at=time.time(),
+        )
+
+        totals = {
+            "chunks_indexed": 0,
+            "chunks_unchanged": 0,
+            "chunks_deleted": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+        with _embedding_pool(workers) as pool:
+            for i, d in enumerate(docs, start=1):
+                out = index_document(
+                    db, d.id, collection_name=target, pool=pool, on_progress=on_progress
+                )
+                for key in totals:
+                    totals[key] += out[key]
+                _update_rebuild_state(documents_done=i, chunks_indexed=totals["chunks_indexed"])
+
+        _point_alias_to(target)
+        _prune_versions(db, keep=settings.QDRANT_KEEP_VERSIONS)
+        if bm25_enabled():
+            get_bm25_index()  # load the new version's index now, not on the next query
+    except Exception as exc:
+        _update_rebuild_state(status="failed", error=str(exc), finished_at=time.time())
+        if target is not None and target != _alias_target():
+            db.rollback()
+            get_vector_store().delete_collection(target)
+            _delete_chunk_rows(db, [target])
+        raise
+
+    _update_rebuild_state(status="done", finished_at=time.time())
+    return {
+        "documents": len(docs),
+        "collection": target,
+        "previous_collection": previous,
+        **totals,
+    }
+
+
+def _delete_chunk_rows(db: Session, collections: list[str]) -> None:
+    db.query(Chunk).filter(Chunk.collection.in_(collections)).delete(synchronize_session=False)
+    db.commit()
+
+
+def _prune_versions(db: Session, keep: int) -> None:
+    """
+    Drop all but the newest `keep` versions, and the chunk rows of every
+    collection that no longer exists (pruned, or the legacy pre-alias one).
+    """
+    serving = _alias_target()
+    versions = _collection_versions()
+    store = get_vector_store()
+    for v in sorted(versions)[: max(0, len(versions) - max(1, keep))]:
+        if versions[v] != serving:
+            store.delete_collection(versions[v])
+    live = store.list_collections()
+    gone = [c for (c,) in db.query(Chunk.collection).distinct() if c not in live]
+    if gone:
+        _delete_chunk_rows(db, gone)
+        delete_bm25_snapshots(gone)
+
+
+def rollback_collection() -> dict:
+    """Point the serving alias back at the newest version older than the current one."""
+    current = _alias_target()
+    versions = _collection_versions()
+    current_version = next((v for v, name in versions.items() if name == current), None)
+    older = [v for v in versions if current_version is None or v < current_version]
+    if not older:
+        raise RuntimeError("No previous collection version to roll back to")
+
+    target = versions[max(older)]
+    _point_alias_to(target)
+    if bm25_enabled():
+        get_bm25_index()
+    return {"collection": target, "previous_collection": current}
+
+
+def reindex_all(
+    db: Session,
+    mode: str = "full",
+    workers: int | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> dict:
+    """
+    mode="full": blue/green rebuild into a fresh versioned collection, then
+    swap the serving alias (search keeps serving the old version meanwhile).
+    mode="incremental": keep the collection live and only upsert new/changed
+    chunks, deleting stale rows and points.
+
+    workers > 1 enables bulk mode: embedding runs on a pool of model processes.
+    """
+    if mode not in ("full", "incremental"):
+        raise ValueError("mode must be 'full' or 'incremental'")
+
+    if mode == "full":
+        out = rebuild_collection(db, workers=workers, on_progress=on_progress)
+        save_bm25_index(force=True)
+        return {"mode": mode, "workers": workers or 1, **out}
+
     ensure_collection()
 
     docs = db.query(Document).all()
+    _delete_orphaned_points([d.id for d in docs])
 
-    total = 0
-    for d in docs:
-        out = index_document(db, d.id)
-        total += out["chunks_indexed"]
+    totals = {
+        "chunks_indexed": 0,
+        "chunks_unchanged": 0,
+        "chunks_deleted": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+    }
+    with _embedding_pool(workers) as pool:
+        for d in docs:
+            out = index_document(db, d.id, incremental=True, pool=pool, on_progress=on_progress)
+            for key in totals:
+                totals[key] += out[key]
+    save_bm25_index(force=True)
 
-    return {"documents": len(docs), "chunks_indexed": total}
+    return {"mode": mode, "workers": workers or 1, "documents": len(docs), **totals}
 
 
 def index_status(db: Session) -> dict:
     docs = db.query(Document).count()
-    chunks = db.query(Chunk).count()
-    indexed = db.query(Chunk).filter(Chunk.qdrant_point_id.isnot(None)).count()
+    serving = db.query(Chunk).filter(Chunk.collection == serving_collection(refresh=True))
+    chunks = serving.count()
+    indexed = serving.filter(Chunk.qdrant_point_id.isnot(None)).count()
     return {"documents": docs, "chunks": chunks, "indexed_chunks": indexed}
\ No newline at end of file
@@ -1,36 +1,281 @@
 from __future__ import annotations
 
 import hashlib
-from io import BytesIO
+import io
+import json
+import mimetypes
+import time
+import zipfile
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Iterable, Iterator, TypeVar
 
-from pypdf import PdfReader
+from sqlalchemy import insert as sa_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.pdf_extract import extract_pdf_pages, join_pages
 from app.db.models import Document, IngestionLog
+from app.db.session import dialect_insert
+
+T = TypeVar("T")
 
 
 def sha256_bytes(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def _is_pdf(content_type: str, filename: str) -> bool:
+    return (filename or "").lower().endswith(".pdf") or content_type == "application/pdf"
+
+
 def extract_text_from_bytes(data: bytes, content_type: str, filename: str) -> str:
     """
     Required: .txt, .md
     Optional: .pdf via pypdf
     Everything else is treated as utf-8 text (replace errors).
     """
-    lower = (filename or "").lower()
-
-    if lower.endswith(".pdf") or content_type == "application/pdf":
-        reader = PdfReader(BytesIO(data))
-        parts: list[str] = []
-        for page in reader.pages:
-            parts.append(page.extract_text() or "")
-        return "\n".join(parts).strip()
+    if _is_pdf(content_type, filename):
+        return extract_text_from_file(io.BytesIO(data), content_type, filename)
 
     return data.decode("utf-8", errors="replace").strip()
 
 
+def extract_text_from_file(fileobj: BinaryIO, content_type: str, filename: str) -> str:
+    """
+    Same as extract_text_from_bytes, but reads from a seekable binary file so
+    the raw upload never has to be materialized as one bytes object.
+    """
+    return extract_document(fileobj, content_type, filename)[0]
+
+
+def extract_document(
+    fileobj: BinaryIO, content_type: str, filename: str
+) -> tuple[str, list[int] | None]:
+    """
+    Returns (text, page_offsets). page_offsets[i] is where page i+1 starts in
+    text (PDFs only; None for plain text). PDF pages are extracted in parallel
+    (see app.core.pdf_extract).
+    """
+    fileobj.seek(0)
+    if _is_pdf(content_type, filename):
+        return join_pages(extract_pdf_pages(fileobj))
+
+    # Incremental decode; newline="" keeps line endings as-is (like bytes.decode).
+    wrapper = io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace", newline="")
+    try:
+        return wrapper.read().strip(), None
+    finally:
+        wrapper.detach()  # leave the caller's file open
+
+
+@dataclass
+class SpooledUpload:
+    """
+    Upload body written to a SpooledTemporaryFile (RAM up to
+    UPLOAD_SPOOL_MAX_BYTES, then disk) with its sha256 computed on the way in.
+    """
+
+    file: SpooledTemporaryFile = field(
+        default_factory=lambda: SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_MAX_BYTES)
+    )
+    size: int = 0
+    _hash: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+
+    def write(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def spool_file(src: BinaryIO) -> SpooledUpload:
+    """
+    Copy a non-seekable stream (e.g. a zip member) into a SpooledUpload,
+    UPLOAD_READ_CHUNK_BYTES at a time.
+    """
+    spooled = SpooledUpload()
+    try:
+        while True:
+            chunk = src.read(settings.UPLOAD_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.file.seek(0)
+    return spooled
+
+
+def hash_file(fileobj: BinaryIO) -> str:
+    """sha256 of a seekable file, read in chunks; leaves it rewound."""
+    h = hashlib.sha256()
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(settings.UPLOAD_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        h.update(chunk)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+@dataclass
+class BulkItem:
+    filename: str
+    content_type: str
+    fileobj: BinaryIO
+    digest: str
+
+
+def _existing_by_sha(db: Session, digests: list[str]) -> dict[str, int]:
+    if not digests:
+        return {}
+    rows = db.query(Document.sha256, Document.id).filter(Document.sha256.in_(digests)).all()
+    return {sha: doc_id for sha, doc_id in rows}
+
+
+def ingest_batch(db: Session, items: list[BulkItem]) -> list[dict]:
+    """
+    Ingest many documents with a fixed number of round trips:
+    one dedup query for the whole batch, one multi-row INSERT for documents,
+    one for IngestionLog, one commit.
+
+    Duplicates (already stored, or repeated within the batch) are not
+    extracted at all. Returns one result per item, in input order.
+    """
+    existing = _existing_by_sha(db, list(dict.fromkeys(item.digest for item in items)))
+
+    # First occurrence of each new digest gets extracted and inserted.
+    new_items: dict[str, BulkItem] = {}
+    for item in items:
+        if item.digest not in existing and item.digest not in new_items:
+            new_items[item.digest] = item
+
+    doc_rows: list[dict] = []
+    extraction: dict[str, float] = {}
+    for digest, item in new_items.items():
+        t0 = time.perf_counter()
+        text, page_offsets = extract_document(item.fileobj, item.content_type, item.filename)
+        extraction[digest] = (time.perf_counter() - t0) * 1000.0
+        doc_rows.append(
+            {
+                "filename": item.filename,
+                "content_type": item.content_type,
+                "sha256": digest,
+                "extracted_text": text,
+                "page_offsets": json.dumps(page_offsets) if page_offsets is not None else None,
+            }
+        )
+
+    created: dict[str, int] = {}
+    if doc_rows:
+        insert = dialect_insert(db)
+        stmt = (
+            insert(Document)
+            # A concurrent upload of the same file wins; ours becomes a dedup.
+            .on_conflict_do_nothing(index_elements=["sha256"])
+            .returning(Document.id, Document.sha256)
+        )
+        created = {sha: doc_id for doc_id, sha in db.execute(stmt, doc_rows).all()}
+        lost = [d for d in new_items if d not in created]
+        existing.update(_existing_by_sha(db, lost))
+
+    logs: list[dict] = []
+    results: list[dict] = []
+    logged_new: set[str] = set()
+    for item in items:
+        digest = item.digest
+        if digest in created and digest not in logged_new:
+            logged_new.add(digest)
+            doc_id, is_new = created[digest], True
+            logs.append(
+                {
+                    "event": "INGEST",
+                    "detail": (
+                        f"document_id={doc_id} sha256={digest} filename={item.filename} "
+                        f"extraction_ms={extraction[digest]:.1f} bulk=1"
+                    ),
+                    "extraction_ms": extraction[digest],
+                }
+            )
+        else:
+            doc_id, is_new = created.get(digest, existing.get(digest)), False
+            logs.append(
+                {"event": "DEDUP", "detail": f"sha256={digest} filename={item.filename} bulk=1"}
+            )
+        results.append(
+            {"filename": item.filename, "document_id": doc_id, "created": is_new, "sha256": digest}
+        )
+
+    if logs:
+        db.execute(sa_insert(IngestionLog), logs)
+    db.commit()
+    return results
+
+
+def _batches(items: Iterable[T]) -> Iterator[list[T]]:
+    it = iter(items)
+    size = max(1, settings.BULK_INGEST_BATCH_SIZE)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def ingest_many(db: Session, items: Iterable[BulkItem]) -> list[dict]:
+    """ingest_batch over BULK_INGEST_BATCH_SIZE-item batches (one commit per batch)."""
+    results: list[dict] = []
+    for batch in _batches(items):
+        results.extend(ingest_batch(db, batch))
+    return results
+
+
+def ingest_zip(db: Session, archive: zipfile.ZipFile) -> list[dict]:
+    """
+    Ingest every file in a zip archive. Members are spooled (and hashed) one
+    batch at a time, so at most BULK_INGEST_BATCH_SIZE are open at once.
+    """
+    infos = (
+        info
+        for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not info.filename.rsplit("/", 1)[-1].startswith(".")
+    )
+    results: list[dict] = []
+    for batch in _batches(infos):
+        with ExitStack() as stack:
+            items = []
+            for info in batch:
+                with archive.open(info) as member:
+                    spooled = stack.enter_context(spool_file(member))
+                items.append(
+                    BulkItem(
+                        filename=info.filename,
+                        content_type=mimetypes.guess_type(info.filename)[0]
+                        or "application/octet-stream",
+                        fileobj=spooled.file,
+                        digest=spooled.sha256,
+                    )
+                )
+            results.extend(ingest_batch(db, items))
+    return results
+
+
 def upsert_document_from_bytes(
     db: Session,
     *,
@@ -42,26 +287,58 @@ def upsert_document_from_bytes(
     Idempotent upload: deduplicate by sha256.
     Returns (document, created_bool).
     """
-    digest = sha256_bytes(data)
+    return upsert_document_from_file(
+        db,
+        filename=filename,
+        content_type=content_type,
+        fileobj=io.BytesIO(data),
+        digest=sha256_bytes(data),
+    )
 
+
+def upsert_document_from_file(
+    db: Session,
+    *,
+    filename: str,
+    content_type: str,
+    fileobj: BinaryIO,
+    digest: str,
+) -> tuple[Document, bool]:
+    """
+    Idempotent upload from an already-hashed file (see hash_file).
+    Duplicates are detected from the digest alone, before any extraction.
+    Returns (document, created_bool).
+    """
     existing = db.query(Document).filter(Document.sha256 == digest).one_or_none()
     if existing:
         db.add(IngestionLog(event="DEDUP", detail=f"sha256={digest} filename={filename}"))
         db.commit()
         return existing, False
 
-    text = extract_text_from_bytes(data, content_type, filename)
+    t0 = time.perf_counter()
+    text, page_offsets = extract_document(fileobj, content_type, filename)
+    extraction_ms = (time.perf_counter() - t0) * 1000.0
 
     doc = Document(
         filename=filename,
         content_type=content_type,
         sha256=digest,
         extracted_text=text,
+        page_offsets=json.dumps(page_offsets) if page_offsets is not None else None,
     )
     db.add(doc)
     db.flush()
 
-    db.add(IngestionLog(event="INGEST", detail=f"document_id={doc.id} sha256={digest} filename={filename}"))
+    db.add(
+        IngestionLog(
+            event="INGEST",
+            detail=(
+                f"document_id={doc.id} sha256={digest} filename={filename} "
+                f"extraction_ms={extraction_ms:.1f}"
+            ),
+            extraction_ms=extraction_ms,
+        )
+    )
     db.commit()
     db.refresh(doc)
     return doc, True
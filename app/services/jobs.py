@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Document, IndexJob
+from app.db.session import SessionLocal
+from app.services.indexing import index_document, reindex_all, token_chunk_max_tokens
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("reindex", "document", "documents")
+
+# Progress is flushed to the job row at most this often.
+_PROGRESS_FLUSH_S = 1.0
+
+# Identifies this process as the owner of the jobs it claims.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_heartbeat: threading.Thread | None = None
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """
+    Lazy in-process worker pool; INDEX_JOB_CONCURRENCY bounds how many
+    indexing jobs run at once (the rest wait as "queued").
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.INDEX_JOB_CONCURRENCY),
+                    thread_name_prefix="index-job",
+                )
+    return _executor
+
+
+def shutdown_job_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            # Unstarted jobs stay "queued" in the table and are resumed on next startup.
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def estimate_chunks(text_length: int) -> int:
+    """Chunks the configured chunker would produce for a text of this length (about)."""
+    if text_length <= 0:
+        return 0
+    if settings.CHUNKING_MODE.lower() == "cdc":
+        return max(1, -(-text_length // max(1, settings.CDC_AVG_CHARS)))
+    if settings.CHUNKING_MODE.lower() == "tokens":
+        # Same token budget as the chunker; ~4 chars per word-piece token for English prose
+        step = max(1, token_chunk_max_tokens() - settings.TOKEN_CHUNK_OVERLAP_TOKENS) * 4
+        return max(1, -(-text_length // step))
+    step = max(1, settings.CHUNK_SIZE_CHARS - settings.CHUNK_OVERLAP_CHARS)
+    return max(1, -(-max(0, text_length - settings.CHUNK_OVERLAP_CHARS) // step))
+
+
+def _estimate_total(db: Session, document_ids: list[int] | None = None) -> int:
+    q = db.query(func.length(Document.extracted_text))
+    if document_ids is not None:
+        q = q.filter(Document.id.in_(document_ids))
+    return sum(estimate_chunks(n or 0) for (n,) in q.all())
+
+
+def _job_document_ids(job: IndexJob, params: dict) -> list[int] | None:
+    if job.kind == "document":
+        return [int(params["document_id"])]
+    if job.kind == "documents":
+        return [int(d) for d in params["document_ids"]]
+    return None
+
+
+def submit_job(db: Session, kind: str, params: dict | None = None) -> IndexJob:
+    """Persist a queued job and hand it to the worker pool. Returns immediately."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = IndexJob(kind=kind, params=json.dumps(params or {}), status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_job_executor().submit(_run_job, job.id)
+    return job
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        time.sleep(max(0.1, settings.INDEX_JOB_HEARTBEAT_S))
+        try:
+            with SessionLocal() as db:
+                db.query(IndexJob).filter(
+                    IndexJob.worker_id == WORKER_ID, IndexJob.status == "running"
+                ).update({"heartbeat_at": _now()}, synchronize_session=False)
+                db.commit()
+        except Exception:
+            logger.exception("Index job heartbeat failed")
+
+
+def _ensure_heartbeat() -> None:
+    global _heartbeat
+    if _heartbeat is None:
+        with _executor_lock:
+            if _heartbeat is None:
+                _heartbeat = threading.Thread(target=_heartbeat_loop, name="index-job-heartbeat", daemon=True)
+                _heartbeat.start()
+
+
+def _claim_job(db: Session, job_id: int) -> bool:
+    """
+    queued -> running in one conditional UPDATE, so exactly one runner (in
+    any process) wins a job.
+    """
+    now = _now()
+    claimed = (
+        db.query(IndexJob)
+        .filter(IndexJob.id == job_id, IndexJob.status == "queued")
+        .update(
+            {"status": "running", "worker_id": WORKER_ID, "started_at": now, "heartbeat_at": now},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def _update_job(job_id: int, **values) -> None:
+    with SessionLocal() as db:
+        db.query(IndexJob).filter(IndexJob.id == job_id).update(values)
+        db.commit()
+
+
+class _ProgressTracker:
+    """on_progress callback that batches chunk counts into periodic row updates."""
+
+    def __init__(self, job_id: int) -> None:
+        self.job_id = job_id
+        self.done = 0
+        self._last_flush = time.monotonic()
+
+    def __call__(self, n: int) -> None:
+        self.done += n
+        now = time.monotonic()
+        if now - self._last_flush >= _PROGRESS_FLUSH_S:
+            self._last_flush = now
+            _update_job(self.job_id, chunks_done=self.done)
+
+
+def _execute(db: Session, job: IndexJob, on_progress: _ProgressTracker) -> dict:
+    params = json.loads(job.params or "{}")
+    if job.kind == "reindex":
+        return reindex_all(
+            db,
+            mode=params.get("mode", "full"),
+            workers=params.get("workers"),
+            on_progress=on_progress,
+        )
+    if job.kind == "documents":
+        incremental = bool(params.get("incremental", False))
+        out = {"documents": 0, "chunks_indexed": 0, "chunks_unchanged": 0, "missing": []}
+        for document_id in _job_document_ids(job, params) or []:
+            if db.get(Document, document_id) is None:
+                out["missing"].append(document_id)
+                continue
+            res = index_document(db, document_id, incremental=incremental, on_progress=on_progress)
+            out["documents"] += 1
+            out["chunks_indexed"] += res["chunks_indexed"]
+            out["chunks_unchanged"] += res["chunks_unchanged"]
+        return out
+    document_id = int(params["document_id"])
+    if db.get(Document, document_id) is None:
+        raise ValueError(f"Document {document_id} not found")
+    return index_document(
+        db,
+        document_id,
+        incremental=bool(params.get("incremental", False)),
+        on_progress=on_progress,
+    )
+
+
+def _run_job(job_id: int) -> None:
+    with SessionLocal() as db:
+        if not _claim_job(db, job_id):
+            return
+        _ensure_heartbeat()
+        job = db.get(IndexJob, job_id)
+        params = json.loads(job.params or "{}")
+        job.chunks_total = _estimate_total(db, _job_document_ids(job, params))
+        db.commit()
+
+        tracker = _ProgressTracker(job_id)
+        try:
+            result = _execute(db, job, tracker)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Index job %s failed", job_id)
+            _update_job(
+                job_id,
+                status="failed",
+                chunks_done=tracker.done,
+                error=f"{type(exc).__name__}: {exc}",
+                finished_at=_now(),
+            )
+            return
+
+        # The estimate is only used for ETA; settle on the real count.
+        _update_job(
+            job_id,
+            status="succeeded",
+            chunks_done=tracker.done,
+            chunks_total=tracker.done,
+            result=json.dumps(result),
+            finished_at=_now(),
+        )
+
+
+def resume_jobs() -> int:
+    """
+    Called on startup: "running" jobs whose owner stopped heartbeating for
+    INDEX_JOB_LEASE_S (a dead process) are marked failed; jobs a live sibling
+    worker is running are left alone. Jobs still "queued" are handed to the
+    pool again (the claim keeps two workers from running one). Returns how
+    many were requeued.
+    """
+    stale_before = _now() - timedelta(seconds=settings.INDEX_JOB_LEASE_S)
+    with SessionLocal() as db:
+        db.query(IndexJob).filter(
+            IndexJob.status == "running",
+            or_(IndexJob.heartbeat_at.is_(None), IndexJob.heartbeat_at < stale_before),
+        ).update(
+            {"status": "failed", "error": "Interrupted by shutdown", "finished_at": _now()},
+            synchronize_session=False,
+        )
+        db.commit()
+        queued = [
+            job_id
+            for (job_id,) in db.query(IndexJob.id)
+            .filter(IndexJob.status == "queued")
+            .order_by(IndexJob.id)
+            .all()
+        ]
+    for job_id in queued:
+        get_job_executor().submit(_run_job, job_id)
+    return len(queued)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    # SQLite drops tzinfo on the way back.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def job_progress(
+    chunks_done: int,
+    chunks_total: int,
+    started_at: datetime | None,
+    finished_at: datetime | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """
+    Throughput (chunks/s) and ETA (seconds) from the job's counters.
+    ETA is None until there is something to extrapolate from.
+    """
+    started_at = _as_utc(started_at)
+    end = _as_utc(finished_at) or now or _now()
+    elapsed = (end - started_at).total_seconds() if started_at else 0.0
+    throughput = chunks_done / elapsed if elapsed > 0 else 0.0
+
+    eta = None
+    if finished_at is not None:
+        eta = 0.0
+    elif throughput > 0:
+        eta = max(0, chunks_total - chunks_done) / throughput
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_chunks_per_s": round(throughput, 2),
+        "eta_seconds": round(eta, 1) if eta is not None else None,
+        "percent": round(100.0 * min(chunks_done, chunks_total) / chunks_total, 1)
+        if chunks_total
+        else None,
+    }
+
+
+def _job_dict(job: IndexJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params or "{}"),
+        "status": job.status,
+        "chunks_done": job.chunks_done,
+        "chunks_total": job.chunks_total,
+        **job_progress(job.chunks_done, job.chunks_total, job.started_at, job.finished_at),
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "worker_id": job.worker_id,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def job_status(db: Session, job_id: int) -> dict | None:
+    job = db.get(IndexJob, job_id)
+    return _job_dict(job) if job else None
+
+
+def list_jobs(db: Session, status: str | None = None, limit: int = 50) -> list[dict]:
+    q = db.query(IndexJob)
+    if status:
+        q = q.filter(IndexJob.status == status)
+    return [_job_dict(j) for j in q.order_by(IndexJob.id.desc()).limit(limit).all()]
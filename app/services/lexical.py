@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.bm25 import BM25Index
+from app.core.config import settings
+from app.core.retrieval import serving_collection
+from app.db.models import Chunk
+from app.db.session import SessionLocal
+from app.services.chunk_text import chunk_texts
+
+logger = logging.getLogger(__name__)
+
+_BUILD_BATCH = 1000
+
+_index: BM25Index | None = None
+_index_collection: str | None = None
+_loaded_mtime: int | None = None  # snapshot mtime _index was loaded from / last saved as
+_lock = threading.Lock()
+_last_save = 0.0
+_last_check = 0.0
+
+
+def bm25_enabled() -> bool:
+    return settings.LEXICAL_BACKEND.lower() == "bm25"
+
+
+def _snapshot_path(collection: str) -> str:
+    return os.path.join(settings.BM25_INDEX_PATH, collection)
+
+
+def build_bm25_index(db: Session, collection: str) -> BM25Index:
+    """Index every chunk row of a collection from scratch (keyset-paginated by id)."""
+    index = BM25Index(settings.BM25_K1, settings.BM25_B)
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Chunk)
+            .filter(Chunk.collection == collection, Chunk.id > last_id)
+            .order_by(Chunk.id)
+            .limit(_BUILD_BATCH)
+            .all()
+        )
+        if not rows:
+            return index
+        index.add_many(chunk_texts(db, rows).items())
+        last_id = rows[-1].id
+
+
+def _snapshot_mtime(collection: str) -> int | None:
+    try:
+        return os.stat(os.path.join(_snapshot_path(collection), "index.npz")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _count_chunks(db: Session, collection: str) -> int:
+    return db.query(func.count(Chunk.id)).filter(Chunk.collection == collection).scalar() or 0
+
+
+def _is_stale(collection: str) -> bool:
+    # Another process saved a newer snapshot, or wrote rows we haven't seen.
+    if _snapshot_mtime(collection) != _loaded_mtime:
+        return True
+    with SessionLocal() as db:
+        return len(_index) != _count_chunks(db, collection)
+
+
+def get_bm25_index() -> BM25Index:
+    """
+    Process-wide BM25 index over the serving collection's chunk rows, loaded
+    from its snapshot under BM25_INDEX_PATH. It is rebuilt from the chunks
+    table when there is no snapshot or its chunk count doesn't match the table
+    (e.g. chunks were written under LEXICAL_BACKEND=postgres), and reloaded
+    when the serving alias moves (rebuild swap or rollback).
+
+    Indexing only updates the index of the process doing it, so every
+    BM25_RELOAD_CHECK_S the others compare the snapshot's mtime and the chunk
+    count with what they loaded, and reload when either moved.
+    """
+    global _index, _index_collection, _loaded_mtime, _last_check, _last_save
+    collection = serving_collection()
+    if (
+        _index is not None
+        and _index_collection == collection
+        and time.monotonic() - _last_check < settings.BM25_RELOAD_CHECK_S
+    ):
+        return _index
+    with _lock:
+        switched = _index is None or _index_collection != collection
+        if switched or (time.monotonic() - _last_check >= settings.BM25_RELOAD_CHECK_S and _is_stale(collection)):
+            t0 = time.perf_counter()
+            if _index is not None and _index.dirty and switched:
+                _index.save(_snapshot_path(_index_collection))
+            index = None
+            if switched or not _index.dirty:
+                # (Unsaved local writes mean another process's snapshot lacks them: rebuild.)
+                index = BM25Index.load(_snapshot_path(collection), settings.BM25_K1, settings.BM25_B)
+            with SessionLocal() as db:
+                if index is None or len(index) != _count_chunks(db, collection):
+                    index = build_bm25_index(db, collection)
+                    index.save(_snapshot_path(collection))
+            _loaded_mtime = _snapshot_mtime(collection)
+            _last_save = time.monotonic()
+            logger.info(
+                "BM25 index for %s ready (%d chunks) in %.1f ms",
+                collection,
+                len(index),
+                (time.perf_counter() - t0) * 1000.0,
+            )
+            _index, _index_collection = index, collection
+        _last_check = time.monotonic()
+    return _index
+
+
+def bm25_add(items: Iterable[tuple[int, str]]) -> None:
+    if bm25_enabled():
+        get_bm25_index().add_many(items)
+
+
+def bm25_remove(chunk_ids: Iterable[int]) -> None:
+    if bm25_enabled():
+        get_bm25_index().remove(chunk_ids)
+
+
+def save_bm25_index(force: bool = False) -> None:
+    """
+    Snapshot the index if it changed; at most every BM25_SAVE_INTERVAL_S
+    seconds unless force=True.
+    """
+    global _last_save, _loaded_mtime
+    index, collection = _index, _index_collection
+    if index is None or not index.dirty:
+        return
+    if not force and time.monotonic() - _last_save < settings.BM25_SAVE_INTERVAL_S:
+        return
+    index.save(_snapshot_path(collection))
+    if index is _index:
+        _loaded_mtime = _snapshot_mtime(collection)
+    _last_save = time.monotonic()
+
+
+def delete_bm25_snapshots(collections: Iterable[str]) -> None:
+    """Remove the snapshots of collections that no longer exist."""
+    for collection in collections:
+        shutil.rmtree(_snapshot_path(collection), ignore_errors=True)
+
+
+def bm25_search(query: str, top_k: int, allowed: Iterable[int] | None = None) -> list[tuple[int, float]]:
+    return get_bm25_index().search(query, top_k, allowed=allowed)
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from typing import List
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.services.search import semantic_search
+from app.core.vector_store import SearchFilter
+from app.services.search import semantic_search, semantic_search_async
 
 
 def grounded_answer(question: str, sources: List[dict]) -> str:
@@ -27,8 +29,7 @@ def grounded_answer(question: str, sources: List[dict]) -> str:
     return joined[:900]
 
 
-def qa(db: Session, question: str, top_k: int) -> dict:
-    retrieval = semantic_search(db, question, top_k=top_k)
+def _qa_response(question: str, retrieval: dict) -> dict:
     sources = retrieval["results"]
 
     answer = grounded_answer(question, sources)
@@ -39,4 +40,12 @@ def qa(db: Session, question: str, top_k: int) -> dict:
         "answer": answer,
         "retrieval_ms": retrieval["retrieval_ms"],
         "sources": sources if sources else [],
-    }
\ No newline at end of file
+    }
+
+
+def qa(db: Session, question: str, top_k: int, filters: SearchFilter | None = None) -> dict:
+    return _qa_response(question, semantic_search(db, question, top_k=top_k, filters=filters))
+
+
+async def qa_async(db: AsyncSession, question: str, top_k: int, filters: SearchFilter | None = None) -> dict:
+    return _qa_response(question, await semantic_search_async(db, question, top_k=top_k, filters=filters))
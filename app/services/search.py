@@ -1,50 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Iterable
 
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.embeddings import embed_texts
-from app.db.models import Chunk
+from app.core.embeddings import embed_queries, embed_queries_async, embed_query, embed_query_async
+from app.core.retrieval import get_vector_store, serving_collection
+from app.core.vector_store import SearchFilter
+from app.db.models import Chunk, Document
+from app.services.chunk_text import chunk_texts, chunk_texts_async, make_snippet, tsquery_sql
+from app.services.lexical import bm25_enabled, bm25_search
 
 
-def _make_snippet(text: str, max_len: int = 240) -> str:
-    if not text:
-        return ""
-    s = " ".join(text.split())  # normalize whitespace/newlines
-    return s[:max_len]
-
-
-def semantic_search(db: Session, query: str, top_k: int = 5) -> dict[str, Any]:
-    """
-    Vector similarity search via Qdrant.
-
-    Important design choice:
-    - Qdrant stores vectors + minimal payload (ids / metadata).
-    - Postgres is the source of truth for chunk text.
-    - Snippets are generated from Postgres to guarantee citations are never empty.
-    """
-    t0 = time.perf_counter()
-
-    # Embed query (local sentence-transformers)
-    vec = embed_texts([query])[0].tolist()
-
-    client = QdrantClient(url=settings.QDRANT_URL)
-    hits = client.search(
-        collection_name=settings.QDRANT_COLLECTION,
-        query_vector=vec,
-        limit=top_k,
-        with_payload=True,
-        with_vectors=False,
-        query_filter=Filter(must=[]),  # placeholder; future metadata filtering
-    )
-
-    # Extract chunk_ids + scores from qdrant hits
+def _scored_chunk_ids(hits: Iterable[Any]) -> list[tuple[int, float]]:
+    # Extract chunk_ids + scores from vector store hits
     scored_chunk_ids: list[tuple[int, float]] = []
     for h in hits:
         payload = h.payload or {}
@@ -56,17 +32,50 @@ def semantic_search(db: Session, query: str, top_k: int = 5) -> dict[str, Any]:
         except (TypeError, ValueError):
             continue
         scored_chunk_ids.append((chunk_id_int, float(h.score)))
+    return scored_chunk_ids
+
+
+def _hit_payloads(hits: Iterable[Any]) -> dict[int, dict]:
+    # chunk_id -> payload, for hits that carry a precomputed snippet
+    out: dict[int, dict] = {}
+    for h in hits:
+        payload = h.payload or {}
+        if "snippet" in payload and payload.get("chunk_id") is not None:
+            out[int(payload["chunk_id"])] = payload
+    return out
+
+
+def _payload_result(chunk_id: int, score: float, payload: dict) -> dict[str, Any]:
+    result = {
+        "document_id": payload.get("document_id"),
+        "chunk_id": chunk_id,
+        "chunk_index": payload.get("chunk_index"),
+        "page_start": payload.get("page_start"),
+        "page_end": payload.get("page_end"),
+        "score": score,
+        "snippet": payload["snippet"],
+    }
+    if settings.PAYLOAD_FILENAME and "filename" in payload:
+        result["filename"] = payload["filename"]
+    return result
 
-    # Fetch chunks from Postgres (source of truth for text)
-    chunk_map: dict[int, Chunk] = {}
-    if scored_chunk_ids:
-        ids = [cid for cid, _ in scored_chunk_ids]
-        rows = db.query(Chunk).filter(Chunk.id.in_(ids)).all()
-        chunk_map = {c.id: c for c in rows}
 
+def _build_results(
+    scored_chunk_ids: list[tuple[int, float]],
+    chunk_map: dict[int, Chunk],
+    texts: dict[int, str],
+    payloads: dict[int, dict] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Chunks loaded from Postgres (chunk_map) win; otherwise a hit is answered
+    from its vector payload when that has a snippet.
+    """
     results: list[dict[str, Any]] = []
     for chunk_id, score in scored_chunk_ids:
         ch = chunk_map.get(chunk_id)
+        if not ch and payloads and chunk_id in payloads:
+            results.append(_payload_result(chunk_id, score, payloads[chunk_id]))
+            continue
         if not ch:
             # If DB row missing, still return the id/score for transparency
             results.append(
@@ -74,56 +83,394 @@ def semantic_search(db: Session, query: str, top_k: int = 5) -> dict[str, Any]:
                     "document_id": None,
                     "chunk_id": chunk_id,
                     "chunk_index": None,
+                    "page_start": None,
+                    "page_end": None,
                     "score": score,
                     "snippet": "",
                 }
             )
             continue
 
-        results.append(
-            {
-                "document_id": ch.document_id,
-                "chunk_id": ch.id,
-                "chunk_index": ch.chunk_index,
-                "score": score,
-                "snippet": _make_snippet(ch.text),
-            }
-        )
+        result = {
+            "document_id": ch.document_id,
+            "chunk_id": ch.id,
+            "chunk_index": ch.chunk_index,
+            "page_start": ch.page_start,
+            "page_end": ch.page_end,
+            "score": score,
+            "snippet": make_snippet(texts.get(ch.id, "")),
+        }
+        if settings.PAYLOAD_FILENAME and payloads and "filename" in payloads.get(chunk_id, {}):
+            result["filename"] = payloads[chunk_id]["filename"]
+        results.append(result)
+    return results
+
+
+def _to_hydrate(
+    scored_chunk_ids: list[tuple[int, float]], payloads: dict[int, dict], hydrate: bool
+) -> list[int]:
+    if hydrate:
+        return [cid for cid, _ in scored_chunk_ids]
+    # Points indexed before payload snippets existed still need their row.
+    return [cid for cid, _ in scored_chunk_ids if cid not in payloads]
+
+
+def _fetch_chunks(db: Session, ids: list[int]) -> dict[int, Chunk]:
+    if not ids:
+        return {}
+    return {c.id: c for c in db.query(Chunk).filter(Chunk.id.in_(ids)).all()}
+
+
+async def _fetch_chunks_async(db: AsyncSession, ids: list[int]) -> dict[int, Chunk]:
+    if not ids:
+        return {}
+    rows = (await db.execute(select(Chunk).where(Chunk.id.in_(ids)))).scalars().all()
+    return {c.id: c for c in rows}
+
+
+def semantic_search(
+    db: Session, query: str, top_k: int = 5, hydrate: bool = False, filters: SearchFilter | None = None
+) -> dict[str, Any]:
+    """
+    Vector similarity search via the configured vector store (Qdrant or local).
+
+    Important design choice:
+    - The vector store holds vectors + a small payload (ids, page span and,
+      with PAYLOAD_SNIPPETS, the precomputed snippet).
+    - Postgres is the source of truth for chunk text.
+    - Hits whose payload has a snippet are answered from the payload alone;
+      the rest (or every hit, with hydrate=True) are loaded from Postgres, so
+      citations are never empty.
+    - filters are evaluated by the vector store against indexed payload
+      fields, so a filtered query still returns top_k matching hits.
+    """
+    t0 = time.perf_counter()
+
+    # Embed query (local sentence-transformers), batched with concurrent requests
+    vec = embed_query(query)
+
+    hits = get_vector_store().search(settings.QDRANT_COLLECTION, vec, top_k, filters)
+    scored_chunk_ids = _scored_chunk_ids(hits)
+    payloads = _hit_payloads(hits)
+
+    # Fetch chunks from Postgres (source of truth for text) only where needed
+    chunk_map = _fetch_chunks(db, _to_hydrate(scored_chunk_ids, payloads, hydrate))
+
+    results = _build_results(scored_chunk_ids, chunk_map, chunk_texts(db, chunk_map.values()), payloads)
 
     retrieval_ms = (time.perf_counter() - t0) * 1000.0
     return {"query": query, "top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
 
 
-def keyword_baseline_search(db: Session, query: str, top_k: int = 5) -> dict[str, Any]:
+async def semantic_search_async(
+    db: AsyncSession, query: str, top_k: int = 5, hydrate: bool = False, filters: SearchFilter | None = None
+) -> dict[str, Any]:
     """
-    Keyword baseline using Postgres full-text search + ts_rank.
-    Used only in evaluation harness, not the main product surface.
+    Async variant of semantic_search (same response shape).
+
+    Encoding runs off the event loop; the vector store and Postgres are awaited, so one
+    worker can overlap many concurrent requests.
     """
     t0 = time.perf_counter()
 
-    vec = func.to_tsvector("english", Chunk.text)
-    qry = func.plainto_tsquery("english", query)
-    rank = func.ts_rank(vec, qry).label("rank")
+    vec = await embed_query_async(query)
 
-    rows = (
-        db.query(Chunk, rank)
-        .filter(vec.op("@@")(qry))
-        .order_by(rank.desc())
-        .limit(top_k)
-        .all()
-    )
+    hits = await get_vector_store().search_async(settings.QDRANT_COLLECTION, vec, top_k, filters)
+    scored_chunk_ids = _scored_chunk_ids(hits)
+    payloads = _hit_payloads(hits)
 
-    results: list[dict[str, Any]] = []
-    for ch, r in rows:
-        results.append(
-            {
-                "document_id": ch.document_id,
-                "chunk_id": ch.id,
-                "chunk_index": ch.chunk_index,
-                "score": float(r),
-                "snippet": _make_snippet(ch.text),
-            }
-        )
+    chunk_map = await _fetch_chunks_async(db, _to_hydrate(scored_chunk_ids, payloads, hydrate))
+
+    texts = await chunk_texts_async(db, chunk_map.values())
+    results = _build_results(scored_chunk_ids, chunk_map, texts, payloads)
+
+    retrieval_ms = (time.perf_counter() - t0) * 1000.0
+    return {"query": query, "top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
+
+
+def _batch_payloads(hit_lists: list[list[Any]]) -> dict[int, dict]:
+    payloads: dict[int, dict] = {}
+    for hits in hit_lists:
+        payloads.update(_hit_payloads(hits))
+    return payloads
+
+
+def _batch_hydrate_ids(scored: list[list[tuple[int, float]]], payloads: dict[int, dict], hydrate: bool) -> list[int]:
+    # Every query's hits, deduplicated, in one IN list
+    return list(dict.fromkeys(cid for s in scored for cid in _to_hydrate(s, payloads, hydrate)))
+
+
+def semantic_search_batch(
+    db: Session, queries: list[str], top_k: int = 5, hydrate: bool = False, filters: SearchFilter | None = None
+) -> dict[str, Any]:
+    """
+    Many queries in one pass: one encode for every uncached query, one
+    vector-store batch request and one IN query for the hits that need their
+    chunk row. results[i] answers queries[i], shaped like semantic_search;
+    filters apply to every query.
+    """
+    t0 = time.perf_counter()
+
+    vectors = embed_queries(queries)
+    hit_lists = get_vector_store().search_batch(settings.QDRANT_COLLECTION, vectors, top_k, filters)
+    scored = [_scored_chunk_ids(hits) for hits in hit_lists]
+    payloads = _batch_payloads(hit_lists)
+
+    chunk_map = _fetch_chunks(db, _batch_hydrate_ids(scored, payloads, hydrate))
+    texts = chunk_texts(db, chunk_map.values())
+    results = [
+        {"query": q, "results": _build_results(s, chunk_map, texts, payloads)} for q, s in zip(queries, scored)
+    ]
+
+    retrieval_ms = (time.perf_counter() - t0) * 1000.0
+    return {"top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
+
+
+async def semantic_search_batch_async(
+    db: AsyncSession, queries: list[str], top_k: int = 5, hydrate: bool = False, filters: SearchFilter | None = None
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+
+    vectors = await embed_queries_async(queries)
+    hit_lists = await get_vector_store().search_batch_async(settings.QDRANT_COLLECTION, vectors, top_k, filters)
+    scored = [_scored_chunk_ids(hits) for hits in hit_lists]
+    payloads = _batch_payloads(hit_lists)
+
+    chunk_map = await _fetch_chunks_async(db, _batch_hydrate_ids(scored, payloads, hydrate))
+    texts = await chunk_texts_async(db, chunk_map.values())
+    results = [
+        {"query": q, "results": _build_results(s, chunk_map, texts, payloads)} for q, s in zip(queries, scored)
+    ]
+
+    retrieval_ms = (time.perf_counter() - t0) * 1000.0
+    return {"top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
+
+
+def _filter_conditions(filters: SearchFilter | None) -> list:
+    # SQL form of a SearchFilter for the lexical paths (needs Document joined).
+    if filters is None:
+        return []
+    conditions = []
+    if filters.document_ids is not None:
+        conditions.append(Chunk.document_id.in_(filters.document_ids))
+    if filters.content_type is not None:
+        conditions.append(Document.content_type == filters.content_type)
+    if filters.filename_prefix:
+        conditions.append(Document.filename.startswith(filters.filename_prefix, autoescape=True))
+    if filters.created_from is not None:
+        conditions.append(Document.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        conditions.append(Document.created_at < filters.created_to)
+    return conditions
+
+
+def _filtered(stmt, filters: SearchFilter | None):
+    conditions = _filter_conditions(filters)
+    if not conditions:
+        return stmt
+    return stmt.join(Document, Document.id == Chunk.document_id).where(*conditions)
+
+
+def _keyword_stmt(
+    query: str, top_k: int, collection: str, entity: Any = Chunk, filters: SearchFilter | None = None
+):
+    # Matches and ranks on the stored, GIN-indexed Chunk.search_vector, over
+    # the serving collection's rows only (a rebuild writes its own next to them).
+    qry = tsquery_sql(query)
+    rank = func.ts_rank(Chunk.search_vector, qry).label("rank")
+    stmt = select(entity, rank).where(Chunk.collection == collection, Chunk.search_vector.op("@@")(qry))
+    return _filtered(stmt, filters).order_by(rank.desc(), Chunk.id).limit(top_k)
+
+
+def _allowed_stmt(filters: SearchFilter | None):
+    # Chunk ids a filtered BM25 search may return (None: no filter).
+    if not _filter_conditions(filters):
+        return None
+    return _filtered(select(Chunk.id), filters)
+
+
+def _bm25_filtered(db: Session, query: str, top_k: int, filters: SearchFilter | None) -> list[tuple[int, float]]:
+    stmt = _allowed_stmt(filters)
+    allowed = None if stmt is None else db.execute(stmt).scalars().all()
+    return bm25_search(query, top_k, allowed)
+
+
+async def _bm25_filtered_async(
+    db: AsyncSession, query: str, top_k: int, filters: SearchFilter | None
+) -> list[tuple[int, float]]:
+    stmt = _allowed_stmt(filters)
+    allowed = None if stmt is None else (await db.execute(stmt)).scalars().all()
+    return await asyncio.to_thread(bm25_search, query, top_k, allowed)
+
+
+def keyword_search(db: Session, query: str, top_k: int = 5, filters: SearchFilter | None = None) -> dict[str, Any]:
+    """
+    Postgres full-text search over chunks (plainto_tsquery + ts_rank against the
+    stored tsvector), or the in-process BM25 index with LEXICAL_BACKEND=bm25.
+    Same response shape as semantic_search. filters join documents in SQL; BM25
+    first loads the matching chunk ids and scores only those.
+    """
+    t0 = time.perf_counter()
+
+    if bm25_enabled():
+        scored_chunk_ids = _bm25_filtered(db, query, top_k, filters)
+        chunk_map = _fetch_chunks(db, [cid for cid, _ in scored_chunk_ids])
+    else:
+        rows = db.execute(_keyword_stmt(query, top_k, serving_collection(), filters=filters)).all()
+        scored_chunk_ids = [(ch.id, float(r)) for ch, r in rows]
+        chunk_map = {ch.id: ch for ch, _ in rows}
+    results = _build_results(scored_chunk_ids, chunk_map, chunk_texts(db, chunk_map.values()))
+
+    retrieval_ms = (time.perf_counter() - t0) * 1000.0
+    return {"query": query, "top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
+
+
+async def keyword_search_async(
+    db: AsyncSession, query: str, top_k: int = 5, filters: SearchFilter | None = None
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+
+    if bm25_enabled():
+        scored_chunk_ids = await _bm25_filtered_async(db, query, top_k, filters)
+        chunk_map = await _fetch_chunks_async(db, [cid for cid, _ in scored_chunk_ids])
+    else:
+        collection = await asyncio.to_thread(serving_collection)
+        rows = (await db.execute(_keyword_stmt(query, top_k, collection, filters=filters))).all()
+        scored_chunk_ids = [(ch.id, float(r)) for ch, r in rows]
+        chunk_map = {ch.id: ch for ch, _ in rows}
+    texts = await chunk_texts_async(db, chunk_map.values())
+    results = _build_results(scored_chunk_ids, chunk_map, texts)
 
     retrieval_ms = (time.perf_counter() - t0) * 1000.0
-    return {"query": query, "top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
\ No newline at end of file
+    return {"query": query, "top_k": top_k, "retrieval_ms": retrieval_ms, "results": results}
+
+
+def rrf_fuse(rankings: list[list[int]], k: int = 60) -> list[tuple[int, float]]:
+    """
+    Reciprocal rank fusion: each ranking (best first) adds 1 / (k + rank) to
+    an id's score. Returns (id, score), best first; ties keep first-seen order.
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def _ms_since(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def _vector_leg(query: str, limit: int, filters: SearchFilter | None) -> tuple[list[tuple[int, float]], float]:
+    t0 = time.perf_counter()
+    hits = get_vector_store().search(settings.QDRANT_COLLECTION, embed_query(query), limit, filters)
+    return _scored_chunk_ids(hits), _ms_since(t0)
+
+
+async def _vector_leg_async(
+    query: str, limit: int, filters: SearchFilter | None
+) -> tuple[list[tuple[int, float]], float]:
+    t0 = time.perf_counter()
+    vec = await embed_query_async(query)
+    hits = await get_vector_store().search_async(settings.QDRANT_COLLECTION, vec, limit, filters)
+    return _scored_chunk_ids(hits), _ms_since(t0)
+
+
+def _keyword_leg(
+    db: Session, query: str, limit: int, filters: SearchFilter | None
+) -> tuple[list[tuple[int, float]], float]:
+    t0 = time.perf_counter()
+    if bm25_enabled():
+        return _bm25_filtered(db, query, limit, filters), _ms_since(t0)
+    rows = db.execute(_keyword_stmt(query, limit, serving_collection(), Chunk.id, filters)).all()
+    return [(cid, float(r)) for cid, r in rows], _ms_since(t0)
+
+
+async def _keyword_leg_async(
+    db: AsyncSession, query: str, limit: int, filters: SearchFilter | None
+) -> tuple[list[tuple[int, float]], float]:
+    t0 = time.perf_counter()
+    if bm25_enabled():
+        return await _bm25_filtered_async(db, query, limit, filters), _ms_since(t0)
+    collection = await asyncio.to_thread(serving_collection)
+    rows = (await db.execute(_keyword_stmt(query, limit, collection, Chunk.id, filters))).all()
+    return [(cid, float(r)) for cid, r in rows], _ms_since(t0)
+
+
+_vector_leg_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_vector_leg_executor() -> ThreadPoolExecutor:
+    """Process-wide threads for the sync hybrid path's vector leg (shared across requests)."""
+    global _vector_leg_executor
+    if _vector_leg_executor is None:
+        with _executor_lock:
+            if _vector_leg_executor is None:
+                _vector_leg_executor = ThreadPoolExecutor(thread_name_prefix="hybrid-vector")
+    return _vector_leg_executor
+
+
+def _fuse(
+    vector_hits: list[tuple[int, float]], keyword_hits: list[tuple[int, float]], top_k: int
+) -> list[tuple[int, float]]:
+    rankings = [[cid for cid, _ in vector_hits], [cid for cid, _ in keyword_hits]]
+    return rrf_fuse(rankings, settings.HYBRID_RRF_K)[:top_k]
+
+
+def hybrid_search(db: Session, query: str, top_k: int = 5, filters: SearchFilter | None = None) -> dict[str, Any]:
+    """
+    Vector and keyword legs run concurrently (the vector leg on a helper
+    thread), each returning HYBRID_CANDIDATES ids; the rankings are merged with
+    reciprocal rank fusion and only the fused top_k rows are loaded, in one
+    query. Same response shape as semantic_search, plus per-leg latency.
+    filters apply to both legs.
+    """
+    t0 = time.perf_counter()
+    limit = max(top_k, settings.HYBRID_CANDIDATES)
+
+    vector_future = _get_vector_leg_executor().submit(_vector_leg, query, limit, filters)
+    keyword_hits, keyword_ms = _keyword_leg(db, query, limit, filters)
+    vector_hits, vector_ms = vector_future.result()
+
+    t_hydrate = time.perf_counter()
+    fused = _fuse(vector_hits, keyword_hits, top_k)
+    chunk_map = _fetch_chunks(db, [cid for cid, _ in fused])
+    results = _build_results(fused, chunk_map, chunk_texts(db, chunk_map.values()))
+    hydrate_ms = _ms_since(t_hydrate)
+
+    return {
+        "query": query,
+        "top_k": top_k,
+        "retrieval_ms": _ms_since(t0),
+        "legs_ms": {"vector": vector_ms, "keyword": keyword_ms, "hydrate": hydrate_ms},
+        "results": results,
+    }
+
+
+async def hybrid_search_async(
+    db: AsyncSession, query: str, top_k: int = 5, filters: SearchFilter | None = None
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    limit = max(top_k, settings.HYBRID_CANDIDATES)
+
+    # The vector leg never touches the session, so one AsyncSession is enough.
+    (vector_hits, vector_ms), (keyword_hits, keyword_ms) = await asyncio.gather(
+        _vector_leg_async(query, limit, filters),
+        _keyword_leg_async(db, query, limit, filters),
+    )
+
+    t_hydrate = time.perf_counter()
+    fused = _fuse(vector_hits, keyword_hits, top_k)
+    chunk_map = await _fetch_chunks_async(db, [cid for cid, _ in fused])
+    texts = await chunk_texts_async(db, chunk_map.values())
+    results = _build_results(fused, chunk_map, texts)
+    hydrate_ms = _ms_since(t_hydrate)
+
+    return {
+        "query": query,
+        "top_k": top_k,
+        "retrieval_ms": _ms_since(t0),
+        "legs_ms": {"vector": vector_ms, "keyword": keyword_ms, "hydrate": hydrate_ms},
+        "results": results,
+    }
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from app.core.embeddings import query_cache
+from app.db.session import SessionLocal, init_db
+from app.services.search import semantic_search, semantic_search_batch
+
+console = Console()
+
+EVAL_CASES_PATH = os.path.join(os.path.dirname(__file__), "eval_cases.json")
+
+
+def make_queries(n: int) -> list[str]:
+    """Eval-case queries, suffixed so every one is a distinct (uncached) query."""
+    with open(EVAL_CASES_PATH, "r", encoding="utf-8") as f:
+        base = [item["query"] for item in json.load(f)]
+    return [f"{base[i % len(base)]} {i}" for i in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-query semantic_search loop vs one semantic_search_batch call.")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    queries = make_queries(args.queries)
+    db = SessionLocal()
+    try:
+        query_cache.clear()
+        t0 = time.perf_counter()
+        for q in queries:
+            semantic_search(db, q, top_k=args.top_k)
+        loop_s = time.perf_counter() - t0
+
+        query_cache.clear()
+        t0 = time.perf_counter()
+        semantic_search_batch(db, queries, top_k=args.top_k)
+        batch_s = time.perf_counter() - t0
+    finally:
+        db.close()
+
+    table = Table(title=f"{len(queries)} queries, top_k={args.top_k}")
+    table.add_column("Path")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Queries/s", justify="right")
+    for name, secs in (("semantic_search loop", loop_s), ("semantic_search_batch", batch_s)):
+        table.add_row(name, f"{secs:.2f}", f"{len(queries) / secs:.0f}")
+    console.print(table)
+    console.print(f"speedup: {loop_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
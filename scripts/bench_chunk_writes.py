@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import event
+
+from app.core.chunking import chunk_text
+from app.core.config import settings
+from app.db.models import Chunk, Document
+from app.db.session import SessionLocal, engine, init_db
+from app.services.indexing import _persist_batch, _point_id
+
+console = Console()
+
+
+def _per_row_flush(db, document_id: int, batch: list) -> None:
+    """The previous write path: one INSERT round trip per new chunk."""
+    for ch in batch:
+        row = Chunk(
+            document_id=document_id,
+            chunk_index=ch.chunk_index,
+            text=ch.text,
+            char_start=ch.char_start,
+            char_end=ch.char_end,
+            token_count_est=ch.token_count_est,
+            qdrant_point_id=None,
+        )
+        db.add(row)
+        db.flush()
+        row.qdrant_point_id = _point_id(document_id, ch.chunk_index)
+
+
+def _bulk_upsert(db, document_id: int, batch: list) -> None:
+    _persist_batch(db, document_id, batch, incremental=False, store=None, target="")
+
+
+def run(name: str, write, chunks: list, batch_size: int, latency_ms: float) -> tuple[str, int, float]:
+    statements = 0
+
+    def on_execute(*_args) -> None:
+        nonlocal statements
+        statements += 1
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)  # simulated network round trip
+
+    db = SessionLocal()
+    doc = Document(
+        filename="bench_chunk_writes.txt",
+        content_type="text/plain",
+        sha256=uuid.uuid4().hex + uuid.uuid4().hex,
+        extracted_text="",
+    )
+    db.add(doc)
+    db.commit()
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    t0 = time.perf_counter()
+    try:
+        for i in range(0, len(chunks), batch_size):
+            write(db, doc.id, chunks[i : i + batch_size])
+            db.commit()
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        event.remove(engine, "before_cursor_execute", on_execute)
+        db.delete(doc)
+        db.commit()
+        db.close()
+    return name, statements, elapsed_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Round trips / time to persist chunk rows: per-row flush vs bulk upsert.")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=settings.INDEX_EMBED_BATCH_SIZE)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="simulated per-statement network latency (e.g. 1.0 for a remote Postgres)",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    text = " ".join(f"word{i % 997}" for i in range(args.chunks * settings.CHUNK_SIZE_CHARS // 9))
+    chunks = chunk_text(text, settings.CHUNK_SIZE_CHARS, settings.CHUNK_OVERLAP_CHARS)[: args.chunks]
+
+    table = Table(title=f"Chunk row writes: {len(chunks)} chunks, batch={args.batch_size}, +{args.latency_ms}ms/stmt")
+    table.add_column("Write path")
+    table.add_column("Statements", justify="right")
+    table.add_column("Time (ms)", justify="right")
+    table.add_column("Chunks/s", justify="right")
+
+    for name, write in (("per-row flush (before)", _per_row_flush), ("bulk upsert (after)", _bulk_upsert)):
+        name, statements, ms = run(name, write, chunks, args.batch_size, args.latency_ms)
+        table.add_row(name, str(statements), f"{ms:.0f}", f"{len(chunks) / (ms / 1000.0):.0f}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
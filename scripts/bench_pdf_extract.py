@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from app.core.pdf_extract import extract_pdf_pages, shutdown_pdf_pool
+
+console = Console()
+
+
+def write_sample_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """
+    Hand-rolled multi-page text PDF (Helvetica, one content stream per page),
+    so the benchmark needs nothing beyond pypdf.
+    """
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids: list[int] = []
+    for p in range(pages):
+        lines = [
+            f"Page {p + 1} line {i + 1}: semantic document search benchmark text."
+            for i in range(lines_per_page)
+        ]
+        body = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        pages,
+    )
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for i, obj in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (i, obj))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for off in offsets:
+            f.write(b"%010d 00000 n \n" % off)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def bench(path: str, workers: int) -> tuple[float, int, int]:
+    t0 = time.perf_counter()
+    with open(path, "rb") as f:
+        pages = extract_pdf_pages(f, workers=workers)
+    return (time.perf_counter() - t0) * 1000.0, len(pages), sum(len(p) for p in pages)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel PDF page extraction.")
+    parser.add_argument("--pdf", help="local PDF to benchmark (default: generate one)")
+    parser.add_argument("--pages", type=int, default=600, help="pages in the generated PDF")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.pdf
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "bench.pdf")
+        write_sample_pdf(path, args.pages)
+
+    table = Table(title=f"PDF extraction: {os.path.basename(path)} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    table.add_column("Workers", justify="right")
+    table.add_column("Pages", justify="right")
+    table.add_column("Chars", justify="right")
+    table.add_column("Time (ms)", justify="right")
+    table.add_column("Speedup", justify="right")
+
+    try:
+        baseline = None
+        for workers in args.workers:
+            if workers > 1:
+                bench(path, workers)  # warm up the pool (spawn + imports)
+            ms, n_pages, n_chars = bench(path, workers)
+            baseline = baseline or ms
+            table.add_row(str(workers), str(n_pages), str(n_chars), f"{ms:.0f}", f"{baseline / ms:.2f}x")
+            # The pool is sized on first use; rebuild it for the next worker count.
+            shutdown_pdf_pool()
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
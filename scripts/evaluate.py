@@ -3,6 +3,8 @@ from __future__ import annotations
 import json
 import os
 import statistics
+import tempfile
+import time
 from dataclasses import dataclass
 from typing import Any
 
@@ -10,10 +12,16 @@ from rich.console import Console
 from rich.table import Table
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.embeddings import embed_texts
+from app.core.retrieval import serving_collection
+from app.core.vector_store import QUANTIZATION_MODES, LocalVectorStore, bytes_per_vector
 from app.db.session import SessionLocal, init_db
+from app.services.chunk_text import chunk_texts
+from app.services.embedding_cache import embed_texts_cached
 from app.services.indexing import index_status, reindex_all
-from app.services.search import keyword_baseline_search, semantic_search
-from app.db.models import Document
+from app.services.search import hybrid_search, keyword_search, semantic_search, semantic_search_batch
+from app.db.models import Chunk, Document
 
 console = Console()
 
@@ -84,36 +92,32 @@ def compute_hit_mrr_precision(db: Session, results: list[dict[str, Any]], expect
 
 
 def run_eval(db: Session, cases: list[EvalCase], top_k: int) -> dict[str, Any]:
-    key_hits: list[float] = []
-    sem_hits: list[float] = []
-    key_mrr: list[float] = []
-    sem_mrr: list[float] = []
-    key_prec: list[float] = []
-    sem_prec: list[float] = []
-    key_ms: list[float] = []
-    sem_ms: list[float] = []
+    """
+    Returns metric -> (keyword, semantic, hybrid) averages.
+    """
+    searches = (keyword_search, semantic_search, hybrid_search)
+    hits: list[list[float]] = [[] for _ in searches]
+    mrrs: list[list[float]] = [[] for _ in searches]
+    precs: list[list[float]] = [[] for _ in searches]
+    ms: list[list[float]] = [[] for _ in searches]
 
     for c in cases:
-        key = keyword_baseline_search(db, c.query, top_k=top_k)
-        sem = semantic_search(db, c.query, top_k=top_k)
-
-        key_h, key_r, key_p, _ = compute_hit_mrr_precision(db, key["results"], c.expected_source, top_k)
-        sem_h, sem_r, sem_p, _ = compute_hit_mrr_precision(db, sem["results"], c.expected_source, top_k)
+        for i, search in enumerate(searches):
+            res = search(db, c.query, top_k=top_k)
+            h, r, p, _ = compute_hit_mrr_precision(db, res["results"], c.expected_source, top_k)
+            hits[i].append(h)
+            mrrs[i].append(r)
+            precs[i].append(p)
+            ms[i].append(float(res["retrieval_ms"]))
 
-        key_hits.append(key_h)
-        sem_hits.append(sem_h)
-        key_mrr.append(key_r)
-        sem_mrr.append(sem_r)
-        key_prec.append(key_p)
-        sem_prec.append(sem_p)
-        key_ms.append(float(key["retrieval_ms"]))
-        sem_ms.append(float(sem["retrieval_ms"]))
+    def means(values: list[list[float]]) -> tuple[float, ...]:
+        return tuple(statistics.mean(v) for v in values)
 
     return {
-        "hit@k": (statistics.mean(key_hits), statistics.mean(sem_hits)),
-        "mrr": (statistics.mean(key_mrr), statistics.mean(sem_mrr)),
-        "precision@k": (statistics.mean(key_prec), statistics.mean(sem_prec)),
-        "retrieval_ms_avg": (statistics.mean(key_ms), statistics.mean(sem_ms)),
+        "hit@k": means(hits),
+        "mrr": means(mrrs),
+        "precision@k": means(precs),
+        "retrieval_ms_avg": means(ms),
     }
 
 
@@ -133,28 +137,89 @@ def run_tuning(db: Session, cases: list[EvalCase], top_k: int) -> list[dict[str,
     for cfg in configs:
         k = cfg["top_k"]
         irrels: list[int] = []
-        for c in cases:
-            sem = semantic_search(db, c.query, top_k=k)
+        batch = semantic_search_batch(db, [c.query for c in cases], top_k=k)
+        for c, sem in zip(cases, batch["results"]):
             _hit, _mrr, _prec, irr = compute_hit_mrr_precision(db, sem["results"], c.expected_source, k)
             irrels.append(irr)
         rows.append({"top_k": k, "avg_irrelevant@k": statistics.mean(irrels)})
     return rows
 
 
+def run_quantization_report(db: Session, cases: list[EvalCase], top_k: int) -> list[dict[str, Any]]:
+    """
+    Recall vs memory for each quantization mode, measured on the real corpus.
+
+    Every mode is built in a throwaway local store from the same chunk vectors
+    (served from the embedding cache) and compared against exact float32 top-k.
+    """
+    chunks = db.query(Chunk).filter(Chunk.collection == serving_collection()).order_by(Chunk.id).all()
+    if not chunks:
+        return []
+
+    texts = chunk_texts(db, chunks)
+    ids = [str(c.id) for c in chunks]
+    vectors, _hits, _misses = embed_texts_cached(db, [texts[c.id] for c in chunks])
+    db.commit()
+    queries = embed_texts([c.query for c in cases])
+    dim = int(vectors.shape[1])
+    payloads = [{"chunk_id": int(i)} for i in ids]
+
+    def build(tmp: str, mode: str, rescore: bool) -> LocalVectorStore:
+        store = LocalVectorStore(
+            os.path.join(tmp, f"{mode}_{rescore}"),
+            quantization=mode,
+            rescore=rescore,
+            oversampling=settings.QUANTIZATION_OVERSAMPLING,
+        )
+        store.create_collection("eval", dim)
+        store.upsert("eval", ids, vectors, payloads)
+        return store
+
+    out: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = build(tmp, "none", True)
+        truth = [{h.id for h in exact.search("eval", q, top_k)} for q in queries]
+
+        for mode in QUANTIZATION_MODES:
+            for rescore in ([True] if mode == "none" else [True, False]):
+                store = build(tmp, mode, rescore)
+                recalls: list[float] = []
+                times: list[float] = []
+                for q, expected in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    got = {h.id for h in store.search("eval", q, top_k)}
+                    times.append((time.perf_counter() - t0) * 1000.0)
+                    recalls.append(len(got & expected) / float(len(expected) or 1))
+                out.append(
+                    {
+                        "mode": mode,
+                        "rescore": rescore,
+                        "recall@k": statistics.mean(recalls),
+                        "bytes_per_vector": bytes_per_vector(mode, dim),
+                        "ram_mb": bytes_per_vector(mode, dim) * len(ids) / (1024 * 1024),
+                        "search_ms_avg": statistics.mean(times),
+                    }
+                )
+    return out
+
+
 def render_main_table(metrics: dict[str, Any], k: int) -> None:
     table = Table(title=f"DocuSearch Evaluation (k={k})")
     table.add_column("Metric")
     table.add_column("Keyword baseline")
     table.add_column("Semantic (vector)")
+    table.add_column("Hybrid (RRF)")
     table.add_column("Δ (semantic - keyword)")
+    table.add_column("Δ (hybrid - semantic)")
 
-    for m, (kv, sv) in metrics.items():
-        delta = sv - kv
+    for m, (kv, sv, hv) in metrics.items():
         table.add_row(
             m,
             f"{kv:.3f}",
             f"{sv:.3f}",
-            f"{delta:+.3f}",
+            f"{hv:.3f}",
+            f"{sv - kv:+.3f}",
+            f"{hv - sv:+.3f}",
         )
 
     console.print(table)
@@ -171,6 +236,28 @@ def render_tuning_table(rows: list[dict[str, Any]]) -> None:
     console.print(table)
 
 
+def render_quantization_table(rows: list[dict[str, Any]], k: int) -> None:
+    table = Table(title=f"Quantization: recall@{k} vs memory (local store, vs exact float32)")
+    table.add_column("mode")
+    table.add_column("rescore")
+    table.add_column(f"recall@{k}")
+    table.add_column("bytes/vector")
+    table.add_column("vector RAM (MB)")
+    table.add_column("search_ms_avg")
+
+    for r in rows:
+        table.add_row(
+            r["mode"],
+            "yes" if r["rescore"] else "no",
+            f"{r['recall@k']:.3f}",
+            str(r["bytes_per_vector"]),
+            f"{r['ram_mb']:.2f}",
+            f"{r['search_ms_avg']:.2f}",
+        )
+
+    console.print(table)
+
+
 def main() -> None:
     init_db()
     db: Session = SessionLocal()
@@ -190,6 +277,9 @@ def main() -> None:
     tuning_rows = run_tuning(db, cases, top_k=top_k)
     render_tuning_table(tuning_rows)
 
+    quant_rows = run_quantization_report(db, cases, top_k=top_k)
+    render_quantization_table(quant_rows, k=top_k)
+
     console.print("\nNotes:")
     console.print("- This evaluation uses a transparent document-level oracle for relevance (expected_source per query).")
     console.print("- Relevance is determined by matching retrieved document filenames against labeled sources in eval_cases.json.")
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+from rich import print
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, init_db
+from app.services.indexing import reindex_all
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reindex every document (bulk mode with --workers > 1).")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 2),
+        help="embedding worker processes, one model each (default: half the cores)",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    db: Session = SessionLocal()
+    try:
+        print(f"[cyan]Reindexing (mode={args.mode}, workers={args.workers})...[/cyan]")
+        print(reindex_all(db, mode=args.mode, workers=args.workers))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+
+from rich.console import Console
+from rich.table import Table
+
+from app.core.config import settings
+from app.core.embeddings import count_tokens, model_max_tokens
+from app.core.retrieval import serving_collection
+from app.db.models import Chunk, Document
+from app.db.session import SessionLocal, init_db
+from app.services.chunk_text import chunk_texts
+from app.services.indexing import document_chunks
+
+console = Console()
+
+_BATCH = 512
+
+
+def _overflow_stats(token_counts: list[int], limit: int) -> dict:
+    over = [n for n in token_counts if n > limit]
+    return {
+        "chunks": len(token_counts),
+        "over_limit": len(over),
+        "pct_over": (100.0 * len(over) / len(token_counts)) if token_counts else 0.0,
+        "tokens_dropped": sum(n - limit for n in over),
+        "max_tokens": max(token_counts, default=0),
+    }
+
+
+def stored_chunks_report(limit: int) -> dict:
+    """Token counts of the serving collection's chunk rows."""
+    counts: list[int] = []
+    db = SessionLocal()
+    try:
+        batch: list[Chunk] = []
+        for chunk in db.query(Chunk).filter(Chunk.collection == serving_collection()).yield_per(_BATCH):
+            batch.append(chunk)
+            if len(batch) >= _BATCH:
+                counts.extend(count_tokens(list(chunk_texts(db, batch).values())) or [])
+                batch = []
+        if batch:
+            counts.extend(count_tokens(list(chunk_texts(db, batch).values())) or [])
+    finally:
+        db.close()
+    return _overflow_stats(counts, limit)
+
+
+def rechunk_report(mode: str, limit: int) -> dict:
+    """Token counts if every document were re-chunked with CHUNKING_MODE=mode."""
+    counts: list[int] = []
+    previous = settings.CHUNKING_MODE
+    settings.CHUNKING_MODE = mode
+    db = SessionLocal()
+    try:
+        for (text,) in db.query(Document.extracted_text).yield_per(64):
+            chunks = [ch.text for ch in document_chunks(text or "")]
+            for i in range(0, len(chunks), _BATCH):
+                counts.extend(count_tokens(chunks[i : i + _BATCH]) or [])
+    finally:
+        settings.CHUNKING_MODE = previous
+        db.close()
+    return _overflow_stats(counts, limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="How many chunks exceed the embedding model's token limit (and get truncated)."
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="*",
+        default=["fixed", "cdc", "tokens"],
+        help="also re-chunk the corpus with these CHUNKING_MODEs and compare",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    limit = model_max_tokens()
+
+    table = Table(title=f"Chunks over the {settings.EMBEDDING_MODEL_NAME} limit ({limit} content tokens)")
+    table.add_column("Chunks")
+    table.add_column("Total", justify="right")
+    table.add_column("Over limit", justify="right")
+    table.add_column("% over", justify="right")
+    table.add_column("Tokens truncated", justify="right")
+    table.add_column("Max tokens", justify="right")
+
+    rows = [("stored (today)", stored_chunks_report(limit))]
+    rows += [(f"re-chunked: {mode}", rechunk_report(mode, limit)) for mode in args.modes]
+    for name, r in rows:
+        table.add_row(
+            name,
+            str(r["chunks"]),
+            str(r["over_limit"]),
+            f"{r['pct_over']:.1f}%",
+            str(r["tokens_dropped"]),
+            str(r["max_tokens"]),
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
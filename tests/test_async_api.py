@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core import retrieval
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.models import Base, Document
+from app.main import app
+from app.services import indexing, search
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    async def fake_embed_query_async(text):
+        return np.ones(4, dtype=np.float32)
+
+    async def fake_embed_queries_async(texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", None)
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_STORE_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(retrieval, "_store", None)
+    monkeypatch.setattr(retrieval, "_serving", None)
+    monkeypatch.setattr(db_session, "_async_engine", None)
+    monkeypatch.setattr(db_session, "_AsyncSessionLocal", None)
+    monkeypatch.setattr(indexing, "embed_texts", lambda texts: np.ones((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(indexing, "embedding_dim", lambda: 4)
+    monkeypatch.setattr(indexing, "count_tokens", lambda texts: None)
+    monkeypatch.setattr(search, "embed_query_async", fake_embed_query_async)
+    monkeypatch.setattr(search, "embed_queries_async", fake_embed_queries_async)
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text="red apple pie"))
+        db.commit()
+        indexing.index_document(db, 1)
+
+    yield TestClient(app)
+    asyncio.run(db_session.dispose_async_engine())
+
+
+def test_async_engine_url_gets_an_async_driver(monkeypatch):
+    monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", None)
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:////data/app.db")
+    assert db_session._async_database_url() == "sqlite+aiosqlite:////data/app.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://u:p@db/x")
+    assert db_session._async_database_url() == "postgresql+psycopg://u:p@db/x"
+
+
+def test_search_endpoint_on_sqlite(client):
+    for hydrate in ("false", "true"):
+        res = client.get("/search", params={"q": "apple", "hydrate": hydrate})
+        assert res.status_code == 200, res.text
+        (hit,) = res.json()["results"]
+        assert hit["document_id"] == 1 and "apple" in hit["snippet"]
+
+    res = client.post("/search/batch", json={"queries": ["apple", "pie"], "hydrate": True})
+    assert res.status_code == 200, res.text
+    assert [len(r["results"]) for r in res.json()["results"]] == [1, 1]
+
+
+def test_qa_endpoint_on_sqlite(client):
+    res = client.post("/qa", json={"question": "what kind of pie?"})
+    assert res.status_code == 200, res.text
+    assert [s["document_id"] for s in res.json()["sources"]] == [1]
@@ -0,0 +1,127 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from app.core.bm25 import BM25Index, tokenize
+
+
+def _corpus(n: int, seed: int = 0) -> dict[int, str]:
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(300)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]  # Zipf-ish
+    return {cid: " ".join(rng.choices(vocab, weights, k=rng.randint(3, 60))) for cid in range(1, n + 1)}
+
+
+def _reference(index: BM25Index, docs: dict[int, str], query: str, k: int) -> list[tuple[int, float]]:
+    # Textbook BM25; N and df count every doc number the index has assigned (dead included).
+    n = index._n_docs
+    toks = {cid: tokenize(t) for cid, t in docs.items()}
+    avgdl = sum(len(t) for t in toks.values()) / len(toks)
+    out = []
+    for cid, tk in toks.items():
+        tf = Counter(tk)
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            if term in tf:
+                df = index._sizes[index._terms[term]]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf[term] * 2.2 / (tf[term] + 1.2 * (0.25 + 0.75 * len(tk) / avgdl))
+        if score > 0:
+            out.append((cid, score))
+    return sorted(out, key=lambda x: (-x[1], x[0]))[:k]
+
+
+QUERIES = ["w0", "w1 w40 w250", "w299 w3 w7 w100 w150", "the w5 and w6"]
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Quick, brown-fox is here") == ["quick", "brown", "fox", "here"]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_pruned_search_matches_exhaustive_and_reference(query):
+    docs = _corpus(2000)
+    index = BM25Index()
+    index.add_many(docs.items())
+
+    pruned = index.search(query, 10)
+    assert pruned == index.search(query, 10, prune=False)
+    expected = _reference(index, docs, query, 10)
+    assert [c for c, _ in pruned] == [c for c, _ in expected]
+    assert [s for _, s in pruned] == pytest.approx([s for _, s in expected])
+
+
+def test_replace_remove_compact_and_reload(tmp_path):
+    docs = _corpus(500, seed=1)
+    index = BM25Index()
+    index.add_many(docs.items())
+
+    docs[1] = "w299 w299 w299"
+    index.add_many([(1, docs[1])])
+    index.remove(range(100, 300))
+    for cid in range(100, 300):
+        del docs[cid]
+
+    assert len(index) == len(docs)
+    assert index.search("w299", 1)[0][0] == 1
+    assert all(cid not in range(100, 300) for cid, _ in index.search("w0 w1", 50))
+
+    index.save(str(tmp_path))  # more than a quarter dead: compacted first
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert loaded is not None and len(loaded) == len(docs)
+    assert loaded.dead_fraction() == 0.0
+    for q in QUERIES:
+        # Compaction drops dead postings from df, so compare against the reference.
+        assert [c for c, _ in loaded.search(q, 10)] == [c for c, _ in _reference(loaded, docs, q, 10)]
+
+    loaded.add_many([(10_000, "w123 brand new")])
+    assert loaded.search("brand", 1)[0][0] == 10_000
+
+
+def test_load_missing_snapshot_returns_none(tmp_path):
+    assert BM25Index.load(str(tmp_path / "nope")) is None
+
+
+def test_process_index_follows_writes_made_elsewhere(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.config import settings
+    from app.db.models import Base, Chunk, Document
+    from app.services import lexical
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'bm25.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(tmp_path / "bm25"))
+    monkeypatch.setattr(settings, "BM25_RELOAD_CHECK_S", 0.0)
+    monkeypatch.setattr(lexical, "SessionLocal", Session)
+    monkeypatch.setattr(lexical, "serving_collection", lambda: "c")
+    monkeypatch.setattr(lexical, "_index", None)
+
+    def add_chunk(db, index: int, text: str) -> None:
+        db.add(
+            Chunk(collection="c", document_id=1, chunk_index=index, text=text, char_start=0, char_end=1, token_count_est=1)
+        )
+        db.commit()
+
+    def found(word: str) -> bool:
+        return bool(lexical.get_bm25_index().search(word, 5))
+
+    with Session() as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text=""))
+        add_chunk(db, 0, "red apple")
+        assert found("apple")
+
+        # Another process indexed a chunk: the row count moved.
+        add_chunk(db, 1, "yellow banana")
+        assert found("banana")
+
+        # Another process re-indexed in place (same count) and saved its snapshot.
+        db.query(Chunk).filter_by(chunk_index=1).update({"text": "green pear"})
+        db.commit()
+        lexical.build_bm25_index(db, "c").save(lexical._snapshot_path("c"))
+        assert found("pear") and not found("banana")
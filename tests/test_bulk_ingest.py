@@ -0,0 +1,78 @@
+import io
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Document, IngestionLog
+from app.services.ingestion import BulkItem, ingest_batch, sha256_bytes
+
+
+def _item(name: str, text: str) -> BulkItem:
+    data = text.encode("utf-8")
+    return BulkItem(name, "text/plain", io.BytesIO(data), sha256_bytes(data))
+
+
+def test_ingest_batch_dedups_and_uses_few_statements():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    with Session(engine) as db:
+        first = ingest_batch(db, [_item("a.txt", "alpha"), _item("b.txt", "beta")])
+        statements.clear()
+        second = ingest_batch(
+            db,
+            [_item(f"n{i}.txt", f"new {i}") for i in range(20)]
+            + [_item("a-again.txt", "alpha"), _item("n0-again.txt", "new 0")],
+        )
+
+        assert [r["created"] for r in first] == [True, True]
+        assert second[20]["created"] is False
+        assert second[20]["document_id"] == first[0]["document_id"]
+        assert second[21]["document_id"] == second[0]["document_id"]
+        assert sum(r["created"] for r in second) == 20
+
+        # dedup SELECT + documents INSERT + log INSERT, regardless of batch size
+        assert len(statements) <= 4
+        assert db.query(Document).count() == 22
+        assert db.query(IngestionLog).filter(IngestionLog.event == "DEDUP").count() == 2
+
+
+def test_ndjson_reports_bad_lines_and_still_queues_the_good_ones(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api.routers import documents
+    from app.core.config import settings
+    from app.db.session import get_db
+    from app.main import app
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    queued = []
+
+    class _Job:
+        id = 7
+
+    def fake_submit_job(db, kind, params):
+        queued.append(params["document_ids"])
+        return _Job()
+
+    def session():
+        with Session(engine) as db:
+            yield db
+
+    monkeypatch.setattr(settings, "BULK_INGEST_BATCH_SIZE", 1)
+    monkeypatch.setattr(documents, "submit_job", fake_submit_job)
+    monkeypatch.setitem(app.dependency_overrides, get_db, session)
+    body = b'{"text": "alpha"}\n{not json\n{"filename": "x.txt"}\n\n{"text": "beta"}'
+    # Split mid-line so lines span stream chunks.
+    res = TestClient(app).post("/documents/bulk/ndjson?index=true", content=iter([body[:7], body[7:30], body[30:]]))
+
+    assert res.status_code == 200, res.text
+    out = res.json()
+    assert out["created"] == 2 and out["index_job_id"] == 7
+    assert [e["line"] for e in out["errors"]] == [2, 3]
+    assert queued == [[d["document_id"] for d in out["documents"]]]
+    with Session(engine) as db:
+        assert sorted(d.extracted_text for d in db.query(Document)) == ["alpha", "beta"]
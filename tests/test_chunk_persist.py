@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.chunking import chunk_text
+from app.db.models import Base, Chunk, Document
+from app.services.indexing import _persist_batch, _point_id
+
+
+class _AllLive:
+    def existing_ids(self, collection, ids):
+        return set(ids)
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text=""))
+    db.commit()
+    return db
+
+
+def test_bulk_upsert_inserts_then_updates_in_place():
+    db = _session()
+    chunks = chunk_text("alpha " * 400, 300, 50)
+
+    rows, unchanged = _persist_batch(db, 1, chunks, False, None, "c")
+    db.commit()
+    assert unchanged == 0
+    assert [r.chunk_index for r in rows] == [c.chunk_index for c in chunks]
+    assert all(r.qdrant_point_id == _point_id(1, r.chunk_index) for r in rows)
+    ids = {r.chunk_index: r.id for r in rows}
+
+    edited = chunk_text("beta " * 400, 300, 50)
+    rows, _ = _persist_batch(db, 1, edited, False, None, "c")
+    db.commit()
+    # Same (document_id, chunk_index) -> same row id, new text.
+    assert {r.chunk_index: r.id for r in rows if r.chunk_index in ids} == {
+        i: ids[i] for i in ids if i < len(edited)
+    }
+    assert db.get(Chunk, rows[0].id).text.startswith("beta")
+
+
+def test_incremental_skips_unchanged_chunks():
+    db = _session()
+    chunks = chunk_text("alpha " * 400, 300, 50)
+    _persist_batch(db, 1, chunks, False, None, "c")
+    db.commit()
+
+    rows, unchanged = _persist_batch(db, 1, chunks, True, _AllLive(), "c")
+    assert rows == []
+    assert unchanged == len(chunks)
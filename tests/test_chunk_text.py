@@ -0,0 +1,74 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.chunking import chunk_text
+from app.db.models import Base, Chunk, Document
+from app.services.chunk_text import DocumentTextCache, chunk_text_sql, chunk_texts, document_text_cache
+
+
+def test_document_cache_is_bounded_by_chars():
+    cache = DocumentTextCache(max_chars=10)
+    cache.put(1, "aaaa")
+    cache.put(2, "bbbb")
+    assert cache.get(1) == "aaaa"  # 1 is now most recent
+    cache.put(3, "cccc")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "aaaa"
+    cache.put(4, "x" * 11)  # larger than the whole cache: not stored
+    assert cache.get(4) is None
+    assert cache.stats()["chars"] <= 10
+
+
+def test_offsets_rows_resolve_to_the_same_text_as_full_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    raw = "Line one\r\nline two  \r\n\r\n" + "words and more words " * 200
+    pieces = chunk_text(raw, 300, 50)
+
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text=raw))
+        for p in pieces:
+            db.add(
+                Chunk(
+                    document_id=1,
+                    chunk_index=p.chunk_index,
+                    text=None,
+                    char_start=p.char_start,
+                    char_end=p.char_end,
+                    token_count_est=p.token_count_est,
+                )
+            )
+        db.commit()
+        document_text_cache.invalidate(1)
+
+        rows = db.query(Chunk).order_by(Chunk.chunk_index).all()
+        texts = chunk_texts(db, rows)
+        assert [texts[r.id] for r in rows] == [p.text for p in pieces]
+
+        # The SQL form (used by keyword search) slices the same span.
+        sql_texts = db.execute(
+            select(chunk_text_sql()).join(Document, Document.id == Chunk.document_id).order_by(Chunk.chunk_index)
+        ).scalars()
+        assert [t.strip() for t in sql_texts] == [p.text for p in pieces]
+
+
+def test_each_document_is_looked_up_once_and_survives_eviction(monkeypatch):
+    from app.services import chunk_text as chunk_text_module
+
+    class EvictOnRead(DocumentTextCache):
+        def get(self, document_id):
+            text = super().get(document_id)
+            self.invalidate(document_id)  # e.g. evicted by a concurrent put
+            return text
+
+    cache = EvictOnRead(max_chars=1000)
+    monkeypatch.setattr(chunk_text_module, "document_text_cache", cache)
+    cache.put(1, "alpha beta gamma")
+    rows = [
+        Chunk(id=i, document_id=1, chunk_index=i, text=None, char_start=s, char_end=e, token_count_est=1)
+        for i, (s, e) in enumerate([(0, 5), (6, 10), (11, 16)])
+    ]
+
+    assert chunk_texts(None, rows) == {0: "alpha", 1: "beta", 2: "gamma"}
+    assert (cache.hits, cache.misses) == (1, 0)
@@ -9,4 +9,79 @@ def test_chunking_is_deterministic():
 
     assert a == b
     assert len(a) > 1
-    assert a[0].char_start == 0
\ No newline at end of file
+    assert a[0].char_start == 0
+
+
+def _prose(sentences: int) -> str:
+    words = ["search", "vector", "index", "chunk", "query", "model", "document", "token", "score"]
+    return " ".join(
+        " ".join(words[(i * 7 + j * 3) % len(words)] + str((i + j) % 13) for j in range(5 + i % 11)) + "."
+        for i in range(sentences)
+    )
+
+
+def test_cdc_chunks_are_deterministic_and_bounded():
+    from app.core.chunking import iter_chunks_cdc
+
+    text = _prose(600)
+    a = list(iter_chunks_cdc(text, min_chars=200, avg_chars=500, max_chars=800))
+    b = list(iter_chunks_cdc(text, min_chars=200, avg_chars=500, max_chars=800))
+
+    assert a == b
+    assert len(a) > 5
+    assert all(c.char_end - c.char_start <= 800 for c in a)
+    assert all(c.char_end - c.char_start >= 200 for c in a[:-1])
+    # Non-overlapping and gap-free
+    assert all(x.char_end == y.char_start for x, y in zip(a, a[1:]))
+
+
+def test_cdc_edit_near_start_only_changes_nearby_chunks():
+    from app.core.chunking import iter_chunks_cdc
+
+    text = _prose(600)
+    edited = "A brand new opening sentence. " + text
+
+    before = {c.text for c in iter_chunks_cdc(text, 200, 500, 800)}
+    after = list(iter_chunks_cdc(edited, 200, 500, 800))
+    assert sum(c.text not in before for c in after) <= 2
+
+    # Fixed-size windows shift every later boundary instead.
+    fixed_before = {c.text for c in chunk_text(text, 800, 100)}
+    fixed_after = chunk_text(edited, 800, 100)
+    assert sum(c.text not in fixed_before for c in fixed_after) > len(fixed_after) // 2
+
+
+def _fake_tokenize(texts):
+    # Word-piece-ish: words split into <=4-char pieces, punctuation on its own.
+    import re
+
+    return [[m.span() for m in re.finditer(r"\w{1,4}|[^\w\s]", t)] for t in texts]
+
+
+def test_token_chunks_respect_budget_and_word_breaks():
+    from app.core.chunking import iter_chunks_tokens
+
+    text = _prose(400)
+    chunks = list(iter_chunks_tokens(text, _fake_tokenize, max_tokens=64, overlap_tokens=8))
+
+    assert len(chunks) > 10
+    for ch in chunks:
+        n = len(_fake_tokenize([ch.text])[0])
+        assert n == ch.token_count_est <= 64
+        assert ch.text == text[ch.char_start : ch.char_end]
+    # Cuts land between words, not inside them.
+    assert all(not text[ch.char_end : ch.char_end + 1].isalnum() for ch in chunks[:-1])
+    assert chunks[-1].char_end == len(text.rstrip())
+    # Deterministic
+    assert chunks == list(iter_chunks_tokens(text, _fake_tokenize, max_tokens=64, overlap_tokens=8))
+
+
+def test_token_chunks_cover_text_across_segments(monkeypatch):
+    import app.core.chunking as chunking
+
+    monkeypatch.setattr(chunking, "_TOKEN_SEGMENT_CHARS", 50)
+    text = _prose(50)
+    chunks = list(chunking.iter_chunks_tokens(text, _fake_tokenize, max_tokens=30, overlap_tokens=0))
+
+    tokens = sum(ch.token_count_est for ch in chunks)
+    assert tokens == len(_fake_tokenize([text])[0])
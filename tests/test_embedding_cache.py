@@ -0,0 +1,46 @@
+import threading
+
+import numpy as np
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from app.core import retrieval
+from app.core.config import settings
+from app.db.models import Base, Document, EmbeddingCache
+from app.services import indexing
+
+
+def test_reindex_reuses_cached_vectors_without_the_model(tmp_path, monkeypatch):
+    encoded: list[str] = []
+    threads: set[str] = set()
+
+    def fake_embed(texts):
+        encoded.extend(texts)
+        threads.add(threading.current_thread().name)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_STORE_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(retrieval, "_store", None)
+    monkeypatch.setattr(indexing, "embed_texts", fake_embed)
+    monkeypatch.setattr(indexing, "embedding_dim", lambda: 4)
+    monkeypatch.setattr(indexing, "count_tokens", lambda texts: None)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text="word " * 2000))
+        db.commit()
+
+        first = indexing.index_document(db, 1)
+        assert first["cache_misses"] > 0 and first["cache_hits"] == 0
+        n_encoded = len(encoded)
+        assert db.query(func.count(EmbeddingCache.id)).scalar() == n_encoded
+        # Off the query path's encode executor.
+        assert threads and all(name.startswith("index-encode") for name in threads)
+
+        second = indexing.index_document(db, 1)
+        assert second["cache_hits"] == first["chunks_indexed"]
+        assert second["cache_misses"] == 0
+        assert len(encoded) == n_encoded  # the model was not called again
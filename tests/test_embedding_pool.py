@@ -0,0 +1,17 @@
+from app.core.embedding_pool import length_sorted_batches
+
+
+def test_length_sorted_batches_cover_every_index_once():
+    texts = ["ccc", "a", "bbbbb", "dd", "", "eeee"]
+    batches = length_sorted_batches(texts, batch_size=4)
+
+    flat = [i for b in batches for i in b]
+    assert sorted(flat) == list(range(len(texts)))
+    assert [len(b) for b in batches] == [4, 2]
+    # Shortest texts batch together, so padding per batch stays small.
+    assert [len(texts[i]) for i in flat] == sorted(len(t) for t in texts)
+
+
+def test_length_sorted_batches_is_deterministic_for_ties():
+    texts = ["xx", "yy", "zz"]
+    assert length_sorted_batches(texts, 2) == [[0, 1], [2]]
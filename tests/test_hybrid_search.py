@@ -0,0 +1,48 @@
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Chunk, Document
+from app.services import search
+from app.services.search import hybrid_search, rrf_fuse
+
+
+def test_rrf_rewards_ids_ranked_by_both_legs():
+    fused = rrf_fuse([[1, 2, 3], [3, 4]], k=60)
+    ids = [cid for cid, _ in fused]
+
+    assert ids[0] == 3  # 1/63 + 1/61 beats 1/61 alone
+    assert set(ids) == {1, 2, 3, 4}
+    assert fused[0][1] == 1 / 63 + 1 / 61
+
+
+def test_hybrid_runs_legs_concurrently_and_hydrates_fused_rows(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    def vector_leg(query, limit, filters):
+        time.sleep(0.2)
+        return [(1, 0.9), (2, 0.8)], 200.0
+
+    def keyword_leg(db, query, limit, filters):
+        time.sleep(0.2)
+        return [(2, 0.5), (3, 0.4)], 200.0
+
+    monkeypatch.setattr(search, "_vector_leg", vector_leg)
+    monkeypatch.setattr(search, "_keyword_leg", keyword_leg)
+
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text="x"))
+        for i in (1, 2, 3):
+            db.add(Chunk(id=i, document_id=1, chunk_index=i, text=f"chunk {i}", char_start=0, char_end=7, token_count_est=2))
+        db.commit()
+
+        t0 = time.perf_counter()
+        res = hybrid_search(db, "q", top_k=2)
+        elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.35
+    assert [r["chunk_id"] for r in res["results"]] == [2, 1]
+    assert res["results"][0]["snippet"] == "chunk 2"
+    assert set(res["legs_ms"]) == {"vector", "keyword", "hydrate"}
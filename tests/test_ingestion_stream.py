@@ -0,0 +1,37 @@
+import hashlib
+import io
+
+from app.services.ingestion import extract_text_from_bytes, extract_text_from_file, hash_file
+
+
+class _CountingReader(io.BytesIO):
+    """Seekable upload stand-in that counts read() calls."""
+
+    reads = 0
+
+    def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return super().read(size)
+
+
+def test_hash_file_hashes_incrementally_and_rewinds(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "UPLOAD_READ_CHUNK_BYTES", 7)
+    data = ("héllo wörld\r\n" * 50).encode("utf-8")
+    fileobj = _CountingReader(data)
+
+    assert hash_file(fileobj) == hashlib.sha256(data).hexdigest()
+    assert fileobj.reads > 1
+    assert fileobj.read() == data
+
+
+def test_file_extraction_matches_bytes_extraction():
+    # Multi-byte characters land on arbitrary buffer boundaries; CRLF must survive.
+    data = ("  ünïcode ✓ line\r\n" * 5000).encode("utf-8") + b"\xff trailing  "
+    fileobj = io.BytesIO(data)
+
+    assert extract_text_from_file(fileobj, "text/plain", "a.txt") == extract_text_from_bytes(
+        data, "text/plain", "a.txt"
+    )
+    assert not fileobj.closed
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.chunking import chunk_text
+from app.core.config import settings
+from app.services import indexing
+from app.services.jobs import estimate_chunks, job_progress
+
+
+def test_estimate_matches_chunker_for_dense_text():
+    for n in (0, 1, 1200, 1201, 5000, 12345):
+        text = "x" * n
+        expected = len(chunk_text(text, settings.CHUNK_SIZE_CHARS, settings.CHUNK_OVERLAP_CHARS))
+        assert estimate_chunks(n) == expected
+
+
+def test_token_estimate_uses_the_chunkers_budget(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNKING_MODE", "tokens")
+    monkeypatch.setattr(settings, "TOKEN_CHUNK_MAX_TOKENS", None)
+    monkeypatch.setattr(settings, "TOKEN_CHUNK_OVERLAP_TOKENS", 10)
+    monkeypatch.setattr(indexing, "model_max_tokens", lambda: 510)
+
+    step = (510 - 10) * 4
+    assert estimate_chunks(step) == 1
+    assert estimate_chunks(step + 1) == 2
+
+
+def test_progress_reports_throughput_and_eta():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    out = job_progress(100, 400, start, now=start + timedelta(seconds=10))
+
+    assert out["throughput_chunks_per_s"] == 10.0
+    assert out["eta_seconds"] == 30.0
+    assert out["percent"] == 25.0
+
+
+def test_progress_before_start_and_after_finish():
+    assert job_progress(0, 10, None)["eta_seconds"] is None
+
+    start = datetime(2024, 1, 1)  # naive, as SQLite returns it
+    done = job_progress(10, 10, start, finished_at=start + timedelta(seconds=2))
+    assert done["eta_seconds"] == 0.0
+    assert done["throughput_chunks_per_s"] == 5.0
+
+
+def _job_db(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.models import Base
+    from app.services import jobs
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(jobs, "SessionLocal", factory)
+    return factory
+
+
+def test_only_one_runner_claims_a_job(tmp_path, monkeypatch):
+    from app.db.models import IndexJob
+    from app.services.jobs import WORKER_ID, _claim_job
+
+    factory = _job_db(tmp_path, monkeypatch)
+    with factory() as db:
+        db.add(IndexJob(id=1, kind="reindex", status="queued"))
+        db.commit()
+
+    with factory() as a, factory() as b:
+        assert [_claim_job(a, 1), _claim_job(b, 1)] == [True, False]
+    with factory() as db:
+        job = db.get(IndexJob, 1)
+        assert (job.status, job.worker_id) == ("running", WORKER_ID)
+
+
+def test_resume_fails_only_jobs_with_an_expired_lease(tmp_path, monkeypatch):
+    from app.db.models import IndexJob
+    from app.services import jobs
+
+    factory = _job_db(tmp_path, monkeypatch)
+    now = datetime.now(timezone.utc)
+    with factory() as db:
+        db.add(IndexJob(id=1, kind="reindex", status="running", worker_id="dead", heartbeat_at=now - timedelta(hours=1)))
+        db.add(IndexJob(id=2, kind="reindex", status="running", worker_id="sibling", heartbeat_at=now))
+        db.commit()
+
+    assert jobs.resume_jobs() == 0
+    with factory() as db:
+        assert db.get(IndexJob, 1).status == "failed"
+        assert db.get(IndexJob, 2).status == "running"
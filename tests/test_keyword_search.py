@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.db.models import Chunk
+from app.services.search import _keyword_stmt
+
+
+def test_keyword_query_uses_the_stored_tsvector():
+    sql = str(_keyword_stmt("quick fox", 5, "docusearch_chunks_v1").compile(dialect=postgresql.dialect()))
+
+    assert "chunks.search_vector @@ plainto_tsquery" in sql
+    assert "ts_rank(chunks.search_vector" in sql
+    assert "chunks.collection =" in sql
+    # No per-row parsing of chunk text at query time
+    assert "to_tsvector" not in sql
+
+
+def test_search_vector_has_a_gin_index():
+    (index,) = [ix for ix in Chunk.__table__.indexes if ix.name == "ix_chunks_search_vector"]
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert "USING gin (search_vector)" in ddl
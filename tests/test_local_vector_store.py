@@ -0,0 +1,138 @@
+import numpy as np
+
+from app.core.vector_store import LocalVectorStore, SearchFilter
+
+
+def _vec(*xs: float) -> np.ndarray:
+    return np.asarray(xs, dtype=np.float32)
+
+
+def test_search_ranks_by_cosine_and_filters_by_document(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.create_collection("c_v1", dim=3)
+    store.set_alias("c", "c_v1")
+
+    store.upsert(
+        "c",
+        ids=["a", "b", "c"],
+        vectors=np.stack([_vec(1, 0, 0), _vec(0.9, 0.1, 0), _vec(0, 1, 0)]),
+        payloads=[{"document_id": 1}, {"document_id": 2}, {"document_id": 1}],
+    )
+
+    hits = store.search("c", _vec(1, 0, 0), top_k=2)
+    assert [h.id for h in hits] == ["a", "b"]
+    assert abs(hits[0].score - 1.0) < 1e-6
+
+    hits = store.search("c", _vec(1, 0, 0), top_k=5, filters=SearchFilter(document_ids=(1,)))
+    assert [h.id for h in hits] == ["a", "c"]
+
+
+def test_state_survives_reopen_and_deletes(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.create_collection("c_v1", dim=2)
+    store.upsert("c_v1", ["a", "b"], np.stack([_vec(1, 0), _vec(0, 1)]), [{"document_id": 1}, {"document_id": 2}])
+    store.delete("c_v1", ["a"])
+    store.upsert("c_v1", ["b"], np.stack([_vec(1, 0)]), [{"document_id": 2, "chunk_id": 7}])
+
+    reopened = LocalVectorStore(str(tmp_path))
+    assert reopened.existing_ids("c_v1", ["a", "b"]) == {"b"}
+    hits = reopened.search("c_v1", _vec(1, 0), top_k=5)
+    assert [(h.id, h.payload["chunk_id"]) for h in hits] == [("b", 7)]
+
+    reopened.delete_documents_not_in("c_v1", [1])
+    assert reopened.search("c_v1", _vec(1, 0), top_k=5) == []
+
+
+def test_grows_past_initial_capacity(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.create_collection("big", dim=4)
+    n = 3000
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((n, 4)).astype(np.float32)
+    store.upsert("big", [str(i) for i in range(n)], vecs, [{"document_id": i} for i in range(n)])
+
+    hits = store.search("big", vecs[2500], top_k=1)
+    assert hits[0].id == "2500"
+
+
+def test_quantized_modes_recover_exact_top_k_with_rescoring(tmp_path):
+    rng = np.random.default_rng(1)
+    vecs = rng.standard_normal((500, 32)).astype(np.float32)
+    query = vecs[42] + 0.05 * rng.standard_normal(32).astype(np.float32)
+
+    exact = LocalVectorStore(str(tmp_path / "exact"))
+    exact.create_collection("c", dim=32)
+    exact.upsert("c", [str(i) for i in range(500)], vecs, [{"document_id": i} for i in range(500)])
+    expected = [h.id for h in exact.search("c", query, top_k=5)]
+
+    for mode in ("float16", "int8", "binary"):
+        store = LocalVectorStore(str(tmp_path / mode), quantization=mode, oversampling=20.0)
+        store.create_collection("c", dim=32)
+        store.upsert("c", [str(i) for i in range(500)], vecs, [{"document_id": i} for i in range(500)])
+        hits = store.search("c", query, top_k=5)
+        assert hits[0].id == "42", mode
+        if mode != "binary":  # 32 sign bits are too coarse to promise the full top-5
+            assert [h.id for h in hits] == expected, mode
+
+
+def test_search_batch_matches_per_query_search(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    queries = rng.standard_normal((25, 16)).astype(np.float32)
+    store = LocalVectorStore(str(tmp_path))
+    store.create_collection("c", dim=16)
+    store.upsert("c", [str(i) for i in range(300)], vectors, [{"document_id": i % 3} for i in range(300)])
+    store.delete("c", ["0", "1"])
+    # Force several query blocks
+    monkeypatch.setattr("app.core.vector_store._LocalCollection._BATCH_SCORE_FLOATS", 300 * 4)
+
+    for filters in (None, SearchFilter(document_ids=(2,))):
+        batch = store.search_batch("c", queries, top_k=5, filters=filters)
+        single = [store.search("c", q, top_k=5, filters=filters) for q in queries]
+        assert [[h.id for h in hits] for hits in batch] == [[h.id for h in hits] for hits in single]
+
+
+def test_log_is_compacted_and_deleted_slots_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.vector_store._LocalCollection._COMPACT_MIN_LINES", 10)
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((20, 8)).astype(np.float32)
+    ids = [str(i) for i in range(20)]
+    writer = LocalVectorStore(str(tmp_path))
+    writer.create_collection("c", dim=8)
+    writer.upsert("c", ids, vectors, [{"document_id": i} for i in range(20)])
+    reader = LocalVectorStore(str(tmp_path))  # another process, opened before compaction
+    assert len(reader.search("c", vectors[3], top_k=50)) == 20
+
+    for _ in range(3):  # re-upserts leave dead lines behind
+        writer.upsert("c", ids[:5], vectors[:5], [{"document_id": i} for i in range(5)])
+    writer.delete("c", ids[15:])
+    writer.upsert("c", ["new"], vectors[:1], [{"document_id": 99}])
+
+    log = (tmp_path / "c" / "points.jsonl").read_text().splitlines()
+    assert len(log) <= 20
+    assert '"slot":15' in next(line for line in log if '"id":"new"' in line)  # lowest freed slot
+
+    hits = reader.search("c", vectors[7], top_k=50)
+    assert hits[0].id == "7"
+    assert sorted(h.id for h in hits) == sorted(ids[:15] + ["new"])
+    assert LocalVectorStore(str(tmp_path)).search("c", vectors[0], top_k=2)[0].id in ("0", "new")
+
+
+def test_slot_reused_during_scoring_is_not_returned_as_the_old_point(tmp_path, monkeypatch):
+    from app.core import vector_store
+
+    store = LocalVectorStore(str(tmp_path), quantization="int8")
+    store.create_collection("c", dim=3)
+    store.upsert("c", ["a", "b"], np.stack([_vec(1, 0, 0), _vec(0, 1, 0)]), [{"document_id": 1}, {"document_id": 2}])
+    scores = vector_store.approx_scores
+
+    def write_while_scoring(*args):
+        out = scores(*args)
+        monkeypatch.setattr(vector_store, "approx_scores", scores)
+        store.delete("c", ["a"])
+        store.upsert("c", ["z"], _vec(0, 0, 1)[None], [{"document_id": 9}])  # takes a's slot
+        return out
+
+    monkeypatch.setattr(vector_store, "approx_scores", write_while_scoring)
+    hits = store.search("c", _vec(1, 0, 0), top_k=2)
+    assert [(h.id, h.payload["document_id"]) for h in hits] == [("b", 2)]
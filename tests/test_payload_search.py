@@ -0,0 +1,54 @@
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.core.vector_store import VectorHit
+from app.db.models import Base, Chunk, Document
+from app.services import search
+
+
+class _Store:
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search(self, collection, vector, top_k, filters=None):
+        return self.hits[:top_k]
+
+
+def _setup(monkeypatch, hits):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text="x"))
+        db.add(Chunk(id=7, document_id=1, chunk_index=0, text="row  text", char_start=0, char_end=8, token_count_est=2))
+        db.commit()
+    monkeypatch.setattr(search, "embed_query", lambda q: np.zeros(4, dtype=np.float32))
+    monkeypatch.setattr(search, "get_vector_store", lambda: _Store(hits))
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return engine, statements
+
+
+def test_payload_snippets_skip_postgres(monkeypatch):
+    payload = {"chunk_id": 7, "document_id": 1, "chunk_index": 0, "snippet": "from payload", "page_start": 2, "page_end": 3}
+    engine, statements = _setup(monkeypatch, [VectorHit(id="p", score=0.9, payload=payload)])
+
+    with Session(engine) as db:
+        res = search.semantic_search(db, "q", top_k=1)
+        assert statements == []
+        assert res["results"][0]["snippet"] == "from payload"
+        assert res["results"][0]["page_start"] == 2
+
+        hydrated = search.semantic_search(db, "q", top_k=1, hydrate=True)
+        assert len(statements) == 1
+        assert hydrated["results"][0]["snippet"] == "row text"
+
+
+def test_points_without_snippet_are_hydrated(monkeypatch):
+    payload = {"chunk_id": 7, "document_id": 1, "chunk_index": 0}
+    engine, statements = _setup(monkeypatch, [VectorHit(id="p", score=0.9, payload=payload)])
+
+    with Session(engine) as db:
+        res = search.semantic_search(db, "q", top_k=1)
+    assert len(statements) == 1
+    assert res["results"][0]["snippet"] == "row text"
@@ -0,0 +1,47 @@
+from app.core.config import settings
+from app.core.pdf_extract import extract_pdf_pages, join_pages, page_ranges, shutdown_pdf_pool
+from app.services.indexing import chunk_pages
+from scripts.bench_pdf_extract import write_sample_pdf
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    assert page_ranges(5, 2) == [(0, 2), (2, 4), (4, 5)]
+    assert page_ranges(0, 16) == []
+
+
+def test_join_pages_offsets_point_at_page_starts():
+    pages = ["\n  first", "second page", "", "fourth"]
+    text, offsets = join_pages(pages)
+
+    assert text == "\n".join(pages).strip()
+    assert text[offsets[1] :].startswith("second page")
+    assert text[offsets[3] :] == "fourth"
+    assert offsets[0] == 0
+
+
+def test_chunk_pages_maps_spans_to_pages():
+    offsets = [0, 100, 250]
+    assert chunk_pages(offsets, 0, 50) == (1, 1)
+    assert chunk_pages(offsets, 90, 100) == (1, 1)  # end is exclusive
+    assert chunk_pages(offsets, 90, 120) == (1, 2)
+    assert chunk_pages(offsets, 260, 400) == (3, 3)
+    assert chunk_pages(None, 0, 10) == (None, None)
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path, monkeypatch):
+    path = tmp_path / "sample.pdf"
+    write_sample_pdf(str(path), pages=12, lines_per_page=3)
+    monkeypatch.setattr(settings, "PDF_PARALLEL_MIN_PAGES", 1)
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 5)
+
+    with open(path, "rb") as f:
+        serial = extract_pdf_pages(f, workers=1)
+    try:
+        with open(path, "rb") as f:
+            parallel = extract_pdf_pages(f, workers=2)
+    finally:
+        shutdown_pdf_pool()
+
+    assert len(serial) == 12
+    assert parallel == serial
+    assert all(f"Page {i + 1} line 1" in page for i, page in enumerate(parallel))
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from app.core.embeddings import QueryBatcher
+
+
+def test_concurrent_queries_share_one_encode_call():
+    calls: list[list[str]] = []
+    start = threading.Barrier(8)
+
+    def fake_encode(texts):
+        calls.append(list(texts))
+        return np.asarray([[float(len(t))] for t in texts], dtype=np.float32)
+
+    batcher = QueryBatcher(window_ms=200, max_batch=8, encode=fake_encode)
+    results: dict[str, np.ndarray] = {}
+
+    def worker(q: str) -> None:
+        start.wait()
+        results[q] = batcher.submit(q)
+
+    queries = ["x" * i for i in range(1, 9)]
+    threads = [threading.Thread(target=worker, args=(q,)) for q in queries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) < len(queries)
+    assert sum(len(c) for c in calls) == len(queries)
+    for q in queries:
+        assert results[q][0] == float(len(q))
+
+
+def test_cancelled_awaiter_does_not_stop_the_batcher():
+    encoding = threading.Event()
+    release = threading.Event()
+
+    def slow_encode(texts):
+        encoding.set()
+        release.wait(5)
+        return np.asarray([[float(len(t))] for t in texts], dtype=np.float32)
+
+    batcher = QueryBatcher(window_ms=0, max_batch=8, encode=slow_encode)
+
+    async def scenario() -> np.ndarray:
+        waiter = asyncio.ensure_future(asyncio.wrap_future(batcher.submit_future("gone")))
+        await asyncio.to_thread(encoding.wait, 5)
+        waiter.cancel()  # client disconnects while its batch is encoding
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit_future("next")), 5)
+
+    assert asyncio.run(scenario())[0] == 4.0
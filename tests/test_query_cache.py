@@ -0,0 +1,30 @@
+import time
+
+import numpy as np
+
+from app.core.query_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryEmbeddingCache(max_size=2, ttl_seconds=0)
+    cache.put("a", np.ones(3))
+    cache.put("b", np.ones(3))
+    assert cache.get("a") is not None  # "a" is now most recent
+    cache.put("c", np.ones(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries():
+    cache = QueryEmbeddingCache(max_size=8, ttl_seconds=0.01)
+    cache.put("q", np.ones(3))
+    time.sleep(0.02)
+    assert cache.get("q") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  deterministic \n chunking ") == "deterministic chunking"
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core import retrieval
+from app.core.config import settings
+from app.db.models import Base, Chunk, Document
+from app.services import indexing
+
+_TEXT = " ".join(f"word{i}" for i in range(600))
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    state = {"fail": False}
+
+    def fake_embed(texts):
+        if state["fail"]:
+            raise RuntimeError("encoder down")
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_STORE_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CHUNK_SIZE_CHARS", 1000)
+    monkeypatch.setattr(settings, "CHUNK_OVERLAP_CHARS", 0)
+    monkeypatch.setattr(retrieval, "_store", None)
+    monkeypatch.setattr(retrieval, "_serving", None)
+    monkeypatch.setattr(indexing, "_rebuild_state", {"status": "idle"})
+    monkeypatch.setattr(indexing, "embed_texts", fake_embed)
+    monkeypatch.setattr(indexing, "embedding_dim", lambda: 4)
+    monkeypatch.setattr(indexing, "count_tokens", lambda texts: None)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'rebuild.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Document(id=1, filename="a.txt", content_type="text/plain", sha256="a" * 64, extracted_text=_TEXT))
+        db.add(Document(id=2, filename="b.txt", content_type="text/plain", sha256="b" * 64, extracted_text=_TEXT))
+        db.commit()
+        indexing.index_document(db, 1)
+        indexing.index_document(db, 2)
+    state["engine"] = engine
+    return state
+
+
+def _served(db: Session) -> tuple[str, set[int]]:
+    """Serving collection, and the chunk size every one of its hits resolves to."""
+    serving = retrieval.serving_collection(refresh=True)
+    hits = retrieval.get_vector_store().search(settings.QDRANT_COLLECTION, np.ones(4, np.float32), 100)
+    assert hits
+    sizes = set()
+    for hit in hits:
+        row = db.get(Chunk, hit.payload["chunk_id"])
+        assert row is not None and row.collection == serving
+        assert row.text == _TEXT[row.char_start : row.char_end]
+        if row.char_end < len(_TEXT):
+            sizes.add(row.char_end - row.char_start)
+    return serving, sizes
+
+
+def _n_chunks(size: int) -> int:
+    return -(-len(_TEXT) // size)
+
+
+def test_rebuild_keeps_serving_rows_until_the_swap(env, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_SIZE_CHARS", 400)
+    seen = []
+    with Session(env["engine"]) as db:
+        with Session(env["engine"]) as other:
+            def on_progress(n):
+                seen.append(_served(other))
+
+            out = indexing.rebuild_collection(db, on_progress=on_progress)
+
+        assert seen and all(s == ("docusearch_chunks_v1", {1000}) for s in seen)
+        assert out["collection"] == "docusearch_chunks_v2"
+        assert _served(db) == ("docusearch_chunks_v2", {400})
+        assert indexing.index_status(db)["chunks"] == 2 * _n_chunks(400)
+
+
+def test_single_document_index_during_rebuild_reaches_both_versions(env, monkeypatch):
+    with Session(env["engine"]) as db:
+        with Session(env["engine"]) as other:
+            def on_progress(n):
+                if not other.query(Document).filter_by(id=3).count():
+                    other.add(
+                        Document(id=3, filename="c.txt", content_type="text/plain", sha256="c" * 64, extracted_text=_TEXT)
+                    )
+                    other.commit()
+                    indexing.index_document(other, 3)
+
+            # Document 3 is added after the rebuild listed the documents.
+            indexing.rebuild_collection(db, on_progress=on_progress)
+
+        for collection in ("docusearch_chunks_v1", "docusearch_chunks_v2"):
+            assert db.query(Chunk).filter_by(collection=collection, document_id=3).count() == _n_chunks(1000)
+        hits = retrieval.get_vector_store().search(settings.QDRANT_COLLECTION, np.ones(4, np.float32), 100)
+        assert {h.payload["document_id"] for h in hits} == {1, 2, 3}
+
+
+def test_rollback_restores_the_old_chunking(env, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_SIZE_CHARS", 400)
+    with Session(env["engine"]) as db:
+        indexing.rebuild_collection(db)
+        assert _served(db) == ("docusearch_chunks_v2", {400})
+
+        assert indexing.rollback_collection()["collection"] == "docusearch_chunks_v1"
+        assert _served(db) == ("docusearch_chunks_v1", {1000})
+        assert indexing.index_status(db)["chunks"] == 2 * _n_chunks(1000)
+
+
+def test_failed_rebuild_drops_its_rows_and_collection(env, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_SIZE_CHARS", 400)
+    env["fail"] = True
+    with Session(env["engine"]) as db:
+        with pytest.raises(RuntimeError):
+            indexing.rebuild_collection(db)
+
+        assert indexing.rebuild_status()["status"] == "failed"
+        assert "docusearch_chunks_v2" not in retrieval.get_vector_store().list_collections()
+        assert db.query(Chunk).filter(Chunk.collection != "docusearch_chunks_v1").count() == 0
+        assert _served(db) == ("docusearch_chunks_v1", {1000})
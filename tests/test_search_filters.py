@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.core.bm25 import BM25Index
+from app.core.vector_store import (
+    LocalVectorStore,
+    QdrantVectorStore,
+    SearchFilter,
+    epoch_seconds,
+    filename_prefixes,
+)
+
+
+def _payload(document_id: int, filename: str, content_type: str, day: int) -> dict:
+    created = datetime(2024, 1, day, tzinfo=timezone.utc)
+    return {
+        "document_id": document_id,
+        "filename": filename,
+        "filename_prefixes": filename_prefixes(filename),
+        "content_type": content_type,
+        "created_at": epoch_seconds(created),
+    }
+
+
+_POINTS = [
+    ("00000000-0000-0000-0000-000000000001", _payload(1, "report_q1.pdf", "application/pdf", 1)),
+    ("00000000-0000-0000-0000-000000000002", _payload(2, "report_q2.pdf", "application/pdf", 10)),
+    ("00000000-0000-0000-0000-000000000003", _payload(3, "notes.txt", "text/plain", 20)),
+]
+
+_CASES = [
+    (SearchFilter(document_ids=(1, 3)), {"1", "3"}),
+    (SearchFilter(content_type="application/pdf"), {"1", "2"}),
+    (SearchFilter(filename_prefix="report_q"), {"1", "2"}),
+    (SearchFilter(filename_prefix="notes.txt"), {"3"}),
+    (SearchFilter(created_from=datetime(2024, 1, 10, tzinfo=timezone.utc)), {"2", "3"}),
+    (SearchFilter(created_to=datetime(2024, 1, 10)), {"1"}),
+    (SearchFilter(content_type="application/pdf", created_from=datetime(2024, 1, 5)), {"2"}),
+    (SearchFilter(content_type="image/png"), set()),
+]
+
+
+def _fill(store, collection: str) -> None:
+    ids = [pid for pid, _ in _POINTS]
+    vectors = np.eye(3, dtype=np.float32) + 0.1
+    store.upsert(collection, ids, vectors, [payload for _, payload in _POINTS])
+
+
+def _found(hits) -> set[str]:
+    return {h.id[-1] for h in hits}
+
+
+def test_local_store_applies_every_filter(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.create_collection("c", dim=3)
+    _fill(store, "c")
+    query = np.ones(3, dtype=np.float32)
+
+    for filters, expected in _CASES:
+        assert _found(store.search("c", query, top_k=10, filters=filters)) == expected
+        assert [_found(h) for h in store.search_batch("c", np.stack([query, query]), 10, filters)] == [expected] * 2
+
+    assert "filename_prefixes" not in (tmp_path / "c" / "points.jsonl").read_text()
+    assert all("filename_prefixes" not in h.payload for h in store.search("c", query, top_k=10))
+
+
+def test_qdrant_filters_match_local_semantics():
+    client = QdrantClient(":memory:")
+    store = QdrantVectorStore(lambda: client, lambda: None)
+    store.create_collection("c", dim=3)
+    store.ensure_payload_indexes("c")
+    _fill(store, "c")
+    query = np.ones(3, dtype=np.float32)
+
+    for filters, expected in _CASES:
+        assert _found(store.search("c", query, top_k=10, filters=filters)) == expected
+
+    hits = store.search("c", query, top_k=10) + store.search_batch("c", np.stack([query]), 10)[0]
+    assert hits and all("filename_prefixes" not in h.payload and "filename" in h.payload for h in hits)
+
+
+def test_bm25_search_restricted_to_allowed_chunks():
+    index = BM25Index()
+    index.add_many([(1, "red apple"), (2, "red apple pie"), (3, "green apple")])
+
+    assert {c for c, _ in index.search("apple", 10, allowed=[2, 3])} == {2, 3}
+    assert index.search("red", 10, allowed=[3]) == []
+    assert index.search("red", 10, allowed=[]) == []